@@ -1,5 +1,51 @@
-from gui import AccountManager
+import time
+start_time = time.perf_counter()  # Before any other import, so the import phase can be measured
 
-if __name__ == '__main__':
-    am = AccountManager()
+import argparse  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Account Manager")
+    parser.add_argument("--data", default="data", help="Folder of the save file")
+    parser.add_argument("--dev-data", action="store_true",
+                        help="Replace the save file with generated accounts. ONLY FOR DEVELOPMENT")
+    parser.add_argument("--profile-startup", nargs="?", const="", metavar="JSON_FILE",
+                        help="Print the duration of every startup phase. If a file is given, also write them to it")
+    parser.add_argument("--exit-after-startup", action="store_true", help="Close the window after the first frame")
+    parser.add_argument("--event-log", help="Append timed events of save file operations to this json lines file")
+    parser.add_argument("--ui-monitor", action="store_true",
+                        help="Print loop lag, widget count and slow callbacks with their stack")
+    parser.add_argument("--ui-overlay", action="store_true", help="Like --ui-monitor, also shown in the window")
+    args = parser.parse_args()
+
+    startup_profiler = None
+    if args.profile_startup is not None:
+        from startup_profiler import StartupProfiler
+        startup_profiler = StartupProfiler(start_time)
+
+    # Imported after parsing, so --help does not load Tk
+    from gui import AccountManager
+    if startup_profiler is not None:
+        startup_profiler.mark("imports")
+
+    instrumentation = None
+    if args.event_log is not None:
+        from instrumentation import Instrumentation, JsonLinesSink
+        instrumentation = Instrumentation(sinks=[JsonLinesSink(args.event_log)])
+
+    ui_monitor = None
+    if args.ui_monitor or args.ui_overlay:
+        from ui_monitor import UiMonitor
+        ui_monitor = UiMonitor(instrumentation=instrumentation, show_overlay=args.ui_overlay)
+
+    am = AccountManager(save_file_location=args.data, dev_data=args.dev_data, startup_profiler=startup_profiler,
+                        startup_profile_path=args.profile_startup or None, exit_after_startup=args.exit_after_startup,
+                        instrumentation=instrumentation, ui_monitor=ui_monitor)
     am.mainloop()
+
+    if instrumentation is not None:
+        instrumentation.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -35,5 +35,5 @@ class DeleteAccountWindow(tk.Toplevel):
 
     def on_confirm(self):
         self.controller.data_handler.delete_account(account_id=self.details["account_id"])
-        self.account_frame.destroy()
+        self.controller.account_list.remove_account(self.details["account_id"])  # Its frame gets reused
         self.destroy()
@@ -75,7 +75,8 @@ class EditAccountWindow(tk.Toplevel):
                                                     updated_parameters=changed_details,
                                                     save_to_file=True)
 
-        self.parent.update_draw()
+        # The account frame may show another account by now. The list redraws the account wherever it is
+        self.controller.account_list.refresh_account(self.account_details["account_id"])
 
         self.destroy()
 
@@ -1,9 +1,6 @@
 import tkinter as tk
-from PIL import ImageTk, Image
 from tkinter.font import Font
 from tooltip import create_tool_tip
-import subprocess
-from utils import change_icon_color
 from account_edit_window import EditAccountWindow
 from account_delete_window import DeleteAccountWindow
 
@@ -17,9 +14,8 @@ class AccountFrame(tk.Frame):
         self.controller = controller
         self.configure()
 
-        self.account_logo = ImageTk.PhotoImage(change_icon_color(Image.open(AccountFrame.default_account_logo_path),
-                                                                 target_color=self.controller.colors["account_icons"],
-                                                                 tk_controller=self.controller))
+        # Shared by all account frames
+        self.account_logo = self.controller.image_registry.get(AccountFrame.default_account_logo_path, "account_icons")
         self.account_details = account_details
 
         """UPPER LEVEL FRAMES"""
@@ -55,6 +51,10 @@ class AccountFrame(tk.Frame):
         self.data_frame = tk.Frame(self.info_frame, bg=self.info_frame.cget("bg"))
         self.data_frame.pack(fill="x")
 
+        self.detail_rows = {}  # Detail name -> DetailRow, in the order they are packed
+        self.spare_detail_rows = []  # Unpacked rows, reused for the next new detail
+        self.hovered = False
+
         """HOVER BEHAVIOUR"""
 
         self.bind("<Enter>", lambda e: self.on_hover_enter())
@@ -65,49 +65,58 @@ class AccountFrame(tk.Frame):
 
     def draw(self):
         hidden_details = [detail_name for detail_name, detail_data in self.controller.data_handler.get_detail_attributes().items() if detail_data["hidden"]]
+        shown_details = [(key, value) for key, value in self.account_details.items() if key not in hidden_details]
+
+        # Rows of details that are not shown anymore are kept for reuse
+        shown_detail_names = {key for key, _ in shown_details}
+        for detail_name in list(self.detail_rows):
+            if detail_name not in shown_detail_names:
+                detail_row = self.detail_rows.pop(detail_name)
+                detail_row.pack_forget()
+                self.spare_detail_rows.append(detail_row)
+
+        # Rows only get reconfigured if their detail or value changed
+        new_detail_rows = {}
+        for key, value in shown_details:
+            detail_row = self.detail_rows.get(key)
+            if detail_row is None:
+                detail_row = self.spare_detail_rows.pop() if self.spare_detail_rows else DetailRow(self)
+            detail_row.bind_detail(key, value)
+            new_detail_rows[key] = detail_row
+
+        # Repack rows from the first one out of order. Usually only new rows at the end are packed
+        packed_names, new_names = list(self.detail_rows), list(new_detail_rows)
+        first_change = 0
+        while first_change < min(len(packed_names), len(new_names)) and packed_names[first_change] == new_names[first_change]:
+            first_change += 1
+
+        for detail_name in packed_names[first_change:]:
+            self.detail_rows[detail_name].pack_forget()
+        for detail_name in new_names[first_change:]:
+            new_detail_rows[detail_name].pack(fill="x")
+
+        self.detail_rows = new_detail_rows
+
+    def bind_account(self, account_details: dict):
+        """
+        Show another account (or a new version of the same account) in this frame. Only widgets of details that
+        changed are touched
+        :param account_details: Details of the account to show
+        """
+
+        if account_details["account_name"] != self.account_details["account_name"]:
+            self.title_label.configure(text=account_details["account_name"])
+        self.account_details = account_details
 
-        for key, value in self.account_details.items():
-            if key not in hidden_details:
-                self.add_detail(key, value)
-
-    def update_draw(self):
-        hidden_details = [detail_name for detail_name, detail_data in self.controller.data_handler.get_detail_attributes().items() if detail_data["hidden"]]
-        updated_details = self.controller.data_handler.get_account_details(self.account_details["account_id"])
-
-        # Remove previously drawn detail infos
-        for child in self.data_frame.winfo_children():
-            child.destroy()
-
-        for key, value in updated_details.items():
-            if key not in hidden_details:
-                self.add_detail(key, value)
-
-    def add_detail(self, detail, value):
-        frame_bg = self.data_frame.cget("bg")
-        new_detail_frame = tk.Frame(self.data_frame, bg=frame_bg)
+        # Frames get reused while the mouse may still be on them
+        if self.hovered:
+            self.on_hover_leave()
 
-        if detail in self.controller.acc_detail_display.keys():
-            detail_tk_img = self.controller.acc_detail_display[detail]["img"]
-        else:
-            detail_tk_img = self.controller.acc_detail_display["unknown_detail"]["img"]
-
-        detail_logo = tk.Label(new_detail_frame, image=detail_tk_img, bg=frame_bg)
-        detail_logo.pack(side="left", anchor="n")
-
-        try:
-            create_tool_tip(detail_logo, self.controller.acc_detail_display[detail]["display_name"])
-        except KeyError:
-            create_tool_tip(detail_logo, self.controller.acc_detail_display["unknown_detail"]["display_name"] + ": " + detail)
-
-        detail_value = tk.Label(new_detail_frame, text=value, bg=frame_bg, font=Font(size=10), cursor="hand2",
-                                fg=self.controller.colors["account_text"])
-        detail_value.bind("<Button-1>", lambda e: self.copy_to_clipboard(value))
-        detail_value.bind("<Enter>", lambda e: self.on_detail_enter(detail_value))
-        detail_value.bind("<Leave>", lambda e: self.on_detail_leave(detail_value))
-        detail_value.pack(side="left")
-        # create_tool_tip(detail_value, "Click to copy")
+        self.draw()
 
-        new_detail_frame.pack(fill="x")
+    def update_draw(self):
+        # Storage backends may return a new dict instead of the edited one
+        self.bind_account(self.controller.data_handler.get_account_details(self.account_details["account_id"]))
 
     def on_detail_enter(self, detail_obj):
         detail_obj.configure(fg=self.controller.colors["account_text_hover"])
@@ -116,20 +125,15 @@ class AccountFrame(tk.Frame):
         detail_obj.configure(fg=self.controller.colors["account_text"])
 
     def copy_to_clipboard(self, value):
-        # Copy text to clipboard
-        cmd = 'echo ' + str(value).strip() + '|clip'
-        subprocess.check_call(cmd, shell=True)
-
-        print(f"Copied \"{value}\" to clipboard")
-
-        # Play notification bar
-        self.controller.display_notification("Copied to Clipboard")
+        self.controller.copy_to_clipboard(value)
 
     def on_hover_enter(self):
+        self.hovered = True
         self.delete_button.pack(side="right")
         self.edit_button.pack(side="right")
 
     def on_hover_leave(self):
+        self.hovered = False
         self.delete_button.pack_forget()
         self.edit_button.pack_forget()
 
@@ -140,3 +144,88 @@ class AccountFrame(tk.Frame):
         delete_window = DeleteAccountWindow(self.account_details, self.controller, self)  # Toplevel type
 
 
+class DetailRow(tk.Frame):
+    """
+    Icon and value of a single account detail. Rebound to other details instead of being destroyed
+    """
+
+    def __init__(self, account_frame: AccountFrame, *args, **kwargs):
+        super().__init__(account_frame.data_frame, *args, bg=account_frame.data_frame.cget("bg"), **kwargs)
+        self.account_frame = account_frame
+        self.controller = account_frame.controller
+        self.detail = None
+        self.value = None
+
+        frame_bg = self.cget("bg")
+
+        self.detail_logo = tk.Label(self, bg=frame_bg)
+        self.detail_logo.pack(side="left", anchor="n")
+        self.tool_tip = create_tool_tip(self.detail_logo, "")
+
+        self.detail_value = tk.Label(self, bg=frame_bg, font=Font(size=10), cursor="hand2",
+                                     fg=self.controller.colors["account_text"])
+        self.detail_value.bind("<Button-1>", lambda e: self.account_frame.copy_to_clipboard(self.value))
+        self.detail_value.bind("<Enter>", lambda e: self.account_frame.on_detail_enter(self.detail_value))
+        self.detail_value.bind("<Leave>", lambda e: self.account_frame.on_detail_leave(self.detail_value))
+        self.detail_value.pack(side="left")
+        # create_tool_tip(detail_value, "Click to copy")
+
+    def bind_detail(self, detail, value):
+        """
+        Show another detail. Nothing is reconfigured for an unchanged detail
+        """
+
+        if detail != self.detail:
+            self.detail = detail
+
+            if detail in self.controller.acc_detail_display.keys():
+                self.detail_logo.configure(image=self.controller.acc_detail_display[detail]["img"])
+                self.tool_tip.text = self.controller.acc_detail_display[detail]["display_name"]
+            else:
+                self.detail_logo.configure(image=self.controller.acc_detail_display["unknown_detail"]["img"])
+                self.tool_tip.text = self.controller.acc_detail_display["unknown_detail"]["display_name"] + ": " + detail
+
+        if value != self.value:
+            self.value = value
+            self.detail_value.configure(text=value)
+
+
+class AccountFramePool:
+    """
+    Account frames that are not shown at the moment. Frames are rebound to other accounts instead of being
+    destroyed and created again
+    """
+
+    max_spare_frames = 50  # Spare frames above this number are destroyed
+
+    def __init__(self, controller, master):
+        """
+        :param controller: Main window
+        :param master: Parent widget of all frames of the pool
+        """
+        self.controller = controller
+        self.master = master
+        self.spare_frames = []
+
+    def acquire(self, account_details: dict):
+        """
+        :return: Account frame showing the account
+        """
+
+        if self.spare_frames:
+            account_frame = self.spare_frames.pop()
+            account_frame.bind_account(account_details)
+            return account_frame
+
+        return AccountFrame(master=self.master, controller=self.controller, bg=self.controller.colors["tertiary"],
+                            account_details=account_details)
+
+    def release(self, account_frame: AccountFrame):
+        """
+        Return an unmapped account frame to the pool
+        """
+
+        if len(self.spare_frames) < AccountFramePool.max_spare_frames:
+            self.spare_frames.append(account_frame)
+        else:
+            account_frame.destroy()
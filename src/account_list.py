@@ -0,0 +1,535 @@
+import tkinter as tk
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from account_frame import AccountFramePool
+from canvas_account_row import CanvasRowRenderer
+from group_frame import GroupFrame
+
+
+class AccountListModel:
+    """
+    Layout of the account list without any widgets. Every entry is a group header or an account row with its
+    height. The positions of the entries are kept as running sums, so the entries inside a viewport are found
+    by bisection.
+    """
+
+    def __init__(self):
+        self.entries = []  # Tuples of entry kind ("group" or "account") and id
+        self.heights = []
+        self.offsets = [0]  # Y position of every entry. The last value is the total height
+
+    def set_entries(self, entries: list, heights: list):
+        self.entries = entries
+        self.heights = heights
+        self.offsets = list(accumulate(heights, initial=0))
+
+    def set_heights(self, changed_heights: dict):
+        """
+        :param changed_heights: Dictionary of entry index and new height
+        """
+
+        if not changed_heights:
+            return
+
+        for index, height in changed_heights.items():
+            self.heights[index] = height
+
+        # Only positions below the first change move
+        first_index = min(changed_heights)
+        self.offsets[first_index:] = accumulate(self.heights[first_index:], initial=self.offsets[first_index])
+
+    def get_visible_range(self, top, bottom):
+        """
+        :return: Index of the first entry intersecting the area between top and bottom and index after the last one
+        """
+
+        first_index = max(bisect_right(self.offsets, top) - 1, 0)
+        last_index = min(bisect_left(self.offsets, bottom), len(self.entries))
+        return first_index, last_index
+
+    def get_total_height(self):
+        return self.offsets[-1]
+
+
+class RenderScheduler:
+    """
+    Collects layout and render requests and applies them together once per idle cycle of the Tk loop
+    """
+
+    def __init__(self, tk_widget, apply_function):
+        """
+        :param tk_widget: Any widget, used to schedule the idle callback
+        :param apply_function: Function called with the dirty group ids (None if all groups are dirty)
+        """
+        self.tk_widget = tk_widget
+        self.apply_function = apply_function
+
+        self.dirty_groups = set()
+        self.all_groups_dirty = False
+        self.scheduled_call = None
+
+    def request_layout(self, group_ids=None):
+        """
+        :param group_ids: Groups whose entries changed. None marks all groups
+        """
+
+        if group_ids is None:
+            self.all_groups_dirty = True
+        else:
+            self.dirty_groups.update(group_ids)
+
+        self.schedule()
+
+    def request_render(self):
+        self.schedule()
+
+    def schedule(self):
+        if self.scheduled_call is None:
+            self.scheduled_call = self.tk_widget.after_idle(self.run)
+
+    def flush(self):
+        """
+        Apply pending requests right away
+        """
+
+        if self.scheduled_call is not None:
+            self.tk_widget.after_cancel(self.scheduled_call)
+            self.run()
+
+    def run(self):
+        dirty_groups = None if self.all_groups_dirty else self.dirty_groups
+
+        self.scheduled_call = None
+        self.dirty_groups = set()
+        self.all_groups_dirty = False
+
+        self.apply_function(dirty_groups)
+
+
+class WindowEntry:
+    """
+    Entry drawn as a widget in a canvas window. Offers the same methods as a CanvasAccountRow
+    """
+
+    def __init__(self, canvas: tk.Canvas, widget: tk.Widget, width, on_remove=None, on_resize=None):
+        """
+        :param canvas: Canvas of the list
+        :param widget: Group frame or account frame
+        :param width: Width of the window in pixels
+        :param on_remove: Function called with the widget after its window was deleted
+        :param on_resize: Function called once Tk laid out the widget with a new height
+        """
+        self.canvas = canvas
+        self.widget = widget
+        self.on_remove = on_remove
+        self.on_resize = on_resize
+
+        # Height of the last layout. Reused widgets may have been rebound to other content, so only a layout
+        # reported after this point counts
+        self.height = None
+
+        # Bound once per widget, as every binding creates a Tcl command and pooled widgets are drawn many times
+        if not hasattr(widget, "window_entry"):
+            widget.bind("<Configure>", WindowEntry.dispatch_configure)
+        widget.window_entry = self
+
+        self.canvas_item = self.canvas.create_window(0, 0, window=widget, anchor="nw", width=width, tags="list_entry")
+
+    def get_height(self):
+        """
+        :return: Height of the widget in pixels. None if it was not laid out yet
+        """
+        return self.height
+
+    @staticmethod
+    def dispatch_configure(event):
+        window_entry = getattr(event.widget, "window_entry", None)
+        if window_entry is not None:
+            window_entry.on_configure(event)
+
+    def on_configure(self, event):
+        if event.height != self.height:
+            self.height = event.height
+            if self.on_resize is not None:
+                self.on_resize()
+
+    def place(self, x, y):
+        self.canvas.coords(self.canvas_item, x, y)
+
+    def set_width(self, width):
+        self.canvas.itemconfigure(self.canvas_item, width=width)
+
+    def bind_account(self, account_details: dict):
+        self.widget.bind_account(account_details)
+
+    def remove(self):
+        # Deleting the canvas item only unmaps the widget
+        self.canvas.delete(self.canvas_item)
+        self.widget.window_entry = None
+        if self.on_remove is not None:
+            self.on_remove(self.widget)
+
+
+class AccountList:
+    """
+    Virtualized list of groups and accounts drawn into a canvas. Only entries in the visible part of the canvas
+    (plus an overscan margin) exist as widgets. Account rows scrolled out of view are rebound to the accounts
+    scrolling in. Heights of entries not drawn yet are estimated and corrected once they were drawn.
+    Depending on the "row_renderer" setting, account rows are account frames or drawn as canvas items.
+    """
+
+    overscan = 300  # Pixels above and below the viewport that are drawn as well
+    side_padding = 5
+    row_spacing = 5  # Space above every account row
+    scrollbar_width = 17
+
+    # Height estimates used until an entry of the same kind was measured
+    default_group_height = 26
+    default_message_height = 24  # Added to groups showing the "No matches" message
+    default_row_height = 40  # Account row with a single detail line
+    default_line_height = 19  # Added for every further detail line
+
+    max_render_passes = 5  # Passes of measuring and repositioning per render
+
+    def __init__(self, controller, canvas: tk.Canvas, scrollbar: tk.Scrollbar):
+        """
+        :param controller: Main window
+        :param canvas: Scrollable canvas the list is drawn into
+        :param scrollbar: Vertical scrollbar of the canvas
+        """
+        self.controller = controller
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.model = AccountListModel()
+
+        """DATA"""
+
+        self.groups = {}  # Group id -> group name
+        self.group_accounts = {}  # Group id -> account ids in display order
+        self.detail_lines = {}  # Account id -> number of text lines of its visible details
+        self.hidden_details = set()
+        self.collapsed_groups = set()
+        self.empty_groups = set()  # Groups without matches for the current filter
+        self.account_filter = None  # Ids of the accounts to show. None shows all
+
+        """WIDGETS"""
+
+        self.group_frames = {}  # Group id -> GroupFrame. Created when first visible
+        self.drawn_entries = {}  # Entry -> WindowEntry or CanvasAccountRow of all entries currently drawn
+        self.account_frame_pool = AccountFramePool(controller=self.controller, master=self.canvas)
+        self.row_renderer = None  # CanvasRowRenderer if rows are drawn as canvas items
+        self.measured_heights = {}  # Height key (see get_height_key) -> last measured height
+
+        self.rendering = False
+        self.render_requested = False
+        self.canvas_width, self.canvas_height = 1, 1  # Size of the last <Configure> event of the canvas
+
+        # Changes are applied once per idle cycle. Scrolling is drawn right away
+        self.render_scheduler = RenderScheduler(self.canvas, self.apply_changes)
+        self.group_ranges = {}  # Group id -> first and after last index of the group entries in the model
+
+        self.canvas.configure(yscrollcommand=self.on_view_change)
+        self.scrollbar.configure(command=self.canvas.yview)
+        self.canvas.bind("<Configure>", self.on_canvas_resize)
+
+    """ACCOUNTS"""
+
+    def load(self):
+        """
+        Read all groups and accounts from the data handler and redraw the list
+        """
+
+        data_handler = self.controller.data_handler
+        self.hidden_details = {detail_name for detail_name, detail_data in data_handler.get_detail_attributes().items()
+                               if detail_data["hidden"]}
+
+        # CASE: Rows are drawn as canvas items. The renderer is created once and shared by all rows
+        if data_handler.get_settings().get("row_renderer", "widgets") == "canvas":
+            if self.row_renderer is None:
+                self.row_renderer = CanvasRowRenderer(controller=self.controller, canvas=self.canvas)
+            self.row_renderer.hidden_details = self.hidden_details
+        else:
+            self.row_renderer = None
+
+        # Rows drawn by the previous renderer are drawn again
+        for entry in [entry for entry in self.drawn_entries if entry[0] == "account"]:
+            self.release_entry(entry)
+
+        groups = data_handler.get_groups()
+        self.groups = {group_id: group_params["name"] for group_id, group_params in groups.items()}
+        self.collapsed_groups = {group_id for group_id, group_params in groups.items() if group_params.get("collapsed")}
+        self.group_accounts = {group_id: [] for group_id in self.groups}
+        self.detail_lines = {}
+        self.group_ranges = {}
+
+        self.add_accounts(data_handler.get_accounts())
+        self.render_scheduler.request_layout()
+
+    def add_accounts(self, accounts):
+        """
+        Append accounts to their groups. The list is laid out once for all of them
+        :param accounts: Iterable of account id and account details
+        """
+
+        changed_groups = set()
+        for account_id, account_params in accounts:
+            # CASE: Account has group
+            if account_params["group_id"] in self.group_accounts:
+                self.group_accounts[account_params["group_id"]].append(account_id)
+                self.detail_lines[account_id] = self.count_detail_lines(account_params)
+                changed_groups.add(account_params["group_id"])
+
+            # CASE: No group associated with account
+            else:
+                pass
+                # TODO
+
+        self.render_scheduler.request_layout(changed_groups)
+
+    def count_detail_lines(self, account_details: dict):
+        return sum(str(value).count("\n") + 1 for key, value in account_details.items() if key not in self.hidden_details)
+
+    def set_filter(self, account_filter):
+        """
+        :param account_filter: Ids of the accounts to show (e.g. search results). If None, all accounts are shown
+        """
+
+        self.account_filter = account_filter
+        self.render_scheduler.request_layout()
+
+    def toggle_group(self, group_id):
+        """
+        Collapse or expand a group. Rows of an expanded group are only built once they scroll into view
+        """
+
+        if group_id in self.collapsed_groups:
+            self.collapsed_groups.discard(group_id)
+        else:
+            self.collapsed_groups.add(group_id)
+
+        # The state is kept in the save file for the next launch
+        self.controller.data_handler.set_group_collapsed(group_id, group_id in self.collapsed_groups)
+        self.render_scheduler.request_layout([group_id])
+
+    def refresh_account(self, account_id):
+        """
+        Redraw an account after it was changed
+        """
+
+        try:
+            account_details = self.controller.data_handler.get_account_details(account_id)
+        except KeyError:
+            self.remove_account(account_id)
+            return
+
+        self.detail_lines[account_id] = self.count_detail_lines(account_details)
+
+        if ("account", account_id) in self.drawn_entries:
+            self.drawn_entries[("account", account_id)].bind_account(account_details)
+
+        # The height of the row may have changed
+        self.render_scheduler.request_render()
+
+    def remove_account(self, account_id):
+        """
+        Remove an account from the list after it was deleted
+        """
+
+        for group_id, account_ids in self.group_accounts.items():
+            if account_id in account_ids:
+                account_ids.remove(account_id)
+                self.render_scheduler.request_layout([group_id])
+
+        self.detail_lines.pop(account_id, None)
+
+    """LAYOUT"""
+
+    def get_height_key(self, entry):
+        """
+        :return: Key of entries that have the same height
+        """
+
+        kind, entry_id = entry
+        if kind == "group":
+            return kind, entry_id in self.empty_groups
+
+        return kind, self.detail_lines.get(entry_id, 1)
+
+    def estimate_height(self, entry):
+        height_key = self.get_height_key(entry)
+        if height_key in self.measured_heights:
+            return self.measured_heights[height_key]
+
+        # CASE: Group header, with or without "No matches" message
+        if height_key[0] == "group":
+            return AccountList.default_group_height + (AccountList.default_message_height if height_key[1] else 0)
+
+        return AccountList.row_spacing + AccountList.default_row_height + (height_key[1] - 1) * AccountList.default_line_height
+
+    def get_group_entries(self, group_id):
+        """
+        :return: Entries of a group header and its shown accounts
+        """
+
+        account_ids = self.group_accounts[group_id]
+        if self.account_filter is not None:
+            account_ids = [account_id for account_id in account_ids if account_id in self.account_filter]
+
+        self.empty_groups.discard(group_id)
+        if group_id in self.collapsed_groups:
+            account_ids = []
+
+        # CASE: Filter applied but nothing found. The group shows a message
+        elif self.account_filter is not None and not account_ids:
+            self.empty_groups.add(group_id)
+
+        return [("group", group_id)] + [("account", account_id) for account_id in account_ids]
+
+    def apply_changes(self, dirty_groups=None):
+        """
+        Rebuild the entries of changed groups and redraw the visible part. Unchanged groups keep their entries
+        and measured heights
+        :param dirty_groups: Ids of the changed groups. None rebuilds all groups
+        """
+
+        entries, heights, group_ranges = [], [], {}
+
+        for group_id in self.groups:
+            # CASE: Group unchanged. Take its entries from the current model
+            if dirty_groups is not None and group_id not in dirty_groups and group_id in self.group_ranges:
+                start, end = self.group_ranges[group_id]
+                group_entries, group_heights = self.model.entries[start:end], self.model.heights[start:end]
+            else:
+                group_entries = self.get_group_entries(group_id)
+                group_heights = [self.estimate_height(entry) for entry in group_entries]
+
+            group_ranges[group_id] = len(entries), len(entries) + len(group_entries)
+            entries.extend(group_entries)
+            heights.extend(group_heights)
+
+        self.model.set_entries(entries, heights)
+        self.group_ranges = group_ranges
+
+        # Drawn groups may show a different state now
+        for (kind, entry_id), drawn_entry in self.drawn_entries.items():
+            if kind == "group":
+                drawn_entry.widget.set_state(collapsed=entry_id in self.collapsed_groups, no_results=entry_id in self.empty_groups)
+
+        self.update_scroll_region()
+        self.render()
+
+    def update_scroll_region(self):
+        self.canvas.configure(scrollregion=(0, 0, self.canvas_width, self.model.get_total_height()))
+
+    def get_item_width(self):
+        return max(self.canvas_width - AccountList.scrollbar_width - 2 * AccountList.side_padding, 1)
+
+    """DRAWING"""
+
+    def render(self):
+        """
+        Make sure exactly the entries in and around the viewport are drawn at their current position
+        """
+
+        # Rendering changes the scroll region, which calls back into the list
+        if self.rendering:
+            self.render_requested = True
+            return
+
+        self.rendering = True
+        try:
+            for _ in range(AccountList.max_render_passes):
+                self.render_requested = False
+                self.render_viewport()
+
+                if not self.render_requested:
+                    break
+        finally:
+            self.rendering = False
+
+    def render_viewport(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas_height
+        first_index, last_index = self.model.get_visible_range(max(top - AccountList.overscan, 0),
+                                                               bottom + AccountList.overscan)
+        visible_entries = self.model.entries[first_index:last_index]
+
+        # Release entries that left the viewport first, so their rows can be reused right away
+        visible_entry_set = set(visible_entries)
+        for entry in list(self.drawn_entries):
+            if entry not in visible_entry_set:
+                self.release_entry(entry)
+
+        for entry in visible_entries:
+            if entry not in self.drawn_entries:
+                self.draw_entry(entry)
+
+        # Correct the estimated heights with the measured ones. Widgets are measured by Tk once it laid them out,
+        # which renders the list again
+        changed_heights = {}
+        for index, entry in enumerate(visible_entries, start=first_index):
+            height = self.drawn_entries[entry].get_height()
+            if height is None:
+                continue
+
+            height += self.get_top_padding(entry)
+            self.measured_heights[self.get_height_key(entry)] = height
+
+            if height != self.model.heights[index]:
+                changed_heights[index] = height
+
+        if changed_heights:
+            self.model.set_heights(changed_heights)
+            self.update_scroll_region()
+
+            # Corrected heights may move other entries into the viewport
+            self.render_requested = True
+
+        for index, entry in enumerate(visible_entries, start=first_index):
+            self.drawn_entries[entry].place(AccountList.side_padding, self.model.offsets[index] + self.get_top_padding(entry))
+
+    @staticmethod
+    def get_top_padding(entry):
+        return AccountList.row_spacing if entry[0] == "account" else 0
+
+    def draw_entry(self, entry):
+        kind, entry_id = entry
+
+        if kind == "group":
+            if entry_id not in self.group_frames:
+                self.group_frames[entry_id] = GroupFrame(master=self.canvas, controller=self.controller,
+                                                         group_id=entry_id, title=self.groups[entry_id])
+            group_frame = self.group_frames[entry_id]
+            group_frame.set_state(collapsed=entry_id in self.collapsed_groups, no_results=entry_id in self.empty_groups)
+            self.drawn_entries[entry] = WindowEntry(self.canvas, group_frame, self.get_item_width(),
+                                                    on_resize=self.render_scheduler.request_render)
+
+        # CASE: Account drawn as canvas items
+        elif self.row_renderer is not None:
+            self.drawn_entries[entry] = self.row_renderer.create_row(self.controller.data_handler.get_account_details(entry_id),
+                                                                     self.get_item_width())
+
+        else:
+            # Rebinds a row scrolled out of view if there is one
+            account_frame = self.account_frame_pool.acquire(self.controller.data_handler.get_account_details(entry_id))
+            self.drawn_entries[entry] = WindowEntry(self.canvas, account_frame, self.get_item_width(),
+                                                    on_remove=self.account_frame_pool.release,
+                                                    on_resize=self.render_scheduler.request_render)
+
+    def release_entry(self, entry):
+        self.drawn_entries.pop(entry).remove()
+
+    """EVENTS"""
+
+    def on_view_change(self, first, last):
+        # Keep the scrollbar in sync and draw what scrolled into view
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def on_canvas_resize(self, event):
+        self.canvas_width, self.canvas_height = event.width, event.height
+
+        item_width = self.get_item_width()
+        for drawn_entry in self.drawn_entries.values():
+            drawn_entry.set_width(item_width)
+        self.render_scheduler.request_layout([])
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+from file_utils import write_file_atomic
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupRepository:
+    """
+    Incremental backups of the save file. Every record (settings, infos, groups and each account) is stored once
+    as a chunk named by the hash of its content, so unchanged records are shared by all backups.
+    The hashes of the accounts are grouped into buckets by account id, and the buckets and the account order are
+    chunks as well. A backup is a manifest of the hashes of its records, buckets and account order, so a backup
+    after a single change only writes the account, its bucket and a small manifest.
+
+    Layout: <location>/chunks/<first two characters of the hash>/<hash>.json and <location>/manifests/<name>.json
+    Backup names start with the creation time, so they sort by age.
+    """
+
+    manifest_version = 1
+    bucket_count = 256  # Buckets the account hashes are spread over
+    chunk_folder_name = "chunks"
+    manifest_folder_name = "manifests"
+    name_time_format = "%Y%m%d_%H%M%S_%f"
+    name_time_length = 22  # Characters of the creation time at the start of a backup name
+
+    # Period of the retention rules, as the part of the creation time that has to differ between kept backups
+    retention_periods = {
+        "hourly": lambda created: (created.date(), created.hour),
+        "daily": lambda created: created.date(),
+        "weekly": lambda created: created.isocalendar()[:2],
+    }
+
+    def __init__(self, location):
+        """
+        :param location: Folder of the repository. Created with the first backup
+        """
+        self.location = location
+        self.chunk_folder = os.path.join(location, BackupRepository.chunk_folder_name)
+        self.manifest_folder = os.path.join(location, BackupRepository.manifest_folder_name)
+
+        # Hashes of the stored chunks. Listed on first use. Only a hint, as chunks may be deleted by another process
+        self.known_chunks = None
+
+    """CHUNKS"""
+
+    @staticmethod
+    def encode_record(record):
+        # Key order is kept, as the order of account details is shown in the GUI
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+
+    @staticmethod
+    def hash_chunk(chunk: bytes):
+        return hashlib.sha256(chunk).hexdigest()
+
+    def get_chunk_path(self, chunk_hash: str):
+        return os.path.join(self.chunk_folder, chunk_hash[:2], chunk_hash + ".json")
+
+    def get_known_chunks(self):
+        if self.known_chunks is None:
+            self.known_chunks = set()
+            if os.path.isdir(self.chunk_folder):
+                for shard in os.scandir(self.chunk_folder):
+                    if shard.is_dir():
+                        self.known_chunks.update(entry.name[:-len(".json")] for entry in os.scandir(shard.path)
+                                                 if entry.name.endswith(".json"))
+
+        return self.known_chunks
+
+    def write_record(self, record):
+        """
+        Store a record unless a chunk with the same content exists
+        :return: Hash of the record and number of bytes written (0 if it was stored already)
+        """
+
+        chunk = BackupRepository.encode_record(record)
+        chunk_hash = BackupRepository.hash_chunk(chunk)
+
+        # CASE: Stored already. The file is checked, as the chunk may have been collected since it was listed
+        known_chunks = self.get_known_chunks()
+        chunk_path = self.get_chunk_path(chunk_hash)
+        if chunk_hash in known_chunks and os.path.exists(chunk_path):
+            return chunk_hash, 0
+
+        # Renamed into place, so a chunk file is always complete. Chunks are not synced one by one, restoring
+        # checks their hashes instead
+        os.makedirs(os.path.dirname(chunk_path), exist_ok=True)
+        with open(chunk_path + ".tmp", "wb") as chunk_file:
+            chunk_file.write(chunk)
+        os.replace(chunk_path + ".tmp", chunk_path)
+
+        known_chunks.add(chunk_hash)
+        return chunk_hash, len(chunk)
+
+    def read_record(self, chunk_hash: str):
+        try:
+            with open(self.get_chunk_path(chunk_hash), "rb") as chunk_file:
+                chunk = chunk_file.read()
+        except FileNotFoundError:
+            raise BackupError(f"Record {chunk_hash} is missing")
+
+        if BackupRepository.hash_chunk(chunk) != chunk_hash:
+            raise BackupError(f"Record {chunk_hash} is corrupted")
+
+        return json.loads(chunk)
+
+    """BACKUPS"""
+
+    def create_backup(self, records: dict, accounts, label: str = "", created: datetime = None):
+        """
+        :param records: Dictionary of root key (settings, infos, groups) and its content
+        :param accounts: Iterable of account id and account details
+        :param label: Appended to the backup name. Only letters, digits, "-" and "_" are kept
+        :param created: Creation time of the backup. Defaults to now
+        :return: Name of the backup, number of records and number of bytes written for new records
+        """
+
+        created = datetime.now() if created is None else created
+        label = re.sub(r"[^A-Za-z0-9_-]", "", label)
+        name = created.strftime(BackupRepository.name_time_format) + (f"_{label}" if label else "")
+
+        manifest = {"version": BackupRepository.manifest_version, "created": created.isoformat(), "label": label,
+                    "records": {}, "account_order": None, "account_buckets": {}}
+        record_count, written_bytes = 0, 0
+
+        def write(record):
+            nonlocal record_count, written_bytes
+            chunk_hash, chunk_bytes = self.write_record(record)
+            record_count += 1
+            written_bytes += chunk_bytes
+            return chunk_hash
+
+        for key, record in records.items():
+            manifest["records"][key] = write(record)
+
+        account_order = []
+        buckets = {}
+        for account_id, account_details in accounts:
+            account_order.append(account_id)
+            buckets.setdefault(BackupRepository.get_bucket(account_id), {})[account_id] = write(account_details)
+
+        # Sorted, so a bucket has the same hash regardless of the order its accounts were added in
+        manifest["account_order"] = write(account_order)
+        manifest["account_buckets"] = {bucket: write(dict(sorted(bucket_hashes.items())))
+                                       for bucket, bucket_hashes in sorted(buckets.items())}
+
+        # The manifest is written last, so a backup only exists once all of its records do
+        os.makedirs(self.manifest_folder, exist_ok=True)
+        write_file_atomic(self.get_manifest_path(name), json.dumps(manifest))
+
+        return name, record_count, written_bytes
+
+    @staticmethod
+    def get_bucket(account_id: str):
+        return str(zlib.crc32(account_id.encode()) % BackupRepository.bucket_count)
+
+    def get_manifest_path(self, name: str):
+        return os.path.join(self.manifest_folder, name + ".json")
+
+    def read_manifest(self, name: str):
+        try:
+            with open(self.get_manifest_path(name)) as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            raise BackupError(f"No backup named {name}")
+
+        if manifest.get("version") != BackupRepository.manifest_version:
+            raise BackupError(f"Backup {name} has the unknown version {manifest.get('version')}")
+
+        return manifest
+
+    def list_backups(self):
+        """
+        :return: List of backup name and creation time, oldest first
+        """
+
+        if not os.path.isdir(self.manifest_folder):
+            return []
+
+        backups = []
+        for file_name in os.listdir(self.manifest_folder):
+            # Skips temporary files of manifests being written
+            if not file_name.endswith(".json") or file_name.startswith("."):
+                continue
+
+            name = file_name[:-len(".json")]
+            try:
+                created = datetime.strptime(name[:BackupRepository.name_time_length], BackupRepository.name_time_format)
+            except ValueError:
+                continue
+            backups.append((name, created))
+
+        return sorted(backups, key=lambda backup: backup[1])
+
+    def find_backup(self, point_in_time: datetime):
+        """
+        :return: Name of the latest backup created at or before the point in time. None if there is none
+        """
+
+        earlier_backups = [name for name, created in self.list_backups() if created <= point_in_time]
+        return earlier_backups[-1] if earlier_backups else None
+
+    def restore(self, name: str):
+        """
+        :param name: Name of the backup
+        :return: Data structure in the json save file layout. Raises BackupError if a record is missing or corrupted
+        """
+
+        manifest = self.read_manifest(name)
+
+        data = {key: self.read_record(chunk_hash) for key, chunk_hash in manifest["records"].items()}
+
+        account_hashes = {}
+        for bucket_hash in manifest["account_buckets"].values():
+            account_hashes.update(self.read_record(bucket_hash))
+
+        data["accounts"] = {account_id: self.read_record(account_hashes[account_id])
+                            for account_id in self.read_record(manifest["account_order"])}
+
+        return data
+
+    """RETENTION"""
+
+    def apply_retention(self, keep_last: int = 0, now: datetime = None, **keep_periods):
+        """
+        Delete backups no retention rule keeps. Every rule keeps the latest backup of each of its most recent
+        periods, e.g. hourly=24 keeps the latest backup of each of the last 24 hours that had a backup.
+        Chunks are not deleted, see collect_garbage
+        :param keep_last: Number of latest backups kept regardless of their age
+        :param now: Backups created after this time are always kept. Defaults to now
+        :param keep_periods: Number of periods kept per rule (see retention_periods), e.g. daily=7
+        :return: Names of the deleted backups
+        """
+
+        now = datetime.now() if now is None else now
+        backups = self.list_backups()[::-1]  # Latest first
+
+        kept_backups = {name for name, created in backups[:keep_last]}
+        kept_backups.update(name for name, created in backups if created > now)
+
+        for period_name, period_count in keep_periods.items():
+            if period_name not in BackupRepository.retention_periods:
+                raise ValueError(f"Unknown retention period \"{period_name}\"")
+
+            get_period = BackupRepository.retention_periods[period_name]
+            kept_periods = set()
+            for name, created in backups:
+                if len(kept_periods) >= period_count:
+                    break
+
+                # CASE: First backup of a period, so the latest of that period
+                if get_period(created) not in kept_periods:
+                    kept_periods.add(get_period(created))
+                    kept_backups.add(name)
+
+        deleted_backups = [name for name, created in backups if name not in kept_backups]
+        for name in deleted_backups:
+            os.remove(self.get_manifest_path(name))
+
+        return deleted_backups
+
+    def collect_garbage(self):
+        """
+        Delete all chunks no backup refers to
+        :return: Number of deleted chunks and their size in bytes
+        """
+
+        referenced_chunks = set()
+        for name, created in self.list_backups():
+            manifest = self.read_manifest(name)
+            referenced_chunks.update(manifest["records"].values())
+            referenced_chunks.add(manifest["account_order"])
+
+            # Buckets shared with other backups are only read once
+            for bucket_hash in manifest["account_buckets"].values():
+                if bucket_hash not in referenced_chunks:
+                    referenced_chunks.add(bucket_hash)
+                    referenced_chunks.update(self.read_record(bucket_hash).values())
+
+        # Listed again, so chunks written or deleted by another process are seen
+        self.known_chunks = None
+
+        deleted_chunks, freed_bytes = 0, 0
+        for chunk_hash in list(self.get_known_chunks() - referenced_chunks):
+            chunk_path = self.get_chunk_path(chunk_hash)
+            self.known_chunks.discard(chunk_hash)
+
+            # CASE: Deleted by another process in the meantime
+            try:
+                chunk_size = os.path.getsize(chunk_path)
+                os.remove(chunk_path)
+            except FileNotFoundError:
+                continue
+
+            freed_bytes += chunk_size
+            deleted_chunks += 1
+
+        return deleted_chunks, freed_bytes
@@ -0,0 +1,345 @@
+"""
+Benchmarks of the account manager. Run from the src folder, where the data folder is.
+
+    python benchmark.py icons
+    python benchmark.py vault [--accounts 1000 10000] [--backends json sqlite] [--seed 0] [--output results.json]
+
+The vault suite generates seeded vaults and times the save file operations and the first paint of the GUI
+(only if xvfb-run is available). Results are written as json, including the commit they were measured at.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from data_handler import DataHandler
+from file_utils import write_file_atomic
+from json_store import JsonStore
+from utils import change_icon_color
+from vault_generator import VaultGenerator
+
+
+def change_icon_color_per_pixel(img_obj, target_color):
+    """
+    Previous implementation of change_icon_color, looping over every pixel. Used as reference
+    """
+
+    img_obj = img_obj.convert('RGBA')
+    new_data = []
+    for item in img_obj.getdata():
+        new_data.append((target_color[0], target_color[1], target_color[2], item[3]))
+    img_obj.putdata(new_data)
+
+    return img_obj
+
+
+def find_icons(icon_folder="data"):
+    """
+    :return: Paths of all images in the folder and its subfolders that PIL can open
+    """
+
+    from PIL import Image  # Only needed for the icon benchmark
+
+    icon_paths = []
+    for folder, _, file_names in os.walk(icon_folder):
+        for file_name in sorted(file_names):
+            file_path = os.path.join(folder, file_name)
+            try:
+                with Image.open(file_path) as img:
+                    img.verify()
+                icon_paths.append(file_path)
+            except Exception:
+                pass
+
+    return icon_paths
+
+
+def benchmark_icon_recoloring(icon_folder="data", target_color=(26, 50, 79), repetitions=5):
+    """
+    Compare the per pixel recoloring with change_icon_color on every icon and check both give the same image
+    :return: List of dictionaries with icon path, size, both durations in milliseconds and whether outputs match
+    """
+
+    from PIL import Image
+
+    results = []
+    for icon_path in find_icons(icon_folder):
+        with Image.open(icon_path) as img:
+            img.load()
+
+        durations = {}
+        outputs = {}
+        for name, function in (("per_pixel", lambda: change_icon_color_per_pixel(img, target_color)),
+                               ("channels", lambda: change_icon_color(img, target_color))):
+            start_time = time.perf_counter()
+            for _ in range(repetitions):
+                outputs[name] = function()
+            durations[name] = (time.perf_counter() - start_time) / repetitions * 1000
+
+        results.append({"icon": icon_path,
+                        "size": img.size,
+                        "per_pixel_ms": durations["per_pixel"],
+                        "channels_ms": durations["channels"],
+                        "identical": outputs["per_pixel"].tobytes() == outputs["channels"].tobytes()})
+
+    return results
+
+
+"""VAULT"""
+
+
+def time_call(function, repetitions: int = 1, setup=None):
+    """
+    :param function: Function to time
+    :param repetitions: Number of timed calls
+    :param setup: Function called before every call, not timed
+    :return: Dictionary of the fastest and median duration in milliseconds and the number of calls
+    """
+
+    durations = []
+    for _ in range(repetitions):
+        if setup is not None:
+            setup()
+
+        start_time = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start_time) * 1000)
+
+    return {"min_ms": min(durations), "median_ms": statistics.median(durations), "runs": repetitions}
+
+
+def check(result, operation):
+    # The data handler reports failures with False instead of raising
+    if result is False:
+        raise RuntimeError(f"{operation} failed")
+
+
+def benchmark_vault(account_count: int, backend: str, work_folder, seed: int = 0, repetitions: int = 3,
+                    mutations: int = 20):
+    """
+    Time the save file operations on a generated vault
+    :param account_count: Number of accounts of the vault
+    :param backend: Storage backend (see DataHandler.storage_backends)
+    :param work_folder: Folder the vault is created in. Should be empty
+    :param seed: Seed of the vault generator
+    :param repetitions: Timed calls per operation
+    :param mutations: Number of timed single account updates
+    :return: Dictionary of operation name and timing (see time_call), plus vault size
+    """
+
+    os.makedirs(work_folder, exist_ok=True)
+    generated_path = os.path.join(work_folder, "generated.json")
+    backup_folder = os.path.join(work_folder, "backups")
+    os.makedirs(backup_folder, exist_ok=True)
+
+    generator = VaultGenerator(seed=seed, group_count=max(15, account_count // 500))
+    results = {"accounts": account_count, "backend": backend, "seed": seed}
+
+    results["generate"] = time_call(lambda: generator.write_save_file(generated_path, account_count,
+                                                                      DataHandler.base_data_structure))
+    results["generated_bytes"] = os.path.getsize(generated_path)
+
+    # Options of the GUI
+    store_options = {"use_journal": True} if backend == "json" else {}
+    rng = random.Random(seed)
+
+    # The data handler reports every step with print
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        data_handler = DataHandler(work_folder, storage_backend=backend, **store_options)
+        try:
+            results["bulk_import"] = time_call(lambda: check(data_handler.import_json(generated_path), "Import"))
+            results["save"] = time_call(lambda: check(data_handler.update_save_file(), "Save"), repetitions)
+            results["save_file_bytes"] = os.path.getsize(data_handler.save_file_path)
+
+            results["load"] = time_call(lambda: check(data_handler.read_save_file(), "Load"), repetitions)
+            results["validate"] = time_call(lambda: check(data_handler.validate_save_file(), "Validation"), repetitions)
+            results["backup"] = time_call(lambda: check(data_handler.backup_save_file(backup_location=backup_folder), "Backup"),
+                                          repetitions)
+
+            # The first incremental backup writes every record, later ones only the changed records
+            results["backup_incremental_first"] = time_call(
+                lambda: check(data_handler.create_backup(apply_retention=False), "Incremental backup"))
+
+            account_ids = [str(rng.randrange(account_count)) for _ in range(mutations)] if account_count else []
+            if account_ids:
+                results["single_mutation"] = time_call(
+                    lambda: check(data_handler.update_account(account_ids.pop(), {"password": str(rng.random())}), "Update"),
+                    len(account_ids))
+
+            results["backup_incremental"] = time_call(
+                lambda: check(data_handler.create_backup(apply_retention=False), "Incremental backup"), repetitions)
+            backup_name = data_handler.list_backups()[0]
+            results["restore"] = time_call(lambda: check(data_handler.restore_backup(backup_name), "Restore"),
+                                           repetitions)
+
+            # First search builds the index
+            results["search_cold"] = time_call(lambda: data_handler.search("adventure"), repetitions,
+                                               setup=data_handler.reset_search_index)
+            for name, query, prefix in (("search_text", "mystery", False), ("search_regex", "^[a-z]+@google\\.", False),
+                                        ("search_prefix", "foot", True)):
+                data_handler.search(query, prefix=prefix)
+
+                # Cached results are answered right away. Clear the cache to time the search itself
+                results[name] = time_call(lambda: data_handler.search(query, prefix=prefix), repetitions,
+                                          setup=data_handler.search_index.query_cache.clear)
+        finally:
+            data_handler.close()
+
+        # CASE: Json save file. Also time opening it memory mapped, with a cold and a cached offset index
+        if backend == "json":
+            index_path = os.path.join(work_folder, JsonStore.index_file_name)
+
+            def open_lazily():
+                DataHandler(work_folder, storage_backend=backend, lazy_load=True, **store_options).close()
+
+            def remove_index():
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+
+            results["load_lazy_cold"] = time_call(open_lazily, repetitions, setup=remove_index)
+            results["load_lazy_cached"] = time_call(open_lazily, repetitions)
+
+    return results
+
+
+def benchmark_gui_startup(save_file_location, repetitions: int = 3):
+    """
+    Time the start of the GUI until the first frame under a virtual display
+    :param save_file_location: Folder of the json save file
+    :return: Dictionary of the median phase durations in milliseconds, or of the reason it was skipped
+    """
+
+    if shutil.which("xvfb-run") is None:
+        return {"skipped": "xvfb-run not found"}
+
+    profiles = []
+    for _ in range(repetitions):
+        profile_path = os.path.join(save_file_location, "startup_profile.json")
+        completed_process = subprocess.run(["xvfb-run", "-a", sys.executable, "__main__.py", "--data", save_file_location,
+                                            "--profile-startup", profile_path, "--exit-after-startup"],
+                                           cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True,
+                                           text=True, timeout=600)
+        if completed_process.returncode != 0 or not os.path.exists(profile_path):
+            return {"skipped": f"GUI failed. {completed_process.stderr.strip()[-500:]}"}
+
+        with open(profile_path) as profile_file:
+            profiles.append(json.load(profile_file))
+        os.remove(profile_path)
+
+    return {"phases_ms": {phase_name: statistics.median(profile["phases_ms"][phase_name] for profile in profiles)
+                          for phase_name in profiles[0]["phases_ms"]},
+            "total_ms": statistics.median(profile["total_ms"] for profile in profiles),
+            "runs": repetitions}
+
+
+def get_environment():
+    """
+    :return: Dictionary describing the code and machine the benchmark ran on
+    """
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def run_vault_suite(account_counts, backends, seed: int = 0, repetitions: int = 3, work_folder=None, gui: bool = True):
+    """
+    Run benchmark_vault for every size and backend, and the GUI startup for every size
+    :return: Dictionary of environment and list of results
+    """
+
+    remove_work_folder = work_folder is None
+    work_folder = tempfile.mkdtemp(prefix="account_manager_benchmark_") if work_folder is None else work_folder
+
+    results = []
+    try:
+        for account_count in account_counts:
+            for backend in backends:
+                print(f"Benchmarking {account_count} accounts with the {backend} backend...", end="", flush=True)
+                vault_folder = os.path.join(work_folder, f"{backend}_{account_count}")
+                result = benchmark_vault(account_count, backend, vault_folder, seed=seed, repetitions=repetitions)
+
+                # The GUI reads json save files
+                if gui and backend == "json":
+                    result["gui_startup"] = benchmark_gui_startup(vault_folder, repetitions)
+
+                results.append(result)
+                print("done.")
+    finally:
+        if remove_work_folder:
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+    return {"environment": get_environment(), "results": results}
+
+
+def print_vault_results(suite_results):
+    operations = ["generate", "bulk_import", "save", "load", "validate", "backup", "backup_incremental_first",
+                  "single_mutation", "backup_incremental", "restore", "search_cold",
+                  "search_text", "search_regex", "search_prefix", "load_lazy_cold", "load_lazy_cached"]
+
+    print(f"{'Accounts':>9} {'Backend':<7} " + " ".join(f"{operation:>16}" for operation in operations) + f" {'first paint':>16}")
+    for result in suite_results["results"]:
+        first_paint = result.get("gui_startup", {}).get("total_ms")
+        print(f"{result['accounts']:>9} {result['backend']:<7} " +
+              " ".join(f"{result[operation]['median_ms']:>13.2f} ms" if operation in result else f"{'-':>16}"
+                       for operation in operations) +
+              (f" {first_paint:>13.2f} ms" if first_paint is not None else f" {'-':>16}"))
+
+
+def print_icon_results(results):
+    print(f"{'Icon':<50} {'Size':>11} {'Per pixel':>11} {'Channels':>11} {'Speedup':>8}  Identical")
+    for result in results:
+        print(f"{result['icon']:<50} {'x'.join(map(str, result['size'])):>11} {result['per_pixel_ms']:>8.2f} ms "
+              f"{result['channels_ms']:>8.2f} ms {result['per_pixel_ms'] / max(result['channels_ms'], 1e-9):>7.1f}x  "
+              f"{result['identical']}")
+
+    total_per_pixel = sum(result["per_pixel_ms"] for result in results)
+    total_channels = sum(result["channels_ms"] for result in results)
+    print(f"Total: {total_per_pixel:.2f} ms per pixel, {total_channels:.2f} ms with channels "
+          f"-> {total_per_pixel / max(total_channels, 1e-9):.1f}x faster, "
+          f"all identical: {all(result['identical'] for result in results)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the account manager")
+    subparsers = parser.add_subparsers(dest="suite")
+    subparsers.add_parser("icons", help="Compare the icon recoloring implementations")
+
+    vault_parser = subparsers.add_parser("vault", help="Time save file operations on generated vaults")
+    vault_parser.add_argument("--accounts", type=int, nargs="+", default=[1000, 10000], help="Vault sizes")
+    vault_parser.add_argument("--backends", nargs="+", default=sorted(DataHandler.storage_backends),
+                              choices=sorted(DataHandler.storage_backends))
+    vault_parser.add_argument("--seed", type=int, default=0)
+    vault_parser.add_argument("--repetitions", type=int, default=3, help="Timed calls per operation")
+    vault_parser.add_argument("--work-folder", help="Folder for the generated vaults. Kept after the run if given")
+    vault_parser.add_argument("--no-gui", action="store_true", help="Skip the GUI startup")
+    vault_parser.add_argument("--output", default="benchmark_results.json", help="Json file for the results")
+    args = parser.parse_args(argv)
+
+    # CASE: Vault suite
+    if args.suite == "vault":
+        suite_results = run_vault_suite(args.accounts, args.backends, seed=args.seed, repetitions=args.repetitions,
+                                        work_folder=args.work_folder, gui=not args.no_gui)
+        write_file_atomic(args.output, json.dumps(suite_results, indent=4))
+        print_vault_results(suite_results)
+        print(f"Results written to {args.output}")
+        return 0
+
+    print_icon_results(benchmark_icon_recoloring())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
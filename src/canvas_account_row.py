@@ -0,0 +1,246 @@
+import tkinter as tk
+from tkinter.font import Font
+from tooltip import ToolTip
+from account_frame import AccountFrame
+from account_edit_window import EditAccountWindow
+from account_delete_window import DeleteAccountWindow
+
+
+class CanvasRowRenderer:
+    """
+    Draws account rows as canvas items instead of widgets. Fonts, images and event bindings are shared by all
+    rows. Events are bound once per tag and mapped to the row and detail through the tags of the item under the
+    mouse.
+    """
+
+    padding = 5
+    button_spacing = 8
+
+    def __init__(self, controller, canvas: tk.Canvas):
+        """
+        :param controller: Main window
+        :param canvas: Canvas the rows are drawn on
+        """
+        self.controller = controller
+        self.canvas = canvas
+
+        self.title_font = Font(size=11, weight="bold")
+        self.detail_font = Font(size=10)
+        self.title_height = self.title_font.metrics("linespace")
+        self.line_height = self.detail_font.metrics("linespace")
+
+        self.logo = self.controller.image_registry.get(AccountFrame.default_account_logo_path, "account_icons")
+        self.hidden_details = set()
+
+        self.rows = {}  # Row tag -> CanvasAccountRow
+        self.hovered_row = None
+        self.tool_tip = ToolTip(self.canvas)
+
+        """EVENTS"""
+
+        self.canvas.tag_bind("account_row", "<Enter>", self.on_row_enter)
+        self.canvas.tag_bind("account_row", "<Leave>", self.on_row_leave)
+
+        self.canvas.tag_bind("detail_value", "<Enter>", self.on_detail_enter)
+        self.canvas.tag_bind("detail_value", "<Leave>", self.on_detail_leave)
+        self.canvas.tag_bind("detail_value", "<Button-1>", self.on_detail_click)
+
+        self.canvas.tag_bind("detail_icon", "<Enter>", self.on_icon_enter)
+        self.canvas.tag_bind("detail_icon", "<Leave>", lambda e: self.tool_tip.hidetip())
+
+        self.canvas.tag_bind("edit_button", "<Button-1>", self.on_edit_button_click)
+        self.canvas.tag_bind("delete_button", "<Button-1>", self.on_delete_button_click)
+
+    def create_row(self, account_details: dict, width):
+        row = CanvasAccountRow(self, account_details, width)
+        self.rows[row.tag] = row
+        return row
+
+    def get_detail_image(self, detail):
+        if detail in self.controller.acc_detail_display.keys():
+            return self.controller.acc_detail_display[detail]["img"]
+
+        return self.controller.acc_detail_display["unknown_detail"]["img"]
+
+    def get_detail_display_name(self, detail):
+        if detail in self.controller.acc_detail_display.keys():
+            return self.controller.acc_detail_display[detail]["display_name"]
+
+        return self.controller.acc_detail_display["unknown_detail"]["display_name"] + ": " + detail
+
+    def get_detail_height(self, detail, value):
+        return max(self.get_detail_image(detail).height(), (str(value).count("\n") + 1) * self.line_height)
+
+    """HIT TESTING"""
+
+    def get_current_row(self):
+        """
+        :return: Row of the item under the mouse and the index of its detail (None if the item is no detail)
+        """
+
+        current_items = self.canvas.find_withtag("current")
+        if not current_items:
+            return None, None
+
+        row, detail_index = None, None
+        for tag in self.canvas.gettags(current_items[0]):
+            if tag in self.rows:
+                row = self.rows[tag]
+            elif tag.startswith("detail_") and tag[7:].isdigit():
+                detail_index = int(tag[7:])
+
+        return row, detail_index
+
+    """EVENTS"""
+
+    def on_row_enter(self, event):
+        row, _ = self.get_current_row()
+        if row is not self.hovered_row:
+            if self.hovered_row is not None:
+                self.hovered_row.set_buttons_visible(False)
+            self.hovered_row = row
+            if row is not None:
+                row.set_buttons_visible(True)
+
+    def on_row_leave(self, event):
+        # Moving between items of the same row enters the row again right away
+        if self.hovered_row is not None:
+            self.hovered_row.set_buttons_visible(False)
+            self.hovered_row = None
+
+    def on_detail_enter(self, event):
+        self.canvas.itemconfigure("current", fill=self.controller.colors["account_text_hover"])
+        self.canvas.configure(cursor="hand2")
+
+    def on_detail_leave(self, event):
+        self.canvas.itemconfigure("current", fill=self.controller.colors["account_text"])
+        self.canvas.configure(cursor="")
+
+    def on_detail_click(self, event):
+        row, detail_index = self.get_current_row()
+        if row is not None and detail_index is not None:
+            self.controller.copy_to_clipboard(row.details[detail_index][1])
+
+    def on_icon_enter(self, event):
+        row, detail_index = self.get_current_row()
+        if row is not None and detail_index is not None:
+            self.tool_tip.show_at(self.get_detail_display_name(row.details[detail_index][0]),
+                                  event.x_root + 20, event.y_root + 20)
+
+    def on_edit_button_click(self, event):
+        row, _ = self.get_current_row()
+        if row is not None:
+            EditAccountWindow(row.account_details, self.controller, account_frame=None)  # Toplevel type
+
+    def on_delete_button_click(self, event):
+        row, _ = self.get_current_row()
+        if row is not None:
+            DeleteAccountWindow(row.account_details, self.controller, None)  # Toplevel type
+
+
+class CanvasAccountRow:
+    """
+    Account drawn as canvas items in the layout of an AccountFrame. All items carry the row tag, so the row is
+    moved and removed as a whole
+    """
+
+    def __init__(self, renderer: CanvasRowRenderer, account_details: dict, width):
+        """
+        :param renderer: Renderer with the shared fonts, images and bindings
+        :param account_details: Details of the account to show
+        :param width: Width of the row in pixels
+        """
+        self.renderer = renderer
+        self.canvas = renderer.canvas
+        self.tag = f"account_{account_details['account_id']}"
+        self.width = width
+        self.x, self.y = 0, 0
+
+        self.account_details = None
+        self.details = []  # Shown detail names and values
+        self.height = 0
+
+        self.background = None
+        self.buttons = []
+
+        self.bind_account(account_details)
+
+    def bind_account(self, account_details: dict):
+        """
+        Draw the row again for new details of the account
+        """
+
+        self.account_details = account_details
+        self.details = [(key, value) for key, value in account_details.items() if key not in self.renderer.hidden_details]
+
+        self.canvas.delete(self.tag)
+        self.draw()
+
+    def draw(self):
+        renderer = self.renderer
+        padding = CanvasRowRenderer.padding
+        row_tags = ("account_row", self.tag)
+        colors = renderer.controller.colors
+
+        self.height = 2 * padding + renderer.title_height + sum(renderer.get_detail_height(detail, value)
+                                                                for detail, value in self.details)
+
+        # Items are drawn at the current position of the row
+        x, y = self.x, self.y
+        self.background = self.canvas.create_rectangle(x, y, x + self.width, y + self.height, width=0,
+                                                       fill=colors["tertiary"], tags=row_tags)
+        self.canvas.create_image(x + padding, y + padding, image=renderer.logo, anchor="nw", tags=row_tags)
+
+        info_x = x + 3 * padding + renderer.logo.width()
+        detail_y = y + padding
+        self.canvas.create_text(info_x, detail_y, text=self.account_details["account_name"], anchor="nw",
+                                font=renderer.title_font, fill=colors["account_text"], tags=row_tags)
+
+        # Buttons only show while the mouse is on the row
+        delete_button = self.canvas.create_text(x + self.width - padding, detail_y, text="del", anchor="ne",
+                                                font=renderer.detail_font, state="hidden",
+                                                tags=row_tags + ("delete_button",))
+        edit_button = self.canvas.create_text(x + self.width - padding - renderer.detail_font.measure("del") -
+                                              CanvasRowRenderer.button_spacing, detail_y, text="edit", anchor="ne",
+                                              font=renderer.detail_font, state="hidden",
+                                              tags=row_tags + ("edit_button",))
+        self.buttons = [delete_button, edit_button]
+        detail_y += renderer.title_height
+
+        for detail_index, (detail, value) in enumerate(self.details):
+            detail_tags = row_tags + (f"detail_{detail_index}",)
+            detail_image = renderer.get_detail_image(detail)
+
+            self.canvas.create_image(info_x, detail_y, image=detail_image, anchor="nw", tags=detail_tags + ("detail_icon",))
+            self.canvas.create_text(info_x + detail_image.width(), detail_y, text=value, anchor="nw",
+                                    font=renderer.detail_font, fill=colors["account_text"],
+                                    tags=detail_tags + ("detail_value",))
+
+            detail_y += renderer.get_detail_height(detail, value)
+
+    def get_height(self):
+        return self.height
+
+    def place(self, x, y):
+        if (x, y) != (self.x, self.y):
+            self.canvas.move(self.tag, x - self.x, y - self.y)
+            self.x, self.y = x, y
+
+    def set_width(self, width):
+        if width == self.width:
+            return
+
+        self.canvas.coords(self.background, self.x, self.y, self.x + width, self.y + self.height)
+        for button in self.buttons:
+            self.canvas.move(button, width - self.width, 0)
+        self.width = width
+
+    def set_buttons_visible(self, visible: bool):
+        for button in self.buttons:
+            self.canvas.itemconfigure(button, state="normal" if visible else "hidden")
+
+    def remove(self):
+        self.canvas.delete(self.tag)
+        self.renderer.rows.pop(self.tag, None)
+        if self.renderer.hovered_row is self:
+            self.renderer.hovered_row = None
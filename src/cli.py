@@ -0,0 +1,259 @@
+"""
+Command line access to the save file without the GUI. No Tk or PIL module is imported, so a query only costs
+reading the save file.
+
+    python -m src.cli search <query> [--prefix] [--field <detail>]
+    python -m src.cli get <account id> [--field <detail>]
+    python -m src.cli copy <account id> <detail>
+    python -m src.cli add <account name> [--group <group id>] [--detail <name>=<value> ...]
+    python -m src.cli backup [--label <label>]
+    python -m src.cli backups
+    python -m src.cli restore (<backup name> | --at <ISO time>)
+    python -m src.cli prune
+
+Accounts are written as one json object per line. With --field only the value of that detail is written.
+Progress messages of the data handler go to stderr. If a vault daemon is running for the save file, requests
+are sent to it instead of reading the save file.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime
+
+# The modules import each other by name, so the src folder has to be on the path (e.g. for python -m src.cli)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from clipboard import ClipboardError, ClipboardService, CommandClipboardBackend  # noqa: E402
+from data_handler import DataHandler  # noqa: E402
+from vault_daemon import connect_or_open  # noqa: E402
+
+default_save_file_location = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+class CliError(Exception):
+    pass
+
+
+def write_account(output, account_details: dict, field: str = None):
+    """
+    :param output: Text stream to write to
+    :param account_details: Details of the account
+    :param field: If set, only the value of this detail is written
+    """
+
+    if field is None:
+        output.write(json.dumps(account_details, ensure_ascii=False) + "\n")
+        return
+
+    if field not in account_details:
+        raise CliError(f"Account {account_details['account_id']} has no detail \"{field}\"")
+    output.write(str(account_details[field]) + "\n")
+
+
+def get_account_details(data_handler: DataHandler, account_id):
+    try:
+        return data_handler.get_account_details(account_id)
+    except KeyError:
+        raise CliError(f"No account with ID={account_id}")
+
+
+def copy_to_clipboard(value):
+    """
+    Copy text to the clipboard with the clipboard command of the platform, as the clipboard of Tk would be gone
+    once this process exits
+    """
+
+    try:
+        ClipboardService(CommandClipboardBackend()).copy(value)
+    except (ClipboardError, subprocess.CalledProcessError) as e:
+        raise CliError(f"Copying to the clipboard failed. {e}")
+
+
+"""COMMANDS"""
+
+
+def run_search(data_handler: DataHandler, args, output):
+    # CASE: Save file opened by this process. A single query is cheaper to answer by checking every account than
+    # by building the search index. The daemon keeps its index between queries
+    if isinstance(data_handler, DataHandler):
+        account_ids = data_handler.scan(args.query, prefix=args.prefix)
+    else:
+        account_ids = data_handler.search(args.query, prefix=args.prefix)
+
+    # Sorted by id, so the output is the same on every run
+    for account_id in sorted(account_ids, key=lambda account_id: (len(account_id), account_id)):
+        account_details = data_handler.get_account_details(account_id)
+        if args.field is None or args.field in account_details:
+            write_account(output, account_details, args.field)
+
+    return 0 if account_ids else 1
+
+
+def run_get(data_handler: DataHandler, args, output):
+    write_account(output, get_account_details(data_handler, args.account_id), args.field)
+    return 0
+
+
+def run_copy(data_handler: DataHandler, args, output):
+    account_details = get_account_details(data_handler, args.account_id)
+    if args.field not in account_details:
+        raise CliError(f"Account {args.account_id} has no detail \"{args.field}\"")
+
+    copy_to_clipboard(account_details[args.field])
+    print(f"Copied \"{args.field}\" of account {args.account_id} to clipboard", file=sys.stderr)
+    return 0
+
+
+def run_add(data_handler: DataHandler, args, output):
+    account_details = {}
+    for detail in args.detail:
+        name, separator, value = detail.partition("=")
+        if not separator or not name:
+            raise CliError(f"Detail \"{detail}\" is not of the form name=value")
+        account_details[name] = value
+
+    if args.group is not None and str(args.group) not in data_handler.get_groups():
+        raise CliError(f"No group with ID={args.group}")
+
+    account_id = data_handler.add_account(account_details, args.name, group_id=args.group)
+    if not account_id:
+        raise CliError("Account could not be added")
+
+    write_account(output, data_handler.get_account_details(account_id))
+    return 0
+
+
+def run_backup(data_handler: DataHandler, args, output):
+    backup_name = data_handler.create_backup(label=args.label)
+    if not backup_name:
+        raise CliError("Backup could not be created")
+
+    output.write(backup_name + "\n")
+    return 0
+
+
+def run_backups(data_handler: DataHandler, args, output):
+    backup_names = data_handler.list_backups()
+    for backup_name in backup_names:
+        output.write(backup_name + "\n")
+
+    return 0 if backup_names else 1
+
+
+def run_restore(data_handler: DataHandler, args, output):
+    if (args.backup_name is None) == (args.at is None):
+        raise CliError("Either a backup name or --at has to be given")
+
+    try:
+        point_in_time = None if args.at is None else datetime.fromisoformat(args.at)
+    except ValueError:
+        raise CliError(f"\"{args.at}\" is not a time in ISO format, like 2024-05-01T12:00")
+
+    if not data_handler.restore_backup(backup_name=args.backup_name, point_in_time=point_in_time):
+        raise CliError("Backup could not be restored")
+
+    return 0
+
+
+def run_prune(data_handler: DataHandler, args, output):
+    if not data_handler.prune_backups():
+        raise CliError("Backups could not be pruned")
+
+    return 0
+
+
+commands = {
+    "search": run_search,
+    "get": run_get,
+    "copy": run_copy,
+    "add": run_add,
+    "backup": run_backup,
+    "backups": run_backups,
+    "restore": run_restore,
+    "prune": run_prune,
+}
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Query and edit the save file without the GUI")
+    parser.add_argument("--data", default=default_save_file_location, help="Folder of the save file")
+    parser.add_argument("--backend", default="json", choices=sorted(DataHandler.storage_backends),
+                        help="Storage backend of the save file")
+    parser.add_argument("--quiet", action="store_true", help="Suppress progress messages")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="Find accounts with a detail matching a query")
+    search_parser.add_argument("query", help="Regular expression or case sensitive text")
+    search_parser.add_argument("--prefix", action="store_true", help="Match words starting with the query instead")
+    search_parser.add_argument("--field", help="Only write the value of this detail")
+
+    get_parser = subparsers.add_parser("get", help="Write the details of an account")
+    get_parser.add_argument("account_id")
+    get_parser.add_argument("--field", help="Only write the value of this detail")
+
+    copy_parser = subparsers.add_parser("copy", help="Copy a detail of an account to the clipboard")
+    copy_parser.add_argument("account_id")
+    copy_parser.add_argument("field", help="Name of the detail")
+
+    add_parser = subparsers.add_parser("add", help="Add an account and write it")
+    add_parser.add_argument("name", help="Name of the account")
+    add_parser.add_argument("--group", help="ID of the group of the account")
+    add_parser.add_argument("--detail", action="append", default=[], metavar="NAME=VALUE", help="Detail of the account")
+
+    backup_parser = subparsers.add_parser("backup", help="Create an incremental backup and write its name")
+    backup_parser.add_argument("--label", default="", help="Appended to the backup name")
+
+    subparsers.add_parser("backups", help="Write the names of all backups, oldest first")
+
+    restore_parser = subparsers.add_parser("restore", help="Replace all data with a backup. The current data is "
+                                                           "backed up first")
+    restore_parser.add_argument("backup_name", nargs="?", help="Name of the backup")
+    restore_parser.add_argument("--at", help="Restore the latest backup created at or before this ISO time instead")
+
+    subparsers.add_parser("prune", help="Delete the backups the retention setting does not keep")
+
+    return parser
+
+
+def main(argv=None):
+    """
+    :param argv: Command line arguments without the program name. If None, sys.argv is used
+    :return: Exit code. 0 on success, 1 if nothing was found or the output was closed early, 2 on errors
+    """
+
+    args = create_parser().parse_args(argv)
+    output = sys.stdout
+
+    # The data handler reports progress with print. Keep it out of the output, which is meant for scripts
+    log = open(os.devnull, "w") if args.quiet else sys.stderr
+    try:
+        with redirect_stdout(log):
+            data_handler = connect_or_open(args.data, storage_backend=args.backend,
+                                           **({"use_journal": True, "lazy_load": True} if args.backend == "json" else {}))
+            try:
+                exit_code = commands[args.command](data_handler, args, output)
+                output.flush()  # Fails here instead of at exit if the reader is gone
+                return exit_code
+            finally:
+                data_handler.close()
+
+    except CliError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    # CASE: The reader closed the pipe (e.g. | head -1). Output left in the buffer goes to devnull, so flushing it
+    # at exit does not fail again
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), output.fileno())
+        return 1
+
+    finally:
+        if args.quiet:
+            log.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import hashlib
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from instrumentation import Instrumentation
+
+
+class ClipboardError(Exception):
+    pass
+
+
+"""BACKENDS"""
+
+
+class TkClipboardBackend:
+    """
+    Clipboard of Tk. Copies in process, without starting a program. Has to be used from the thread of the Tk loop.
+    On X11 the text stays available only while the Tk application is running
+    """
+
+    def __init__(self, tk_widget):
+        self.tk_widget = tk_widget
+
+    def set_text(self, text: str):
+        self.tk_widget.clipboard_clear()
+        self.tk_widget.clipboard_append(text)
+
+    def get_text(self):
+        """
+        :return: Text in the clipboard. None if it holds no text
+        """
+
+        try:
+            return self.tk_widget.clipboard_get()
+        except Exception:
+            return None
+
+    def clear(self):
+        self.tk_widget.clipboard_clear()
+
+
+class CommandClipboardBackend:
+    """
+    Clipboard of the platform through its clipboard command (e.g. for the command line tool, which has no Tk).
+    The text is passed on stdin, so it never shows up in a command line. Starts a program for every copy
+    """
+
+    # Commands reading the clipboard text from stdin, tried in this order
+    commands = {
+        "Windows": [["clip"]],
+        "Darwin": [["pbcopy"]],
+        "Linux": [["wl-copy"], ["xclip", "-selection", "clipboard"], ["xsel", "--clipboard", "--input"]],
+    }
+
+    def __init__(self):
+        self.command = next((command for command in CommandClipboardBackend.commands.get(platform.system(), [])
+                             if shutil.which(command[0]) is not None), None)
+
+    def set_text(self, text: str):
+        if self.command is None:
+            raise ClipboardError("No clipboard command found")
+
+        subprocess.run(self.command, input=text.encode(), check=True)
+
+    def get_text(self):
+        # Reading is not supported
+        return None
+
+    def clear(self):
+        self.set_text("")
+
+
+"""SERVICE"""
+
+
+class ClipboardService:
+    """
+    Copies values to the clipboard and optionally clears them again after a while, so passwords do not stay in the
+    clipboard. The clipboard is only cleared if it still holds the copied value. Every copy is timed.
+    """
+
+    def __init__(self, backend, clear_after: float = None, dispatch=None, instrumentation: Instrumentation = None):
+        """
+        :param backend: Object with set_text(text), get_text() and clear() methods
+        :param clear_after: Seconds after which a copied value is removed from the clipboard. None keeps it
+        :param dispatch: Function that runs a function on the thread owning the backend (e.g. the Tk loop). If
+        None, the clipboard is cleared from a timer thread
+        :param instrumentation: Receives "clipboard_copy" and "clipboard_clear" events. None keeps them private
+        """
+        self.backend = backend
+        self.clear_after = clear_after
+        self.dispatch = dispatch
+        self.instrumentation = Instrumentation() if instrumentation is None else instrumentation
+
+        # Only a hash of the copied value is kept, to recognize it in the clipboard later
+        self.copied_hash = None
+        self.copy_generation = 0  # Incremented with every copy. Clears of older copies are skipped
+        self.clear_timer = None
+        self.last_duration = None
+
+    @staticmethod
+    def hash_text(text: str):
+        return hashlib.sha256(text.encode()).digest()
+
+    def copy(self, value, clear_after: float = None):
+        """
+        :param value: Value to copy. Converted to text
+        :param clear_after: Overrides the clear delay of the service for this value
+        :return: Duration of the copy in seconds
+        """
+
+        text = str(value)
+        clear_after = self.clear_after if clear_after is None else clear_after
+
+        with self.instrumentation.measure("clipboard_copy", backend=type(self.backend).__name__):
+            start_time = time.perf_counter()
+            self.backend.set_text(text)
+            self.last_duration = time.perf_counter() - start_time
+
+        self.copied_hash = ClipboardService.hash_text(text)
+        self.copy_generation += 1
+
+        # A new copy replaces the pending clear of the previous one
+        self.cancel_clear()
+        if clear_after:
+            self.clear_timer = threading.Timer(clear_after, self.on_clear_timer, args=(self.copy_generation,))
+            self.clear_timer.daemon = True
+            self.clear_timer.start()
+
+        return self.last_duration
+
+    def on_clear_timer(self, copy_generation):
+        if self.dispatch is not None:
+            self.dispatch(lambda: self.clear_copied(copy_generation))
+        else:
+            self.clear_copied(copy_generation)
+
+    def clear_copied(self, copy_generation: int = None):
+        """
+        Clear the clipboard if it still holds the last copied value
+        :param copy_generation: If set, only cleared if nothing was copied since this copy
+        :return: True if the clipboard was cleared
+        """
+
+        if self.copied_hash is None or copy_generation not in (None, self.copy_generation):
+            return False
+
+        text = self.backend.get_text()
+
+        # CASE: Something else was copied in the meantime
+        if text is not None and ClipboardService.hash_text(text) != self.copied_hash:
+            self.copied_hash = None
+            return False
+
+        with self.instrumentation.measure("clipboard_clear", backend=type(self.backend).__name__):
+            self.backend.clear()
+
+        self.copied_hash = None
+        return True
+
+    def cancel_clear(self):
+        if self.clear_timer is not None:
+            self.clear_timer.cancel()
+            self.clear_timer = None
+
+    def close(self, clear: bool = True):
+        """
+        :param clear: Clear a copied value still waiting to be cleared right away
+        """
+
+        pending_clear = self.clear_timer is not None
+        self.cancel_clear()
+        if clear and pending_clear:
+            self.clear_copied()
@@ -1,6 +1,4 @@
 import tkinter as tk
-from PIL import ImageTk, Image
-from win32api import GetMonitorInfo, MonitorFromPoint
 
 
 class CornerSnappingHandler:
@@ -11,6 +9,8 @@ class CornerSnappingHandler:
     }
 
     def __init__(self, parent_frame, controller):
+        # Only loaded when the snapping buttons are used
+        from PIL import ImageTk, Image
 
         self.snap_window_frame = parent_frame
         self.controller = controller
@@ -62,6 +62,9 @@ class CornerSnappingHandler:
         self.move_bottom_right_button.grid(row=1, column=1)
 
     def move_window(self, y_loc="bottom", x_loc="right"):
+        # Windows only
+        from win32api import GetMonitorInfo, MonitorFromPoint
+
         monitor_info = GetMonitorInfo(MonitorFromPoint((0, 0)))
         work_area = monitor_info.get("Work")
 
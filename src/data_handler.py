@@ -1,16 +1,18 @@
+import importlib
 import json
 import os
 from datetime import datetime
-import shutil
 from pathlib import Path
-import copy
 from typing import Union
-import random
+import threading
+from contextlib import contextmanager
+from file_utils import write_file_atomic
+from save_file_loader import SaveFileLoader
+from instrumentation import Instrumentation
 
 
 class DataHandler:
 
-    save_file_name = "data.json"
     backup_folder_name = "backups"
     detail_icon_location = "data/detail_icons"
 
@@ -30,7 +32,13 @@ class DataHandler:
                 "group_id": {"display_name": "Group ID", "img": "unknown_detail.png", "multi_line": False, "hidden": True},
                 "account_name": {"display_name": "Account Name", "img": "unknown_detail.png", "multi_line": False, "hidden": True},
                 "account_id": {"display_name": "Account ID", "img": "unknown_detail.png", "multi_line": False, "hidden": True},
-            }
+            },
+            # How account rows are drawn. "widgets" uses a frame per row, "canvas" draws rows as canvas items
+            "row_renderer": "widgets",
+            # Seconds until a copied value is removed from the clipboard again. 0 keeps it
+            "clipboard_clear_after": 0,
+            # Incremental backups kept: the latest ones and the latest one of each recent hour, day and week
+            "backup_retention": {"last": 10, "hourly": 24, "daily": 7, "weekly": 8},
         },
         "infos": {
             "next_id": 0,
@@ -44,32 +52,69 @@ class DataHandler:
         }
     }
 
-    def __init__(self, save_file_location):
+    # Available storage backends. All of them store the layout of base_data_structure
+    # Module and class of every backend. Only the used backend is imported
+    storage_backends = {
+        "json": ("json_store", "JsonStore"),
+        "sqlite": ("sqlite_store", "SqliteStore")
+    }
+
+    def __init__(self, save_file_location, storage_backend: str = "json", instrumentation: Instrumentation = None,
+                 **store_options):
+        """
+        :param save_file_location: Folder of the save file
+        :param storage_backend: Name of the storage backend (see storage_backends)
+        :param instrumentation: Receives a timed event for every operation. If None, events are only kept in
+        the histograms of a private Instrumentation
+        :param store_options: Options of the storage backend. The json backend supports use_journal and
+        write_behind_interval (see JsonStore)
+        """
         self.save_file_location = save_file_location
-        self.save_file_path = os.path.join(self.save_file_location, DataHandler.save_file_name)
-        self.data = {}
+        self.instrumentation = Instrumentation() if instrumentation is None else instrumentation
+        module_name, class_name = DataHandler.storage_backends[storage_backend]
+        self.store = getattr(importlib.import_module(module_name), class_name)(save_file_location, **store_options)
+        self.store.instrumentation = self.instrumentation
+        self.save_file_path = self.store.file_path
+
+        # Incremental backups. Full copies (backup_save_file) are only made of save files that can not be read
+        self.backup_repository = None  # Created on first use, see get_backup_repository
+
+        # Search index over all account details. Built on the first search and updated after every transaction
+        self.search_index = None
+        self.search_lock = threading.RLock()
+        self.index_build_lock = threading.Lock()
+        self.pending_index_updates = None  # Accounts changed while the index is built. None if no build is running
+        self.touched_accounts = set()  # Accounts changed in the currently open transaction
+        self.transaction_depth = 0
+
+        # The save file is validated while reading. Create new one if corrupted
+        if not self.read_save_file():
+            # CASE: The save file exists but can not be read. It is only replaced once a copy of it is safe
+            if os.path.exists(self.save_file_path) and not self.backup_save_file(prefix="BACKUP_FAILED_VALIDATION_"):
+                raise RuntimeError(f"{self.save_file_path} can not be read and could not be backed up. "
+                                   f"It is left untouched")
 
-        # Check integrity of save file and create new one if corrupted
-        if not self.validate_save_file():
-            self.backup_save_file(prefix="BACKUP_FAILED_VALIDATION_")
             self.create_save_file()
-
-        self.read_save_file()
+            self.read_save_file()
 
     def read_save_file(self):
         """
-        Read save file at class instance defined location
+        Read and validate save file at class instance defined location
         """
 
         print(f"Loading data from {self.save_file_path}...", end="")
 
         # Try reading save file
         try:
-            with open(self.save_file_path) as json_file:
-                data = json.load(json_file)
-                print(f"done -> {len(data['accounts'])} account{'s' if len(data['accounts']) != 1 else ''} loaded.")
-                self.data = data
-                return True
+            with self.instrumentation.measure("load", bytes=self.get_file_size(self.save_file_path)) as event:
+                replayed_records = self.store.read(DataHandler.base_data_structure)
+                self.reset_search_index()
+                account_count = self.store.count_accounts()
+                event.update(accounts=account_count, replayed_records=replayed_records)
+
+            print(f"done -> {account_count} account{'s' if account_count != 1 else ''} loaded"
+                  f"{f', {replayed_records} journal records replayed' if replayed_records else ''}.")
+            return True
 
         except Exception as e:
             print(f"failed. {e}")
@@ -77,28 +122,21 @@ class DataHandler:
 
     def validate_save_file(self):
         """
-        Validates save file. Currently only checks if all root keys of the base structure exist
+        Validates save file without loading it. Checks the root keys, the account meta details and the id counters
         """
 
         print(f"Validating save file...", end="")
 
         # Start validation
         try:
-            with open(self.save_file_path) as json_file:
-                data = json.load(json_file)
-
-                # Check key integrity
-                for key in DataHandler.base_data_structure.keys():
-                    # CASE: Base key not present in save file
-                    if key not in data.keys():
-                        print("failed. File corrupted!")
-                        return False
+            with self.instrumentation.measure("validate", bytes=self.get_file_size(self.save_file_path)):
+                self.store.validate(DataHandler.base_data_structure)
 
-                # CASE: All checks passed
-                print("done.")
-                return True
+            # CASE: All checks passed
+            print("done.")
+            return True
 
-        # CASE: File could not be read or unknown error
+        # CASE: File could not be read, is corrupted or unknown error
         except Exception as e:
             print(f"failed. {e}")
             return False
@@ -112,8 +150,10 @@ class DataHandler:
 
         # Try creating the save file
         try:
-            with open(self.save_file_path, 'w') as json_file:
-                json.dump(DataHandler.base_data_structure, json_file, indent=4)
+            with self.instrumentation.measure("create") as event:
+                self.store.create(DataHandler.base_data_structure)
+                self.reset_search_index()
+                event["bytes"] = self.get_file_size(self.save_file_path)
             print("done.")
             return True
 
@@ -133,14 +173,17 @@ class DataHandler:
             backup_location = os.path.join(self.save_file_location, DataHandler.backup_folder_name)
 
         # Define path for and backup file
-        backup_file_name = prefix + datetime.now().strftime("%d_%m_%Y_%H_%M_%S") + ".json"
+        backup_file_name = prefix + datetime.now().strftime("%d_%m_%Y_%H_%M_%S") + self.store.backup_extension
         backup_file_path = os.path.join(backup_location, backup_file_name)
 
         print(f"Backing up save file to {backup_location}...", end="")
 
         # Try copying file
         try:
-            shutil.copyfile(self.save_file_path, backup_file_path)
+            os.makedirs(backup_location, exist_ok=True)
+            with self.instrumentation.measure("backup") as event:
+                self.store.backup(backup_file_path)
+                event["bytes"] = self.get_file_size(backup_file_path)
             print("done.")
             return True
 
@@ -157,8 +200,54 @@ class DataHandler:
 
         # Try updating the save file
         try:
-            with open(self.save_file_path, 'w') as json_file:
-                json.dump(self.data, json_file, indent=4)
+            with self.instrumentation.measure("save") as event:
+                self.store.save()
+                event["bytes"] = self.get_file_size(self.save_file_path)
+            print("done.")
+            return True
+
+        except Exception as e:
+            print(f"failed. {e}")
+            return False
+
+    def import_json(self, file_path):
+        """
+        Replace all data with the content of a json file in the save file layout
+        :param file_path: Path of the json file
+        """
+
+        print(f"Importing {file_path}...", end="")
+
+        try:
+            with self.instrumentation.measure("import", bytes=self.get_file_size(file_path)) as event:
+                with open(file_path) as json_file:
+                    data = SaveFileLoader(json_file.read(), DataHandler.base_data_structure).load()
+
+                with self.transaction():
+                    self.store.import_data(data)
+                self.reset_search_index()
+                event["accounts"] = len(data["accounts"])
+
+            print(f"done -> {len(data['accounts'])} account{'s' if len(data['accounts']) != 1 else ''} imported.")
+            return True
+
+        except Exception as e:
+            print(f"failed. {e}")
+            return False
+
+    def export_json(self, file_path):
+        """
+        Write all data to a json file in the save file layout
+        :param file_path: Path of the json file
+        """
+
+        print(f"Exporting to {file_path}...", end="")
+
+        try:
+            with self.instrumentation.measure("export") as event:
+                data = self.store.export_data()
+                write_file_atomic(file_path, json.dumps(data, indent=4))
+                event.update(accounts=len(data["accounts"]), bytes=self.get_file_size(file_path))
             print("done.")
             return True
 
@@ -166,6 +255,178 @@ class DataHandler:
             print(f"failed. {e}")
             return False
 
+    """BACKUPS"""
+
+    def get_backup_repository(self):
+        """
+        :return: Repository of the incremental backups. Imported and created on first use
+        """
+
+        if self.backup_repository is None:
+            from backup_repository import BackupRepository
+            self.backup_repository = BackupRepository(os.path.join(self.save_file_location,
+                                                                   DataHandler.backup_folder_name))
+
+        return self.backup_repository
+
+    def create_backup(self, label: str = "", apply_retention: bool = True):
+        """
+        Create an incremental backup of the current data. Only records changed since earlier backups are written
+        :param label: Appended to the backup name
+        :param apply_retention: Delete old backups afterwards as set in the backup_retention setting
+        :return: Name of the backup or False if it could not be created
+        """
+
+        print("Creating incremental backup...", end="")
+
+        try:
+            with self.instrumentation.measure("incremental_backup") as event:
+                records = {
+                    "settings": self.store.get_settings(),
+                    "infos": {key: self.store.get_info(key) for key in DataHandler.base_data_structure["infos"]},
+                    "groups": self.store.get_groups(),
+                }
+                backup_name, record_count, written_bytes = self.get_backup_repository().create_backup(
+                    records, self.store.iter_accounts(), label=label)
+                event.update(records=record_count, bytes=written_bytes)
+
+            print(f"done -> {backup_name}, {written_bytes} bytes of new records written.")
+
+        except Exception as e:
+            print(f"failed. {e}")
+            return False
+
+        if apply_retention:
+            self.prune_backups()
+
+        return backup_name
+
+    def list_backups(self):
+        """
+        :return: Names of the incremental backups, oldest first. Names start with the creation time
+        """
+
+        return [name for name, created in self.get_backup_repository().list_backups()]
+
+    def restore_backup(self, backup_name: str = None, point_in_time: Union[None, str, datetime] = None):
+        """
+        Replace all data with an incremental backup. The current data is backed up first
+        :param backup_name: Name of the backup
+        :param point_in_time: If no name is given, the latest backup created at or before this time is restored.
+        Can be given in ISO format
+        :return: True if the backup was restored
+        """
+
+        if isinstance(point_in_time, str):
+            point_in_time = datetime.fromisoformat(point_in_time)
+
+        if backup_name is None:
+            if point_in_time is None:
+                print("No backup to restore given.")
+                return False
+
+            backup_name = self.get_backup_repository().find_backup(point_in_time)
+            if backup_name is None:
+                print(f"No backup created before {point_in_time}.")
+                return False
+
+        # The restore can be undone by restoring this backup
+        if not self.create_backup(label="before_restore", apply_retention=False):
+            return False
+
+        print(f"Restoring backup {backup_name}...", end="")
+
+        try:
+            with self.instrumentation.measure("restore", backup=backup_name) as event:
+                data = self.get_backup_repository().restore(backup_name)
+
+                with self.transaction():
+                    self.store.import_data(data)
+                self.reset_search_index()
+                event["accounts"] = len(data["accounts"])
+
+            print(f"done -> {len(data['accounts'])} account{'s' if len(data['accounts']) != 1 else ''} restored.")
+            return True
+
+        except Exception as e:
+            print(f"failed. {e}")
+            return False
+
+    def prune_backups(self):
+        """
+        Delete the incremental backups the backup_retention setting does not keep, and the records no remaining
+        backup refers to
+        """
+
+        retention = self.store.get_settings().get("backup_retention",
+                                                  DataHandler.base_data_structure["settings"]["backup_retention"])
+
+        print("Pruning backups...", end="")
+
+        try:
+            with self.instrumentation.measure("prune_backups") as event:
+                deleted_backups = self.get_backup_repository().apply_retention(
+                    keep_last=retention.get("last", 0),
+                    **{period: count for period, count in retention.items() if period != "last"})
+                deleted_chunks, freed_bytes = self.get_backup_repository().collect_garbage()
+                event.update(backups=len(deleted_backups), records=deleted_chunks, bytes=freed_bytes)
+
+            print(f"done -> {len(deleted_backups)} backup{'s' if len(deleted_backups) != 1 else ''} and "
+                  f"{deleted_chunks} record{'s' if deleted_chunks != 1 else ''} deleted, {freed_bytes} bytes freed.")
+            return True
+
+        except Exception as e:
+            print(f"failed. {e}")
+            return False
+
+    @staticmethod
+    def get_file_size(file_path):
+        """
+        :return: Size of the file in bytes. None if it does not exist
+        """
+
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return None
+
+    def flush(self):
+        """
+        Make sure all changes are written to disk before returning
+        """
+
+        self.store.flush()
+
+    def close(self):
+        """
+        Write all pending changes and stop background work. Should be called before the program exits
+        """
+
+        self.store.close()
+
+    @contextmanager
+    def transaction(self, save_to_file: bool = True):
+        """
+        Group changes into a transaction. If an exception is raised inside the transaction, every change made in
+        it is reverted and the exception is passed on. On success, all changes are saved with a single flush.
+        Transactions can be nested. Only the outermost transaction saves to file.
+        Usage: with data_handler.transaction(): ...
+        :param save_to_file: Specify if changes are saved to file when the transaction finishes
+        """
+
+        self.transaction_depth += 1
+        try:
+            with self.store.transaction(save_to_file=save_to_file):
+                yield self
+
+        finally:
+            self.transaction_depth -= 1
+
+            # The accounts are read back from the store, so rolled back changes are reverted in the index as well
+            if self.transaction_depth == 0 and self.touched_accounts:
+                touched_accounts, self.touched_accounts = self.touched_accounts, set()
+                self.update_search_index(touched_accounts)
+
     def add_account(self, account_details: dict, account_name: str, group_id: Union[None, int, str] = None, save_to_file=True):
         """
         Add an account to the save file
@@ -173,37 +434,33 @@ class DataHandler:
         :param account_name: Name of the account
         :param group_id: ID of group of the account. If None, account is in no group
         :param save_to_file: Specify if changes are saved directly to file
+        :return: Id of the new account or False if it could not be added
         """
 
-        # Store the original state in case of roll back
-        original_data = copy.deepcopy(self.data)
-
         try:
-            # Add new account
-            new_account_id = str(self.data["infos"]["next_id"])
-            self.data["accounts"][new_account_id] = account_details
-
-            # Add metadata
-            self.data["accounts"][new_account_id]["group_id"] = str(group_id)
-            self.data["accounts"][new_account_id]["account_name"] = str(account_name)
-            self.data["accounts"][new_account_id]["account_id"] = str(new_account_id)  # Added as detail as well for better access
-
-            # Increment id
-            self.data["infos"]["next_id"] += 1
-
-            # Save changes to file
-            if save_to_file:
-                self.update_save_file()
+            with self.instrumentation.measure("add_account", save_to_file=save_to_file) as event, \
+                    self.transaction(save_to_file=save_to_file):
+                # Add new account with metadata
+                new_account_id = str(self.store.get_info("next_id"))
+                event["account_id"] = new_account_id
+                new_account = dict(account_details)
+                new_account["group_id"] = str(group_id)
+                new_account["account_name"] = str(account_name)
+                new_account["account_id"] = str(new_account_id)  # Added as detail as well for better access
+
+                self.store.insert_account(new_account_id, new_account)
+                self.touched_accounts.add(new_account_id)
+
+                # Increment id
+                self.store.set_info("next_id", int(new_account_id) + 1)
 
             print(f"Added new account with ID={new_account_id}.")
 
         except Exception as e:
-            # Roll back to original state in case of error
-            self.data = original_data
             print(f"Failed to add account. {e}")
             return False
 
-        return True
+        return new_account_id
 
     def delete_account(self, account_id, save_to_file=True):
         """
@@ -212,22 +469,16 @@ class DataHandler:
         :param save_to_file: Specify if changes are saved directly to file
         """
 
-        # Store the original state in case of roll back
-        original_data = copy.deepcopy(self.data)
-
         try:
-            # Delete account
-            del self.data["accounts"][str(account_id)]
-
-            # Save changes to file
-            if save_to_file:
-                self.update_save_file()
+            with self.instrumentation.measure("delete_account", account_id=str(account_id), save_to_file=save_to_file), \
+                    self.transaction(save_to_file=save_to_file):
+                # Delete account
+                self.store.delete_account(str(account_id))
+                self.touched_accounts.add(str(account_id))
 
             print(f"Deleted account with ID={account_id}.")
 
         except Exception as e:
-            # Roll back to original state in case of error
-            self.data = original_data
             print(f"Failed to delete account. {e}")
             return False
 
@@ -242,33 +493,21 @@ class DataHandler:
         :param save_to_file: Specify if changes are saved directly to file
         """
 
-        # Store the original state in case of roll back
-        original_data = copy.deepcopy(self.data)
+        deletions = sum(value is None for value in updated_parameters.values())
+        updates = len(updated_parameters) - deletions
 
         try:
-
-            updates, deletions = 0, 0
-
-            # Update/Delete defined parameters
-            for key, value in updated_parameters.items():
-                if value is not None:
-                    self.data["accounts"][str(account_id)][key] = value
-                    updates += 1
-                else:
-                    del self.data["accounts"][str(account_id)][key]
-                    deletions += 1
-
-            # Save changes to file
-            if save_to_file:
-                self.update_save_file()
+            with self.instrumentation.measure("update_account", account_id=str(account_id), updates=updates,
+                                              deletions=deletions, save_to_file=save_to_file), \
+                    self.transaction(save_to_file=save_to_file):
+                # Update/Delete defined parameters
+                self.store.update_account(str(account_id), updated_parameters)
+                self.touched_accounts.add(str(account_id))
 
             print(f"Updated account with ID={account_id} -> {updates} parameter{'s' if updates != 1 else ''} updated, "
                   f"{deletions} parameter{'s' if deletions != 1 else ''} deleted.")
 
         except Exception as e:
-            print(self.data["accounts"].keys())
-            # Roll back to original state in case of error
-            self.data = original_data
             print(f"Failed to update account. {e}")
             return False
 
@@ -281,44 +520,186 @@ class DataHandler:
         :param save_to_file: Specify if changes are saved directly to file
         """
 
-        # Store the original state in case of roll back
-        original_data = copy.deepcopy(self.data)
-
         try:
-            # Add new group
-            new_group_id = str(self.data["infos"]["next_group_id"])
-            self.data["groups"][str(new_group_id)] = {"name": name}
-
-            # Increment id
-            self.data["infos"]["next_group_id"] += 1
+            with self.instrumentation.measure("add_group", save_to_file=save_to_file) as event, \
+                    self.transaction(save_to_file=save_to_file):
+                # Add new group
+                new_group_id = str(self.store.get_info("next_group_id"))
+                event["group_id"] = new_group_id
+                self.store.set_group(new_group_id, {"name": name, "collapsed": False})
 
-            # Save changes to file
-            if save_to_file:
-                self.update_save_file()
+                # Increment id
+                self.store.set_info("next_group_id", int(new_group_id) + 1)
 
             print(f"Added new group with ID={new_group_id}.")
 
         except Exception as e:
-            # Roll back to original state in case of error
-            self.data = original_data
             print(f"Failed to add group. {e}")
             return False
 
         return True
 
+    def set_group_collapsed(self, group_id: Union[int, str], collapsed: bool, save_to_file: bool = True):
+        """
+        Remember if a group is shown collapsed
+        :param group_id: Id of the group
+        :param collapsed: New collapsed state
+        :param save_to_file: Specify if changes are saved directly to file
+        """
+
+        try:
+            with self.instrumentation.measure("set_group_collapsed", group_id=str(group_id), save_to_file=save_to_file), \
+                    self.transaction(save_to_file=save_to_file):
+                group_attributes = dict(self.store.get_groups()[str(group_id)])
+                group_attributes["collapsed"] = bool(collapsed)
+                self.store.set_group(str(group_id), group_attributes)
+
+            print(f"{'Collapsed' if collapsed else 'Expanded'} group with ID={group_id}.")
+
+        except Exception as e:
+            print(f"Failed to update group. {e}")
+            return False
+
+        return True
+
+    """SEARCH"""
+
+    def reset_search_index(self):
+        """
+        Drop the search index after the data was replaced. It gets rebuilt on the next search
+        """
+
+        with self.search_lock:
+            self.search_index = None
+            self.pending_index_updates = None  # An index being built from the replaced data is discarded
+
+    def update_search_index(self, account_ids):
+        """
+        Bring the search index up to date with the stored state of the given accounts
+        """
+
+        with self.search_lock:
+            # CASE: The index is being built. The accounts are updated once it is done
+            if self.pending_index_updates is not None:
+                self.pending_index_updates.update(account_ids)
+                return
+
+            if self.search_index is None:
+                return
+
+            self.apply_index_updates(self.search_index, account_ids)
+
+    def apply_index_updates(self, search_index, account_ids):
+        for account_id in account_ids:
+            try:
+                search_index.update(account_id, self.store.get_account(account_id))
+            except KeyError:
+                search_index.update(account_id, None)
+
+    def search(self, query: str, prefix: bool = False, is_cancelled=None):
+        """
+        Find accounts with a detail matching the query
+        :param query: Regular expression or, if it contains no regex characters, case sensitive text
+        :param prefix: If True, find accounts with a word starting with the query instead (case insensitive)
+        :param is_cancelled: Function returning True once the result is not needed anymore. The search then stops
+        with SearchCancelled, also while the index is built
+        :return: Set of account ids
+        """
+
+        search_index = self.build_search_index(is_cancelled)
+
+        with self.search_lock:
+            if prefix:
+                return search_index.search_prefix(query)
+            return search_index.search(query, is_cancelled)
+
+    def scan(self, query: str, prefix: bool = False, is_cancelled=None):
+        """
+        Like search, but checks the accounts one by one instead of building the search index. Cheaper for a
+        single query (e.g. from the command line)
+        :return: Set of account ids
+        """
+
+        with self.search_lock:
+            search_index = self.search_index
+
+        # CASE: Index already built
+        if search_index is not None:
+            return self.search(query, prefix, is_cancelled)
+
+        from search_index import SearchIndex
+        return SearchIndex.scan(self.store.iter_accounts(), query, prefix, is_cancelled)
+
+    def build_search_index(self, is_cancelled=None):
+        """
+        Build the search index now instead of on the first search (e.g. in a long running process).
+        The index is built without holding the search lock, so changes are not blocked meanwhile. Accounts
+        changed while building are updated before the index is used
+        :param is_cancelled: Function returning True once the index is not needed anymore. Raises SearchCancelled
+        :return: Search index
+        """
+
+        from search_index import SearchIndex
+
+        # Only one build at a time. Others wait for its result
+        with self.index_build_lock:
+            while True:
+                with self.search_lock:
+                    if self.search_index is not None:
+                        return self.search_index
+                    self.pending_index_updates = set()
+
+                search_index = SearchIndex()
+                try:
+                    search_index.rebuild(self.store.iter_accounts(), is_cancelled)
+                except BaseException:
+                    with self.search_lock:
+                        self.pending_index_updates = None
+                    raise
+
+                with self.search_lock:
+                    # CASE: The data was replaced while building. Built again from the new data
+                    if self.pending_index_updates is None:
+                        continue
+
+                    self.apply_index_updates(search_index, self.pending_index_updates)
+                    self.pending_index_updates = None
+                    self.search_index = search_index
+                    return search_index
+
+    """ACCESS"""
+
+    def get_settings(self):
+        return self.store.get_settings()
+
     def get_detail_attributes(self):
-        return self.data["settings"]["detail_icons"]
+        return self.store.get_settings()["detail_icons"]
+
+    def get_groups(self):
+        return self.store.get_groups()
 
     def get_account_details(self, account_id):
-        return self.data["accounts"][str(account_id)]
+        return self.store.get_account(str(account_id))
+
+    def get_accounts(self, group_id: Union[None, int, str] = None):
+        """
+        :param group_id: If set, only accounts of this group are returned
+        :return: Iterator of account id and account details
+        """
+        return self.store.iter_accounts(None if group_id is None else str(group_id))
+
+    def get_account_count(self):
+        return self.store.count_accounts()
 
     def dev_only_create_dummy_data(self, num=50):
+        import random  # Only needed for development data
+
         self.create_save_file()
         self.read_save_file()
 
-        self.add_group("Emails")
-        self.add_group("Services")
-        self.add_group("Shopping")
+        self.add_group("Emails", save_to_file=False)
+        self.add_group("Services", save_to_file=False)
+        self.add_group("Shopping", save_to_file=False)
 
         words = ["cat", "secret", "football", "mystery", "travel", "coding", "adventure", "music", "art", "science"]
         providers = ["google", "amazon", "twitter", "aws", "reddit", "ikea", "microsoft", "apple", "netflix", "spotify"]
@@ -356,21 +737,3 @@ class DataHandler:
 
         self.update_save_file()
 
-
-if __name__ == '__main__':
-
-    dh = DataHandler(save_file_location="data")
-    dh.create_save_file()
-    dh.read_save_file()
-
-    for i in range(3):
-        dh.add_account({"primary_email": f"debug_email_{random.randint(0, 100)}",
-                        "password": f"debug_password_{random.randint(0, 100)}",
-                        "address": "street 0\nplz city\ncountry",
-                        "phone": random.randint(100000000, 999999999)}
-                       , save_to_file=False)
-
-    dh.update_save_file()
-    dh.delete_account(0)
-
-    dh.update_account(1, {"password": "new_password", "new_parameter": "new_value", "phone": None})
@@ -0,0 +1,43 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Union
+
+
+def write_file_atomic(file_path, content: Union[str, bytes]):
+    """
+    Write text to a file so that the file either holds the old or the new content, never a truncated mix.
+    The content is written to a temporary file in the same folder, flushed to disk and then renamed over the target.
+    :param file_path: Path of the file to write
+    :param content: Text or bytes content of the file
+    """
+
+    with open_file_atomic(file_path, binary=isinstance(content, bytes)) as temp_file:
+        temp_file.write(content)
+
+
+@contextmanager
+def open_file_atomic(file_path, binary: bool = False):
+    """
+    Like write_file_atomic, for content written in pieces. Usage: with open_file_atomic(path) as file: ...
+    The file only replaces the target if the context finishes without an exception
+    :param file_path: Path of the file to write
+    :param binary: If True, the file is opened for bytes instead of text
+    """
+
+    file_dir = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temp_path = tempfile.mkstemp(dir=file_dir, prefix=".tmp_", suffix=os.path.basename(file_path))
+
+    try:
+        with os.fdopen(file_descriptor, 'wb' if binary else 'w') as temp_file:
+            yield temp_file
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        os.replace(temp_path, file_path)
+
+    except BaseException:
+        # Never leave temporary files behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -1,10 +1,6 @@
 import tkinter as tk
-from PIL import ImageTk, Image, ImageOps
 from tkinter.font import Font
 from tooltip import create_tool_tip
-from typing import Union
-import re
-from utils import change_icon_color
 
 
 class GroupFrame(tk.Frame):
@@ -16,21 +12,19 @@ class GroupFrame(tk.Frame):
 
     no_results_found_message = "No matches"
 
-    def __init__(self, controller, title: str, *args, **kwargs):
+    def __init__(self, controller, group_id: str, title: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.controller = controller
+        self.group_id = group_id
         self.configure(bg=self.master.cget("bg"))
 
         self.collapsed_state = False
-        self.current_filter = None  # Save last filter state to remember when toggling group collapse draws
-        self.child_accounts = []
+        self.no_results_state = False
 
         """ICONS"""
 
-        self.collapse_down_icon = ImageTk.PhotoImage(change_icon_color(Image.open(GroupFrame.default_collapse_down_icon_path),
-                                                                       target_color=self.controller.colors["group_title"], tk_controller=self.controller))
-        self.collapse_up_icon = ImageTk.PhotoImage(change_icon_color(Image.open(GroupFrame.default_collapse_up_icon_path),
-                                                                     target_color=self.controller.colors["group_title"], tk_controller=self.controller))
+        self.collapse_down_icon = self.controller.image_registry.get(GroupFrame.default_collapse_down_icon_path, "group_title")
+        self.collapse_up_icon = self.controller.image_registry.get(GroupFrame.default_collapse_up_icon_path, "group_title")
 
         """CONTENT"""
 
@@ -47,75 +41,29 @@ class GroupFrame(tk.Frame):
                                          activebackground=self.header_frame.cget("bg"))
         self.collapse_button.pack(side="right", padx=5)
 
-        self.content_frame = tk.Frame(self, bg=self.cget("bg"))
-        self.content_frame.pack(side="bottom", fill="x")
-
         self.divider_element = tk.Frame(self, bg=self.controller.colors["group_title"])
         self.divider_element.pack(side="top", fill="x")
 
-        # No results found Notifier
-        self.no_results_found_label = tk.Label(self.content_frame, bg=self.content_frame.cget("bg"),
-                                               text=GroupFrame.no_results_found_message,
+        # No results found Notifier. The accounts themselves are drawn by the account list below the group
+        self.no_results_found_label = tk.Label(self, bg=self.cget("bg"), text=GroupFrame.no_results_found_message,
                                                fg=self.controller.colors["group_title"])
 
-        # This placeholder is needed to dynamically adjust the pack size of the content frame when collapsing accounts
-        self.update_placeholder = tk.Frame(self.content_frame)
-        self.update_placeholder.pack()
-
-    def add_accounts(self, account_frames):
-
-        if type(account_frames) not in (list, tuple):
-            account_frames = [account_frames]
-
-        for account_frame in account_frames:
-            self.child_accounts.append(account_frame)
-
-        self.draw_accounts()
-
-    def draw_accounts(self, regex_filter=None):
-        # Save filter applied
-        self.current_filter = regex_filter
-        results_found = False  # Determines if "No results" message is shown
+    def set_state(self, collapsed: bool, no_results: bool):
+        """
+        :param collapsed: Show the group as collapsed
+        :param no_results: Show the "No matches" message
+        """
 
-        # Remove all previously drawn account frames
-        self.no_results_found_label.pack_forget()
-        for child in self.child_accounts:
-            child.pack_forget()
+        if collapsed != self.collapsed_state:
+            self.collapsed_state = collapsed
+            self.collapse_button.configure(image=self.collapse_down_icon if collapsed else self.collapse_up_icon)
 
-        # Only draw if group is not collapsed
-        if not self.collapsed_state:
-
-            for account in self.child_accounts:
-                # Draw all accounts if no regex filter applied
-                if regex_filter is None or regex_filter == "":
-                    account.pack(pady=(5, 0), fill="x")
-
-                # Only draw accounts if at least one detail matches if the regex filter applied
-                else:
-                    for detail_name, detail_content in account.account_details.items():
-                        try:
-                            if re.search(regex_filter, str(detail_content)):
-                                account.pack(pady=(5, 0), fill="x")
-                                results_found = True
-                        except:  # Bad re expression
-                            pass
-
-            # If no matches found, display message
-            if regex_filter is not None and not results_found:
-                self.no_results_found_label.pack(pady=(5, 0), fill="x")
+        if no_results != self.no_results_state:
+            self.no_results_state = no_results
+            if no_results:
+                self.no_results_found_label.pack(side="top", pady=(5, 0), fill="x")
+            else:
+                self.no_results_found_label.pack_forget()
 
     def on_collapse_button_press(self):
-        if self.collapsed_state:
-            self.collapsed_state = False
-
-            self.draw_accounts(regex_filter=self.current_filter)
-            self.collapse_button.configure(image=self.collapse_up_icon)
-
-        else:
-            self.collapsed_state = True
-            for child in self.child_accounts:
-                child.pack_forget()
-            self.no_results_found_label.pack_forget()
-
-            self.update_placeholder.pack()  # Pack placeholder frame to update pack size
-            self.collapse_button.configure(image=self.collapse_down_icon)
+        self.controller.account_list.toggle_group(self.group_id)
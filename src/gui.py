@@ -1,13 +1,12 @@
 import os.path
+import platform
+import time
 import tkinter as tk
-from account_frame import AccountFrame
-from group_frame import GroupFrame
-from PIL import ImageTk, Image
+from account_list import AccountList
 from tkinter.font import Font
-from tkinter.ttk import Style
 from data_handler import DataHandler
-from corner_snap_button import CornerSnappingHandler
-from utils import change_icon_color
+from search_worker import SearchWorker
+from image_registry import ImageRegistry
 
 
 class AccountManager(tk.Tk):
@@ -25,40 +24,92 @@ class AccountManager(tk.Tk):
         "gui_icons": "#1A324F"
     }
 
+    notification_duration = 1  # Seconds a notification is shown
+    notification_bar_height = 30
+    notification_slide_step = 10  # Pixels per animation frame
+    animation_frame_interval = 30  # Milliseconds
+    settings_icon_blink_interval = 200  # Milliseconds
+
     gui_icons = {
         "settings": "data/gui_icons/settings.png",
         "settings_hover": "data/gui_icons/settings_hover.png"
     }
 
-    def __init__(self):
+    def __init__(self, save_file_location="data", dev_data: bool = False, startup_profiler=None,
+                 startup_profile_path=None, exit_after_startup: bool = False, instrumentation=None, ui_monitor=None):
+        """
+        :param save_file_location: Folder of the save file
+        :param dev_data: If True, the save file is replaced with generated accounts. ONLY FOR DEVELOPMENT
+        :param startup_profiler: StartupProfiler timing the phases of the start. None if not profiled
+        :param startup_profile_path: If set, the startup profile is also written to this json file
+        :param exit_after_startup: Close the window once the first frame was drawn (e.g. for benchmarks)
+        :param instrumentation: Instrumentation receiving the events of the data handler. None keeps them private
+        :param ui_monitor: UiMonitor measuring loop lag and callback durations. None if not monitored
+        """
+        # Installed before any widget exists, so every callback is timed
+        self.ui_monitor = ui_monitor
+        if self.ui_monitor is not None:
+            self.ui_monitor.install()
+
         super().__init__()
+        self.startup_profiler = startup_profiler
+        self.startup_profile_path = startup_profile_path
+        self.exit_after_startup = exit_after_startup
 
         """WINDOW ATTRIBUTES"""
 
         self.title("Account Manager")
         self.configure(bg="white")
-        self.iconbitmap("./data/gui_icons/app_icon.ico")
+        # Tk only reads .ico files on Windows
+        if platform.system() == "Windows":
+            self.iconbitmap("./data/gui_icons/app_icon.ico")
+        else:
+            self.app_icon = tk.PhotoImage(file="./data/gui_icons/app_icon.png")
+            self.iconphoto(True, self.app_icon)
         self.minsize(300, 300)
         self.maxsize(600, 1200)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.mark_startup_phase("window")
 
         """COLORS"""
         self.colors = AccountManager.default_color_palette
 
+        # Recolored icons shared by all widgets. Cached on disk between launches
+        self.image_registry = ImageRegistry(self, palette=self.colors)
+
         """DATA"""
-        self.data_handler = DataHandler(save_file_location="data")
-        self.data_handler.dev_only_create_dummy_data()  # ONLY FOR DEVELOPMENT
+        # Uses the vault daemon if one is running for the save file. Imported here, as it is only needed at startup
+        from vault_daemon import connect_or_open
+        self.data_handler = connect_or_open(save_file_location=save_file_location, storage_backend="json",
+                                            use_journal=True, write_behind_interval=0.5, instrumentation=instrumentation)
+        if dev_data and isinstance(self.data_handler, DataHandler):
+            self.data_handler.dev_only_create_dummy_data()  # ONLY FOR DEVELOPMENT
+
+        # The save file is validated while it is read
+        self.mark_startup_phase("load and validate")
+
+        # Copies through the clipboard of Tk, without starting a program
+        from clipboard import ClipboardService, TkClipboardBackend
+        self.clipboard = ClipboardService(TkClipboardBackend(self),
+                                          clear_after=self.data_handler.get_settings().get("clipboard_clear_after") or None,
+                                          dispatch=lambda function: self.after(0, function),
+                                          instrumentation=instrumentation)
+
+        # Searches run in the background. Only the result of the last typed text is drawn
+        self.search_worker = SearchWorker(lambda query, is_cancelled: self.data_handler.search(query, is_cancelled=is_cancelled),
+                                          result_callback=self.on_search_result, delay=0.15,
+                                          dispatch=lambda function: self.after(0, function))
 
         """IMAGES"""
 
         # Load every account details name and icon (as Tk Image) into a dictionary
         self.acc_detail_display = {}
-        for img_id, img_data in self.data_handler.data["settings"]["detail_icons"].items():
+        for img_id, img_data in self.data_handler.get_detail_attributes().items():
             # Create full path of img source
-            img_path = os.path.join(self.data_handler.data["settings"]["detail_icon_location"], img_data["img"])
+            img_path = os.path.join(self.data_handler.get_settings()["detail_icon_location"], img_data["img"])
 
-            # Create img object and ajust color
-            img_obj = ImageTk.PhotoImage(change_icon_color(Image.open(img_path), tk_controller=self,
-                                                           target_color=self.colors["account_icons"]))
+            # Get img object in the adjusted color
+            img_obj = self.image_registry.get(img_path, "account_icons")
 
             # Add to dictionary
             self.acc_detail_display[img_id] = {"img": img_obj, "display_name": img_data["display_name"]}
@@ -66,8 +117,9 @@ class AccountManager(tk.Tk):
         # Load every gui icon as Tk Image into a dict
         self.gui_icons = {}
         for img_id, img_path in AccountManager.gui_icons.items():
-            self.gui_icons[img_id] = ImageTk.PhotoImage(change_icon_color(Image.open(img_path), tk_controller=self,
-                                                        target_color=self.colors["gui_icons"]))
+            self.gui_icons[img_id] = self.image_registry.get(img_path, "gui_icons")
+
+        self.mark_startup_phase("icon preparation")
 
         """HEADER"""
 
@@ -85,12 +137,13 @@ class AccountManager(tk.Tk):
                                        bg=self.header_info_frame.cget("bg"), fg=self.colors["secondary"])
         self.header_version.pack(side="left", anchor="s")
 
-        self.on_settings_hover = tk.BooleanVar(value=False)
         self.settings_button = tk.Button(self.header_info_frame, image=self.gui_icons["settings"], relief="flat", bd=0,
                                          bg=self.header_info_frame.cget("bg"), cursor="hand2", highlightthickness=0,
                                          activebackground=self.header_info_frame.cget("bg"))
-        self.settings_button.bind("<Enter>", lambda e: self.on_settings_hover.set(True))
-        self.settings_button.bind("<Leave>", lambda e: self.on_settings_hover.set(False))
+        # The icon only blinks while hovered. No timer runs otherwise
+        self.settings_animation_call = None
+        self.settings_button.bind("<Enter>", lambda e: self.start_settings_icon_animation())
+        self.settings_button.bind("<Leave>", lambda e: self.stop_settings_icon_animation())
 
         self.settings_button.pack(side="right")
 
@@ -99,7 +152,8 @@ class AccountManager(tk.Tk):
         self.snap_window_frame = tk.Frame(self.header_info_frame, bg=self.header_info_frame.cget("bg"))
         self.snap_window_frame.pack(side="right")
 
-        # Handler initialized corner buttons and its actions
+        # Handler initialized corner buttons and its actions. Imported here, as it needs win32api
+        from corner_snap_button import CornerSnappingHandler
         self.corner_snapping_handler = CornerSnappingHandler(parent_frame=self.snap_window_frame, root=self)
         """
 
@@ -122,108 +176,121 @@ class AccountManager(tk.Tk):
         # Create canvas as wrapper for scroll widgets
         self.scrollable_canvas = tk.Canvas(self.body_frame, highlightthickness=0, relief='ridge', bg=self.body_frame.cget("bg"))
 
-        # Frame inside canvas
-        self.content_frame = tk.Frame(self.scrollable_canvas, bg=self.scrollable_canvas.cget("bg"))
-        self.content_frame.pack(side="left")
-        self.content_frame.bind("<Configure>", lambda e: self.scrollable_canvas.configure(
-            scrollregion=self.scrollable_canvas.bbox("all")))
-
         # Scrollbar for canvas
-        self.content_scrollbar = tk.Scrollbar(self.scrollable_canvas, orient="vertical",
-                                              command=self.scrollable_canvas.yview)
+        self.content_scrollbar = tk.Scrollbar(self.scrollable_canvas, orient="vertical")
         self.content_scrollbar.pack(side="right", fill="y")
-
-        # Add a window with the content frame inside canvas. Link scrollbar to canvas
-        self.canvas_window = self.scrollable_canvas.create_window((0, 0), window=self.content_frame, anchor="nw")
-        self.scrollable_canvas.configure(yscrollcommand=self.content_scrollbar.set)
         self.scrollable_canvas.pack(side="bottom", fill="both", expand=True)
 
-        # Set window width inside canvas to canvas width
-        self.scrollable_canvas.bind("<Configure>", self.set_canvas_window_width)
+        # Groups and accounts are drawn into the canvas. Only the visible ones exist as widgets
+        self.account_list = AccountList(controller=self, canvas=self.scrollable_canvas, scrollbar=self.content_scrollbar)
 
         # Bind scrollwheel to canvas to enable scrolling with mouse
-        self.content_frame.bind("<Enter>", lambda x: self.bind_canvas_to_mousewheel(self.scrollable_canvas))
-        self.content_frame.bind("<Leave>", lambda x: self.unbind_canvas_from_mousewheel(self.scrollable_canvas))
+        self.scrollable_canvas.bind("<Enter>", lambda x: self.bind_canvas_to_mousewheel(self.scrollable_canvas))
+        self.scrollable_canvas.bind("<Leave>", lambda x: self.unbind_canvas_from_mousewheel(self.scrollable_canvas))
 
         """NOTIFICATION BAR"""
 
         self.update()  # Update base tk window before to get current height for frame placement
-        self.notification_frame = tk.Frame(self.body_frame, height=30, bg="green")
+        self.notification_frame = tk.Frame(self.body_frame, height=AccountManager.notification_bar_height, bg="green")
         self.notification_frame.pack_propagate(False)  # Prevent resizing through child elements
         # Notification frame only gets places when notification appears
 
         self.notification_text = tk.Label(self.notification_frame, text="", bg=self.notification_frame.cget("bg"), fg="white")
         self.notification_text.pack(fill="both", expand=True)
 
-        self.extend_notification_bar = False
+        # The bar slides in and out and waits for its hide time with a single timer
+        self.notification_height = 0
+        self.notification_hide_time = 0
+        self.notification_call = None
+
+        self.mark_startup_phase("widgets")
 
         """INIT CALLS"""
         self.draw()  # Display all accounts and groups
-        self.animate_settings_icon()
+        self.mark_startup_phase("draw")
+
+        if self.ui_monitor is not None:
+            self.ui_monitor.start(self)
+
+        if self.startup_profiler is not None or self.exit_after_startup:
+            self.after_idle(self.on_first_paint)
 
     def draw(self):
-        group_objects = {}
+        # Display all groups and their accounts. Laid out right away, so the first frame already shows them
+        self.account_list.load()
+        self.account_list.render_scheduler.flush()
 
-        # Create group frame objects for all groups
-        for group_id, group_params in self.data_handler.data["groups"].items():
-            group_objects[group_id] = GroupFrame(master=self.content_frame, controller=self, title=group_params["name"])
+    def mark_startup_phase(self, phase_name):
+        if self.startup_profiler is not None:
+            self.startup_profiler.mark(phase_name)
 
-        # Create account frame objects for every account, add to group if assigned to one
-        for account_id, account_params in self.data_handler.data["accounts"].items():
-            # CASE: Account has group
-            if account_params["group_id"] in group_objects.keys():
-                group_objects[account_params["group_id"]].add_accounts(
-                    AccountFrame(master=group_objects[account_params["group_id"]].content_frame, controller=self,
-                                 bg=self.colors["tertiary"], account_details=account_params))
+    def on_first_paint(self):
+        # Redraws are idle callbacks as well. Run those still pending, then the first frame is on screen
+        self.update_idletasks()
+        self.mark_startup_phase("first paint")
 
-            # CASE: No group associated with account
-            else:
-                pass
-                # TODO
+        if self.startup_profiler is not None:
+            self.startup_profiler.report(self.startup_profile_path)
 
-        # Draw all Elements
-        for group in group_objects.values():
-            group.pack(padx=5, fill="x")
+        if self.exit_after_startup:
+            self.on_close()
 
     def display_notification(self, message):
         self.notification_text.configure(text=message)
 
-        # Check if a notification is currently displayed
-        if not self.notification_frame.winfo_ismapped():
-            self.slide_in_notification_bar()
-            self.after(1000, self.slide_out_notification_bar)
-        else:
-            self.extend_notification_bar = True
-            self.after(1000, self.slide_out_notification_bar)
+        # A notification while another is shown extends its display time
+        self.notification_hide_time = time.perf_counter() + AccountManager.notification_duration
+        if self.notification_call is None:
+            self.animate_notification_bar()
+
+    def copy_to_clipboard(self, value):
+        # The value itself is not printed, as it may be a password
+        duration = self.clipboard.copy(str(value).strip())
+        print(f"Copied to clipboard in {duration * 1000:.3f} ms")
+
+        # Play notification bar
+        self.display_notification("Copied to Clipboard")
 
     def update_notification_bar_placement(self, height):
         self.notification_frame.forget()
         self.notification_frame.place(x=0, y=self.body_frame.winfo_height() - height, relwidth=1)
 
-    def slide_in_notification_bar(self):
-        self.after(30, lambda: self.update_notification_bar_placement(10))
-        self.after(60, lambda: self.update_notification_bar_placement(20))
-        self.after(90, lambda: self.update_notification_bar_placement(30))
+    def animate_notification_bar(self):
+        self.notification_call = None
+        remaining_time = self.notification_hide_time - time.perf_counter()
+        target_height = AccountManager.notification_bar_height if remaining_time > 0 else 0
 
-    def slide_out_notification_bar(self):
-        if not self.extend_notification_bar:
-            self.after(30, lambda: self.update_notification_bar_placement(20))
-            self.after(60, lambda: self.update_notification_bar_placement(10))
-            self.after(90, self.notification_frame.place_forget)
+        # CASE: Fully shown. Wait until it has to slide out
+        if self.notification_height == target_height and target_height:
+            self.notification_call = self.after(max(int(remaining_time * 1000), 1), self.animate_notification_bar)
+            return
+
+        if self.notification_height < target_height:
+            self.notification_height += AccountManager.notification_slide_step
         else:
-            self.extend_notification_bar = False
+            self.notification_height -= AccountManager.notification_slide_step
+
+        # CASE: Slid out. The animation stops
+        if self.notification_height <= 0:
+            self.notification_height = 0
+            self.notification_frame.place_forget()
+            return
 
-    def set_canvas_window_width(self, event):
-        new_width = event.width - 17  # 17 = width of scrollbar
-        self.scrollable_canvas.itemconfig(self.canvas_window, width=new_width)
+        self.update_notification_bar_placement(self.notification_height)
+        self.notification_call = self.after(AccountManager.animation_frame_interval, self.animate_notification_bar)
 
     def bind_canvas_to_mousewheel(self, canvas):
         # Bind mousewheel only if more elements are available than fit the screen
-        if self.content_frame.winfo_height() > self.scrollable_canvas.winfo_height():
+        if self.account_list.model.get_total_height() > self.scrollable_canvas.winfo_height():
             canvas.bind_all("<MouseWheel>", self.on_mousewheel)
 
     @staticmethod
     def unbind_canvas_from_mousewheel(canvas):
+        # Moving onto a row inside the canvas also counts as leaving it
+        hovered_widget = canvas.winfo_containing(*canvas.winfo_pointerxy())
+        if hovered_widget is not None and str(hovered_widget).startswith(str(canvas) + "."):
+            return
+
         canvas.unbind_all("<MouseWheel>")
 
     def on_mousewheel(self, event):
@@ -233,15 +300,60 @@ class AccountManager(tk.Tk):
 
         search_text = self.search_string_var.get()
 
-        for group in self.content_frame.winfo_children():
-            group.draw_accounts(regex_filter=search_text)
+        # CASE: Search cleared. Show every account right away
+        if not search_text:
+            self.search_worker.cancel()
+            self.on_search_result(search_text, None)
+            return
+
+        self.search_worker.submit(search_text)
+
+    def on_search_result(self, search_text, matching_accounts):
+        """
+        :param search_text: Text the result belongs to
+        :param matching_accounts: Ids of matching accounts. None shows every account
+        """
+
+        self.account_list.set_filter(matching_accounts)
+
+    def set_color_palette(self, colors: dict):
+        """
+        Switch the color palette. All icons are re-themed in place
+        """
+
+        self.colors = colors
+        self.image_registry.set_palette(colors)
+
+    def on_close(self):
+        # Write changes still waiting in the background writer before exiting
+        self.search_worker.close()
+        self.clipboard.close()
+        self.data_handler.close()
+        if self.ui_monitor is not None:
+            self.ui_monitor.stop()
+        self.destroy()
+
+    def start_settings_icon_animation(self):
+        # Only one animation timer runs, even if the pointer entered again without leaving
+        self.stop_settings_icon_animation()
+        self.animate_settings_icon(hovered=True)
+
+    def animate_settings_icon(self, hovered):
+        """
+        Alternate between the hover and the normal icon until the pointer leaves the button
+        :param hovered: Show the hover icon in this frame
+        """
+
+        self.settings_button.configure(image=self.gui_icons["settings_hover" if hovered else "settings"])
+        self.settings_animation_call = self.after(AccountManager.settings_icon_blink_interval,
+                                                  lambda: self.animate_settings_icon(not hovered))
 
-    def animate_settings_icon(self):
-        if self.on_settings_hover.get():
-            self.settings_button.configure(image=self.gui_icons["settings_hover"])
-            self.after(200, lambda: self.settings_button.configure(image=self.gui_icons["settings"]))
+    def stop_settings_icon_animation(self):
+        if self.settings_animation_call is not None:
+            self.after_cancel(self.settings_animation_call)
+            self.settings_animation_call = None
 
-        self.after(400, lambda: self.animate_settings_icon())
+        self.settings_button.configure(image=self.gui_icons["settings"])
 
 
 if __name__ == '__main__':
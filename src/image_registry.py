@@ -0,0 +1,86 @@
+import hashlib
+import io
+import os
+import tkinter as tk
+from file_utils import write_file_atomic
+from utils import change_icon_color, convert_tk_col_to_rgb
+
+
+class ImageRegistry:
+    """
+    Hands out one shared Tk image per icon, color and size. Colors are given as names of the color palette, so
+    all images can be re-themed in place when the palette changes. Recolored icons are stored as png files in a
+    cache folder and loaded by Tk directly, so PIL is only needed for icons that are not cached yet.
+    """
+
+    default_cache_folder = "data/image_cache"
+
+    def __init__(self, tk_controller, palette: dict, cache_folder=default_cache_folder):
+        """
+        :param tk_controller: Tk root, owner of all images
+        :param palette: Dictionary of color name and Tk color
+        :param cache_folder: Folder of the recolored png files
+        """
+        self.tk_controller = tk_controller
+        self.palette = dict(palette)
+        self.cache_folder = cache_folder
+
+        self.images = {}  # (Source path, color name, size) -> Tk image
+
+    def get(self, source_path, color_name: str, size: tuple = None):
+        """
+        :param source_path: Path of the icon
+        :param color_name: Name of the palette color the icon is filled with
+        :param size: Width and height to scale the icon to. None keeps the original size
+        :return: Tk image. The same object for the same parameters
+        """
+
+        image_key = (source_path, color_name, size)
+        if image_key not in self.images:
+            self.images[image_key] = tk.PhotoImage(master=self.tk_controller,
+                                                   file=self.get_recolored_file(source_path, color_name, size))
+
+        return self.images[image_key]
+
+    def set_palette(self, palette: dict):
+        """
+        Re-theme all images handed out so far. Widgets showing them update without being touched
+        :param palette: Dictionary of color name and Tk color
+        """
+
+        self.palette = dict(palette)
+        for (source_path, color_name, size), image in self.images.items():
+            image.configure(file=self.get_recolored_file(source_path, color_name, size))
+
+    def get_recolored_file(self, source_path, color_name, size):
+        """
+        :return: Path of the recolored icon in the cache. Created if missing
+        """
+
+        rgb_color = convert_tk_col_to_rgb(self.palette[color_name], self.tk_controller)
+
+        # A changed icon gets a new modification time and with that a new cache file
+        cache_key = f"{os.path.abspath(source_path)}|{os.stat(source_path).st_mtime_ns}|{rgb_color}|{size}"
+        cache_path = os.path.join(self.cache_folder, hashlib.sha1(cache_key.encode()).hexdigest() + ".png")
+
+        if not os.path.exists(cache_path):
+            self.write_recolored_file(source_path, rgb_color, size, cache_path)
+
+        return cache_path
+
+    @staticmethod
+    def write_recolored_file(source_path, rgb_color, size, cache_path):
+        # PIL is only needed on cache misses
+        from PIL import Image
+
+        with Image.open(source_path) as img:
+            img = img.convert("RGBA")
+            if size is not None:
+                img = img.resize(size)
+            recolored_img = change_icon_color(img, rgb_color)
+
+        png_data = io.BytesIO()
+        recolored_img.save(png_data, format="PNG")
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        write_file_atomic(cache_path, png_data.getvalue())
@@ -0,0 +1,238 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from itertools import accumulate, repeat
+from operator import mul
+
+
+class Histogram:
+    """
+    Distribution of durations in buckets growing by a constant factor, so percentiles are exact to within one
+    bucket (bucket_growth) at any scale while the memory stays constant
+    """
+
+    smallest_bucket = 1e-6  # Seconds
+    bucket_growth = 1.25
+    bucket_count = 96  # Up to about 2000 seconds. Longer durations go into the last bucket
+
+    # Upper bounds of the buckets
+    bucket_bounds = list(accumulate(repeat(bucket_growth, bucket_count - 1), mul, initial=smallest_bucket))
+
+    def __init__(self):
+        self.counts = [0] * Histogram.bucket_count
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value: float):
+        """
+        :param value: Duration in seconds
+        """
+
+        self.counts[min(bisect_left(Histogram.bucket_bounds, value), Histogram.bucket_count - 1)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def get_percentile(self, percentile: float):
+        """
+        :param percentile: Share of values, between 0 and 1
+        :return: Upper bound of the bucket containing the percentile, clamped to the largest value. None if empty
+        """
+
+        if not self.count:
+            return None
+
+        required_count = max(percentile * self.count, 1)
+        cumulative_count = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative_count += bucket_count
+            if cumulative_count >= required_count:
+                return min(max(Histogram.bucket_bounds[index], self.min), self.max)
+
+        return self.max
+
+    def get_summary(self):
+        """
+        :return: Dictionary of count and durations in milliseconds
+        """
+
+        if not self.count:
+            return {"count": 0}
+
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "p50_ms": self.get_percentile(0.5) * 1000,
+            "p95_ms": self.get_percentile(0.95) * 1000,
+            "p99_ms": self.get_percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+"""SINKS"""
+
+
+class LoggingSink:
+    """
+    Passes events to a logger. The event dictionary is attached to the log record as "event"
+    """
+
+    def __init__(self, logger: logging.Logger = None, level=logging.DEBUG):
+        self.logger = logging.getLogger("account_manager") if logger is None else logger
+        self.level = level
+
+    def emit(self, event: dict):
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        details = ", ".join(f"{key}={value}" for key, value in event.items()
+                            if key not in ("name", "time", "duration", "success"))
+        self.logger.log(self.level, "%s %s in %.1f ms%s", event["name"], "done" if event["success"] else "failed",
+                        event["duration"] * 1000, f" ({details})" if details else "", extra={"event": event})
+
+    def close(self):
+        pass
+
+
+class RingBufferSink:
+    """
+    Keeps the latest events in memory
+    """
+
+    def __init__(self, size: int = 1000):
+        self.events = deque(maxlen=size)
+
+    def emit(self, event: dict):
+        self.events.append(event)
+
+    def get_events(self, name: str = None):
+        """
+        :param name: If set, only events of this name are returned
+        :return: List of events, oldest first
+        """
+
+        return [event for event in list(self.events) if name is None or event["name"] == name]
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    """
+    Appends every event as a line of json to a file
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.file = open(file_path, "a")
+
+    def emit(self, event: dict):
+        line = json.dumps(event) + "\n"
+        with self.lock:
+            if self.file is not None:
+                self.file.write(line)
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class Instrumentation:
+    """
+    Collects timed events of operations (e.g. loading or saving the save file). Every event is passed to all
+    sinks, and its duration is recorded in a histogram per event name.
+    An event is a dictionary of name, time (unix time of the start), duration in seconds, success, error
+    (only if failed) and the fields of the operation, like bytes or records.
+    """
+
+    def __init__(self, sinks: list = None):
+        """
+        :param sinks: Objects with an emit(event) and a close() method
+        """
+        self.sinks = list(sinks) if sinks is not None else []
+        self.histograms = {}  # Event name -> Histogram
+        self.lock = threading.Lock()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+
+    @contextmanager
+    def measure(self, name: str, **fields):
+        """
+        Time the code inside the context. Usage: with instrumentation.measure("load") as event: event["bytes"] = ...
+        Exceptions are recorded in the event and passed on
+        :param name: Name of the event
+        :param fields: Initial fields of the event
+        :return: Event fields, which can be extended inside the context
+        """
+
+        event_fields = dict(fields)
+        start_time, start_counter = time.time(), time.perf_counter()
+        try:
+            yield event_fields
+        except Exception as e:
+            self.emit(name, time.perf_counter() - start_counter, success=False, start_time=start_time,
+                      error=str(e), **event_fields)
+            raise
+
+        self.emit(name, time.perf_counter() - start_counter, start_time=start_time, **event_fields)
+
+    def emit(self, name: str, duration: float, success: bool = True, start_time: float = None, **fields):
+        """
+        Record an event measured elsewhere
+        :param name: Name of the event
+        :param duration: Duration in seconds
+        :param success: False if the operation failed
+        :param start_time: Unix time the operation started. Defaults to now minus the duration
+        :param fields: Further fields of the event
+        """
+
+        event = {"name": name, "time": time.time() - duration if start_time is None else start_time,
+                 "duration": duration, "success": success, **fields}
+
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].record(duration)
+
+        # A broken sink must not break the operation that is measured
+        for sink in list(self.sinks):
+            try:
+                sink.emit(event)
+            except Exception as e:
+                print(f"Instrumentation sink {type(sink).__name__} failed. {e}")
+
+    def get_histogram(self, name: str):
+        """
+        :return: Histogram of the durations of an event. Empty if there was no such event yet
+        """
+
+        with self.lock:
+            return self.histograms.get(name, Histogram())
+
+    def get_summaries(self):
+        """
+        :return: Dictionary of event name and summary of its durations (see Histogram.get_summary)
+        """
+
+        with self.lock:
+            return {name: histogram.get_summary() for name, histogram in self.histograms.items()}
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
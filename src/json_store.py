@@ -0,0 +1,458 @@
+import json
+import os
+import shutil
+import threading
+import atexit
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Union
+from store import Store
+from save_journal import SaveJournal
+from save_scheduler import SaveScheduler
+from file_utils import write_file_atomic
+from save_file_loader import SaveFileLoader
+from lazy_save_file import LazySaveFile, LazyAccounts
+
+
+class JsonStore(Store):
+    """
+    Keeps the whole data structure in memory and persists it as a single json save file.
+    Optionally, changes are appended to a journal instead of rewriting the save file and/or written by a
+    background thread.
+    """
+
+    file_name = "data.json"
+    backup_extension = ".json"
+    journal_file_name = "data.journal"
+    journal_compaction_threshold = 1024 * 1024  # Journal size in bytes after which a new snapshot is written
+    index_file_name = "data.index"
+
+    def __init__(self, save_file_location, use_journal: bool = False, write_behind_interval: float = None,
+                 lazy_load: bool = False):
+        """
+        :param save_file_location: Folder of the save file
+        :param use_journal: If True, changes are appended to a journal next to the save file instead of rewriting
+        the whole save file on every change. The journal gets compacted into the save file in the background.
+        A journal left behind by an earlier session is always replayed, also without this option
+        :param write_behind_interval: If set, changes are written by a background thread that collects changes for
+        this many seconds before writing. Call flush or close before exiting. If None, changes are written directly
+        :param lazy_load: If True, the save file is memory mapped and accounts are only decoded when accessed.
+        The offsets of the accounts are cached in an index file next to the save file
+        """
+        super().__init__(save_file_location)
+        self.data = {}
+
+        self.lazy_save_file = None
+        if lazy_load:
+            self.lazy_save_file = LazySaveFile(self.file_path, os.path.join(self.save_file_location, JsonStore.index_file_name))
+
+        # Journal records of changes not yet written to file
+        self.pending_records = []
+        self.use_journal = use_journal
+        self.journal = SaveJournal(os.path.join(self.save_file_location, JsonStore.journal_file_name))
+        self.journal_sequence = 0  # Sequence number of the latest record. Stored in snapshots as infos.journal_sequence
+        self.compaction_thread = None
+
+        # Inverse records of the changes made in the currently open transaction. None if no transaction is open
+        self.undo_log = None
+
+        # Guards self.data against the compaction thread. File lock keeps snapshot writes in order.
+        # Files are written without holding the data lock
+        self.data_lock = threading.RLock()
+        self.file_lock = threading.Lock()
+        self.append_lock = threading.Lock()  # Keeps journal appends in the order of their records
+
+        # Background writer
+        self.save_scheduler = None
+        if write_behind_interval is not None:
+            self.save_scheduler = SaveScheduler(self.write_changes, interval=write_behind_interval)
+            atexit.register(self.close)
+
+    """SAVE FILE"""
+
+    def validate(self, base_data: dict):
+        with open(self.file_path) as json_file:
+            SaveFileLoader(json_file.read(), base_data).load()
+
+    def create(self, base_data: dict):
+        with self.file_lock:
+            # Release the mapping of the old save file before replacing it
+            if self.lazy_save_file is not None:
+                with self.data_lock:
+                    self.lazy_save_file.close()
+                    self.data = {}
+
+            write_file_atomic(self.file_path, json.dumps(base_data, indent=4))
+
+            # Old journal records belong to the replaced save file. The save file may have been replaced because it
+            # could not be read, so they are moved aside instead of deleted
+            self.journal.archive(datetime.now().strftime(".replaced_%Y_%m_%d_%H_%M_%S"))
+            self.journal_sequence = 0
+
+    def read(self, base_data: dict):
+        if self.lazy_save_file is not None:
+            try:
+                data = self.lazy_save_file.open(base_data)
+            except Exception:
+                self.lazy_save_file.close()
+                raise
+
+        # Parse and validate in a single pass
+        else:
+            with open(self.file_path) as json_file:
+                data = SaveFileLoader(json_file.read(), base_data).load()
+
+        # Apply changes made since the last snapshot. Records the snapshot already contains are skipped
+        replayed_records, journal_sequence = self.journal.replay(data, data["infos"].get("journal_sequence", 0))
+
+        with self.data_lock:
+            self.data = data
+            self.pending_records = []
+            self.journal_sequence = journal_sequence
+
+        # CASE: Journal of a session that used one, while this one rewrites the save file. Fold it into the save file
+        if (not self.use_journal and self.journal.exists()) or self.journal.size() > JsonStore.journal_compaction_threshold:
+            self.compact_journal_in_background()
+
+        return replayed_records
+
+    def save(self):
+        self.write_snapshot()
+
+    def backup(self, backup_file_path):
+        # CASE: Nothing loaded (e.g. the save file failed validation). Keep the file and its journal as they are
+        if not self.data:
+            shutil.copyfile(self.file_path, backup_file_path)
+            self.journal.copy_to(backup_file_path + SaveJournal.backup_suffix)
+            return
+
+        # The in memory data also contains changes that are only in the journal yet
+        with self.data_lock:
+            snapshot = self.serialize()
+        write_file_atomic(backup_file_path, snapshot)
+
+    def serialize(self):
+        """
+        :return: Data structure in the save file format. Bytes if lazily loaded, otherwise text
+        """
+
+        if self.lazy_save_file is not None:
+            return self.lazy_save_file.build_snapshot(self.data)[0]
+
+        return json.dumps(self.data, indent=4)
+
+    def write_snapshot(self):
+        """
+        Write the complete data structure to the save file. Journal records contained in the snapshot are discarded
+        """
+
+        with self.instrumentation.measure("write_snapshot") as event, self.file_lock:
+            # Only the state of the data is taken under the lock. Serializing and writing happen outside of it, so
+            # changes do not have to wait for the disk
+            with self.data_lock:
+                # Records up to this one are part of the snapshot and skipped when replaying the journal
+                self.data["infos"]["journal_sequence"] = self.journal_sequence
+
+                # CASE: Lazily loaded. Unchanged accounts are copied from the mapping while building
+                if self.lazy_save_file is not None:
+                    snapshot, index = self.lazy_save_file.build_snapshot(self.data)
+                else:
+                    snapshot, index = JsonStore.copy_structure(self.data), None
+
+                # Pending records are part of the snapshot, unless writing it fails
+                records, self.pending_records = self.pending_records, []
+
+                # Records appended from now on are not part of the snapshot and go into a fresh journal. The rotated
+                # journal is replayed as well until the snapshot was written
+                self.journal.rotate()
+
+            try:
+                if self.lazy_save_file is not None:
+                    staged_path = self.lazy_save_file.stage_snapshot(snapshot)
+
+                    # The mapping is replaced by the mapping of the new file. Readers wait only for the rename
+                    with self.data_lock:
+                        self.lazy_save_file.replace_file(staged_path, index)
+                    self.lazy_save_file.save_index(index)
+
+                else:
+                    write_file_atomic(self.file_path, json.dumps(snapshot, indent=4))
+
+            except BaseException:
+                # Written with the next flush
+                with self.data_lock:
+                    self.pending_records[:0] = records
+                raise
+
+            self.journal.discard_rotated()
+
+            event["bytes"] = os.path.getsize(self.file_path)
+
+    @staticmethod
+    def copy_structure(data: dict):
+        """
+        Copy the data structure down to the single records (settings, infos, groups and accounts). Changes only
+        replace values inside a record, so the copy can be serialized while the data changes
+        """
+
+        return {key: {record_key: dict(record) if isinstance(record, dict) else record
+                      for record_key, record in value.items()} if isinstance(value, dict) else value
+                for key, value in data.items()}
+
+    def flush_changes(self):
+        """
+        Persist all changes made since the last save. With a background writer the changes are only scheduled
+        for writing and the call returns immediately
+        """
+
+        if self.save_scheduler is not None:
+            self.save_scheduler.notify_dirty()
+            return True
+
+        return self.write_changes()
+
+    def write_changes(self):
+        """
+        Write all changes made since the last save. With a journal only the change records are appended,
+        otherwise the whole save file is rewritten
+        """
+
+        # CASE: No journal, rewrite save file
+        if not self.use_journal:
+            print("Updating save file...", end="")
+
+            try:
+                self.write_snapshot()
+                print("done.")
+                return True
+
+            except Exception as e:
+                print(f"failed. {e}")
+                return False
+
+        print("Appending changes to journal...", end="")
+
+        try:
+            # The append lock keeps the records in order, the data lock is only held to take them
+            with self.instrumentation.measure("journal_append") as event, self.append_lock:
+                with self.data_lock:
+                    records, self.pending_records = self.pending_records, []
+
+                try:
+                    event.update(records=len(records), bytes=self.journal.append(records))
+                except Exception:
+                    # Written again with the next change. Records a snapshot contains by then are skipped on replay
+                    with self.data_lock:
+                        self.pending_records[:0] = records
+                    raise
+
+            print(f"done -> {len(records)} record{'s' if len(records) != 1 else ''} written.")
+
+        except Exception as e:
+            print(f"failed. {e}")
+            return False
+
+        if self.journal.size() > JsonStore.journal_compaction_threshold:
+            self.compact_journal_in_background()
+
+        return True
+
+    def compact_journal_in_background(self):
+        """
+        Start writing a fresh snapshot in a background thread, which empties the journal
+        """
+
+        # Only one compaction at a time
+        if self.compaction_thread is not None and self.compaction_thread.is_alive():
+            return
+
+        def compact():
+            print("Compacting journal...", end="")
+            try:
+                self.write_snapshot()
+                print("done.")
+            except Exception as e:
+                print(f"failed. {e}")
+
+        self.compaction_thread = threading.Thread(target=compact, name="JournalCompaction", daemon=True)
+        self.compaction_thread.start()
+
+    def flush(self):
+        if self.save_scheduler is not None:
+            self.save_scheduler.flush()
+
+        # Changes made with save_to_file=False are written as well
+        if self.pending_records:
+            self.write_changes()
+
+    def close(self):
+        self.flush()
+
+        if self.save_scheduler is not None:
+            self.save_scheduler.close()
+            atexit.unregister(self.close)
+            print(f"Save latency: {self.save_scheduler.get_latency_stats()}")
+
+        if self.compaction_thread is not None:
+            self.compaction_thread.join()
+
+        if self.lazy_save_file is not None:
+            with self.data_lock:
+                self.lazy_save_file.close()
+
+    @contextmanager
+    def transaction(self, save_to_file: bool = True):
+        """
+        Group changes into a transaction. If an exception is raised inside the transaction, every change made in
+        it is reverted using the recorded inverse changes and the exception is passed on. On success, all changes
+        are saved with a single flush. Transactions can be nested. Only the outermost transaction saves to file.
+        :param save_to_file: Specify if changes are saved to file when the transaction finishes
+        """
+
+        self.data_lock.acquire()
+        is_outermost = self.undo_log is None
+        if is_outermost:
+            self.undo_log = []
+
+        # Positions to roll back to if this (possibly nested) transaction fails
+        undo_log_start = len(self.undo_log)
+        pending_records_start = len(self.pending_records)
+
+        try:
+            yield self
+
+        except BaseException:
+            # Revert changes in reverse order. Only the changes of this transaction are touched
+            for inverse_record in reversed(self.undo_log[undo_log_start:]):
+                SaveJournal.apply_record(self.data, inverse_record)
+
+            del self.undo_log[undo_log_start:]
+            del self.pending_records[pending_records_start:]
+            raise
+
+        finally:
+            if is_outermost:
+                self.undo_log = None
+            self.data_lock.release()
+
+        # Flush outside of the lock. Writing a snapshot needs the file lock first
+        if is_outermost and save_to_file:
+            self.flush_changes()
+
+    def set_value(self, path: list, value):
+        """
+        Set a value in the data structure and record the change
+        :param path: Keys leading from the data root to the value
+        :param value: New value
+        """
+
+        with self.data_lock:
+            container = self.data
+            for key in path[:-1]:
+                container = container[key]
+
+            # Remember how to revert the change
+            if self.undo_log is not None:
+                if path[-1] in container:
+                    self.undo_log.append({"op": "set", "path": list(path), "value": container[path[-1]]})
+                else:
+                    self.undo_log.append({"op": "delete", "path": list(path)})
+
+            container[path[-1]] = value
+            self.journal_sequence += 1
+            self.pending_records.append({"op": "set", "path": list(path), "value": value, "seq": self.journal_sequence})
+
+    def delete_value(self, path: list):
+        """
+        Delete a value from the data structure and record the change
+        :param path: Keys leading from the data root to the value
+        """
+
+        with self.data_lock:
+            container = self.data
+            for key in path[:-1]:
+                container = container[key]
+
+            deleted_value = container.pop(path[-1])
+
+            # Remember how to revert the change
+            if self.undo_log is not None:
+                self.undo_log.append({"op": "set", "path": list(path), "value": deleted_value})
+
+            self.journal_sequence += 1
+            self.pending_records.append({"op": "delete", "path": list(path), "seq": self.journal_sequence})
+
+    """IMPORT/EXPORT"""
+
+    def export_data(self):
+        with self.data_lock:
+            data = json.loads(self.serialize())
+
+        # Only meaningful together with the journal of this save file
+        data["infos"].pop("journal_sequence", None)
+        return data
+
+    def import_data(self, data: dict):
+        with self.transaction(save_to_file=False):
+            for key, value in data.items():
+                self.set_value([key], json.loads(json.dumps(value)))
+
+    """ACCESS"""
+
+    def get_settings(self):
+        return self.data["settings"]
+
+    def get_info(self, key):
+        return self.data["infos"][key]
+
+    def set_info(self, key, value):
+        self.set_value(["infos", key], value)
+
+    def get_groups(self):
+        return self.data["groups"]
+
+    def set_group(self, group_id: str, attributes: dict):
+        self.set_value(["groups", str(group_id)], attributes)
+
+    def count_accounts(self):
+        return len(self.data["accounts"])
+
+    def get_account(self, account_id: str):
+        return self.data["accounts"][str(account_id)]
+
+    def iter_accounts(self, group_id: Union[None, str] = None):
+        with self.data_lock:
+            accounts = self.data["accounts"]
+
+            # Lazily loaded accounts know their group without being decoded
+            if group_id is not None and isinstance(accounts, LazyAccounts):
+                account_ids = [account_id for account_id in accounts if accounts.get_group_id(account_id) == group_id]
+            else:
+                account_ids = list(accounts)
+
+        for account_id in account_ids:
+            with self.data_lock:
+                account_details = accounts.get(account_id)
+
+            # Skip accounts deleted in the meantime
+            if account_details is None:
+                continue
+
+            if group_id is None or account_details.get("group_id") == group_id:
+                yield account_id, account_details
+
+    def insert_account(self, account_id: str, account_details: dict):
+        self.set_value(["accounts", str(account_id)], account_details)
+
+    def update_account(self, account_id: str, updated_parameters: dict):
+        # Make sure the account exists, also for updates that would only create new keys
+        self.get_account(account_id)
+
+        for key, value in updated_parameters.items():
+            if value is not None:
+                self.set_value(["accounts", str(account_id), key], value)
+            else:
+                self.delete_value(["accounts", str(account_id), key])
+
+    def delete_account(self, account_id: str):
+        self.delete_value(["accounts", str(account_id)])
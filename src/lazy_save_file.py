@@ -0,0 +1,329 @@
+import json
+import mmap
+import os
+from collections.abc import MutableMapping
+from file_utils import write_file_atomic, open_file_atomic
+from save_file_loader import SaveFileLoader, SaveFileError
+
+
+class LazyAccounts(MutableMapping):
+    """
+    Mapping of account id to account details that decodes an account from the memory mapped save file only
+    when it is accessed. Decoded and changed accounts are kept, so references handed out stay valid.
+    """
+
+    def __init__(self, buffer, offsets: dict, validate_account=None):
+        """
+        :param buffer: Memory mapped save file
+        :param offsets: Dictionary of account id and [start, end, group id] of the account in the save file
+        :param validate_account: Function called with account id and details after an account was decoded
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+        self.validate_account = validate_account
+
+        self.records = {}  # Decoded or changed accounts
+        self.deleted = set()  # Accounts in the save file that were deleted since
+        self.added = {}  # Accounts that are not in the save file. Used as ordered set
+
+    def __getitem__(self, account_id):
+        if account_id in self.records:
+            return self.records[account_id]
+
+        if account_id in self.deleted or account_id not in self.offsets:
+            raise KeyError(account_id)
+
+        start, end, _ = self.offsets[account_id]
+        account_details = json.loads(self.buffer[start:end])
+
+        if self.validate_account is not None:
+            try:
+                self.validate_account(account_id, account_details)
+            except SaveFileError as e:
+                # Locate the account in the file. Only done for broken accounts
+                raise SaveFileError(e.message, text=self.buffer[:start].decode("latin-1"), position=start, path=e.path)
+
+        self.records[account_id] = account_details
+        return account_details
+
+    def __setitem__(self, account_id, account_details):
+        self.records[account_id] = account_details
+        self.deleted.discard(account_id)
+
+        if account_id not in self.offsets:
+            self.added[account_id] = None
+
+    def __delitem__(self, account_id):
+        if account_id not in self:
+            raise KeyError(account_id)
+
+        self.records.pop(account_id, None)
+        if account_id in self.offsets:
+            self.deleted.add(account_id)
+        else:
+            del self.added[account_id]
+
+    def __contains__(self, account_id):
+        return account_id in self.added or (account_id in self.offsets and account_id not in self.deleted)
+
+    def __iter__(self):
+        for account_id in self.offsets:
+            if account_id not in self.deleted:
+                yield account_id
+
+        yield from list(self.added)
+
+    def __len__(self):
+        return len(self.offsets) - len(self.deleted) + len(self.added)
+
+    def get_group_id(self, account_id):
+        """
+        :return: Group id of an account without decoding it
+        """
+
+        if account_id in self.records:
+            return self.records[account_id].get("group_id")
+
+        if account_id not in self:
+            raise KeyError(account_id)
+
+        return self.offsets[account_id][2]
+
+    def raw_record(self, account_id):
+        """
+        :return: Bytes of an account in the save file, or None if the account was decoded or changed since
+        """
+
+        if account_id in self.records or account_id not in self.offsets:
+            return None
+
+        start, end, _ = self.offsets[account_id]
+        return self.buffer[start:end]
+
+    def rebase(self, buffer, offsets: dict):
+        """
+        Point the mapping to a newly written save file. Accounts added or deleted after the save file was built
+        stay added or deleted. Decoded and changed accounts are kept
+        :param offsets: Offsets of the accounts in the new save file
+        """
+
+        account_ids = list(self)
+
+        self.buffer = buffer
+        self.offsets = offsets
+        self.deleted = set(offsets).difference(account_ids)
+        self.added = {account_id: None for account_id in account_ids if account_id not in offsets}
+
+
+class LazySaveFile:
+    """
+    Memory mapped json save file with an index of the byte offsets of every account and root value.
+    The index is cached next to the save file and rebuilt when the save file changed.
+    Root values other than accounts (settings, infos, groups) are small and are decoded right away.
+    """
+
+    index_version = 1
+
+    def __init__(self, file_path, index_path):
+        """
+        :param file_path: Path of the json save file
+        :param index_path: Path of the cached index
+        """
+        self.file_path = file_path
+        self.index_path = index_path
+
+        self.file = None
+        self.buffer = None
+        self.accounts = None
+
+    def open(self, base_data: dict):
+        """
+        Map the save file and load or build its index
+        :param base_data: Base data structure the save file has to follow
+        :return: Data structure with a LazyAccounts mapping as accounts
+        """
+
+        self.close()
+        self.file = open(self.file_path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        text = None
+        index = self.load_cached_index()
+        if index is None:
+            # Latin-1 maps every byte to one character, so text positions are byte offsets
+            text = self.buffer[:].decode("latin-1")
+            index = self.build_index(text, base_data)
+            self.save_index(index)
+
+        validator = SaveFileLoader(None, base_data)
+        self.accounts = LazyAccounts(self.buffer, index["accounts"],
+                                     validate_account=lambda account_id, account_details:
+                                     validator.validate_account(account_id, account_details, {}))
+
+        # Keep the order of the root keys, so snapshots have the same layout as the save file
+        data = {}
+        for key, (start, end) in index["root"].items():
+            data[key] = self.accounts if key == "accounts" else json.loads(self.buffer[start:end])
+
+        # Records are validated when decoded. Everything else is checked now
+        for group_id, group_attributes in data.get("groups", {}).items():
+            validator.validate_group(group_id, group_attributes, {})
+        SaveFileLoader(text, base_data).validate_root(data, {key: start for key, (start, _) in index["root"].items()})
+
+        return data
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def file_signature(self):
+        stat = os.stat(self.file_path)
+        return {"version": LazySaveFile.index_version, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load_cached_index(self):
+        """
+        :return: Cached index or None if there is none or it belongs to another version of the save file
+        """
+
+        try:
+            with open(self.index_path) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return None
+
+        if index.get("signature") != self.file_signature():
+            return None
+
+        return index
+
+    def save_index(self, index):
+        index["signature"] = self.file_signature()
+        try:
+            write_file_atomic(self.index_path, json.dumps(index))
+        except OSError as e:
+            print(f"Could not cache save file index. {e}")
+
+    @staticmethod
+    def build_index(text, base_data: dict):
+        """
+        Walk the save file once and record the offsets of every root value and account
+        :param text: Save file decoded as latin-1
+        :param base_data: Base data structure the save file has to follow
+        """
+
+        loader = SaveFileLoader(text, base_data)
+        index = {"root": {}, "accounts": {}}
+
+        def on_account(account_id, position):
+            account_details, end = loader.decode_value(position, f'accounts["{account_id}"]')
+            group_id = account_details.get("group_id") if isinstance(account_details, dict) else None
+            index["accounts"][account_id] = [position, end, group_id]
+            return end
+
+        def on_root_member(key, position):
+            if key == "accounts":
+                end = loader.parse_members(position, on_account, path=key)
+            else:
+                _, end = loader.decode_value(position, key)
+
+            index["root"][key] = [position, end]
+            return end
+
+        loader.parse_members(0, on_root_member)
+        return index
+
+    def build_snapshot(self, data):
+        """
+        Serialize the data structure in the same layout as json.dump(data, indent=4). Accounts that were not
+        decoded are copied from the mapped save file without decoding them
+        :return: Bytes of the new save file and its index
+        """
+
+        pieces = []
+        length = 0
+        index = {"root": {}, "accounts": {}}
+
+        def add(piece: bytes):
+            nonlocal length
+            pieces.append(piece)
+            length += len(piece)
+
+        def dumps(value, depth):
+            return json.dumps(value, indent=4).replace("\n", "\n" + " " * 4 * depth).encode()
+
+        add(b"{")
+        for root_number, (key, value) in enumerate(data.items()):
+            add(b"," if root_number else b"")
+            add(b"\n    " + json.dumps(key).encode() + b": ")
+            start = length
+
+            if key == "accounts":
+                add(b"{")
+                for account_number, account_id in enumerate(value):
+                    add(b"," if account_number else b"")
+                    add(b"\n        " + json.dumps(account_id).encode() + b": ")
+                    account_start = length
+
+                    raw_record = value.raw_record(account_id) if isinstance(value, LazyAccounts) else None
+                    if raw_record is not None:
+                        add(raw_record)
+                        group_id = value.get_group_id(account_id)
+                    else:
+                        add(dumps(value[account_id], 2))
+                        group_id = value[account_id].get("group_id")
+
+                    index["accounts"][account_id] = [account_start, length, group_id]
+                add(b"\n    }" if len(value) else b"}")
+
+            else:
+                add(dumps(value, 1))
+
+            index["root"][key] = [start, length]
+        add(b"\n}")
+
+        return b"".join(pieces), index
+
+    def write_snapshot(self, data):
+        """
+        Replace the save file with the current data structure and remap it
+        """
+
+        snapshot, index = self.build_snapshot(data)
+        staged_path = self.stage_snapshot(snapshot)
+        self.replace_file(staged_path, index)
+        self.save_index(index)
+
+    def stage_snapshot(self, snapshot: bytes):
+        """
+        Write a snapshot next to the save file and make sure it reached the disk. Does not touch the mapping, so it
+        does not have to wait for readers
+        :return: Path of the staged snapshot
+        """
+
+        staged_path = self.file_path + ".staged"
+        with open_file_atomic(staged_path, binary=True) as staged_file:
+            staged_file.write(snapshot)
+
+        return staged_path
+
+    def replace_file(self, staged_path, index: dict):
+        """
+        Replace the save file with a staged snapshot and remap it. Only renames, so readers wait only briefly
+        :param index: Index of the staged snapshot
+        """
+
+        # Mapped files can not be replaced on every platform. The old mapping is not needed any longer
+        self.close()
+        try:
+            os.replace(staged_path, self.file_path)
+        finally:
+            # Map the new save file, or the old one again if replacing failed
+            self.file = open(self.file_path, 'rb')
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.accounts.buffer = self.buffer
+
+        self.accounts.rebase(self.buffer, index["accounts"])
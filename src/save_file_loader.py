@@ -0,0 +1,224 @@
+import json
+import re
+from collections.abc import Mapping
+
+
+class SaveFileError(ValueError):
+    """
+    Raised if a save file can not be parsed or does not follow the save file structure.
+    Contains the location of the problem in the file.
+    """
+
+    def __init__(self, message, text: str = None, position: int = None, path: str = None):
+        self.message = message
+        self.path = path
+        self.line, self.column = None, None
+
+        if text is not None and position is not None:
+            self.line = text.count("\n", 0, position) + 1
+            self.column = position - text.rfind("\n", 0, position)
+
+        location = []
+        if self.line is not None:
+            location.append(f"line {self.line}, column {self.column}")
+        if path:
+            location.append(path)
+
+        super().__init__(f"{message} ({', '.join(location)})" if location else message)
+
+
+class SaveFileLoader:
+    """
+    Parses a json save file in a single pass and validates its structure while building the data structure.
+    Root values are decoded one by one and checked right away. If an account or group is invalid, its
+    position in the file is looked up so the problem can be reported precisely.
+    """
+
+    whitespace = re.compile(r"[ \t\n\r]*")
+
+    # Meta details every account has to contain
+    account_meta_details = ("account_id", "group_id", "account_name")
+
+    def __init__(self, text: str, base_data: dict):
+        """
+        :param text: Content of the save file. May be None if only single entries are validated
+        :param base_data: Base data structure the save file has to follow
+        """
+        self.text = text
+        self.base_data = base_data
+        self.decoder = json.JSONDecoder()
+
+    def error(self, message, position=None, path=None):
+        return SaveFileError(message, text=self.text, position=position, path=path)
+
+    def skip_whitespace(self, position):
+        return SaveFileLoader.whitespace.match(self.text, position).end()
+
+    def expect(self, position, character, path=None):
+        """
+        Check that the next non whitespace character is the expected one
+        :return: Position after the character
+        """
+
+        position = self.skip_whitespace(position)
+        if self.text[position:position + 1] != character:
+            raise self.error(f"Expected '{character}'", position, path)
+
+        return position + 1
+
+    def decode_value(self, position, path=None):
+        """
+        Decode a single json value
+        :return: Value and position after it
+        """
+
+        position = self.skip_whitespace(position)
+        try:
+            return self.decoder.raw_decode(self.text, position)
+        except json.JSONDecodeError as e:
+            raise self.error(f"Invalid json: {e.msg}", e.pos, path)
+
+    def iter_members(self, position, path=None):
+        """
+        Walk the members of a json object without decoding their values. After receiving a member, the caller has
+        to send the position after the member value back into the generator.
+        :return: Generator of member key and position of the member value. Returns the position after the object
+        """
+
+        position = self.expect(position, "{", path)
+        position = self.skip_whitespace(position)
+
+        # CASE: Empty object
+        if self.text[position:position + 1] == "}":
+            return position + 1
+
+        while True:
+            position = self.skip_whitespace(position)
+            if self.text[position:position + 1] != '"':
+                raise self.error("Expected member name", position, path)
+
+            key, position = self.decode_value(position, path)
+            position = self.expect(position, ":", path)
+            position = self.skip_whitespace(position)
+
+            position = yield key, position
+
+            position = self.skip_whitespace(position)
+            character = self.text[position:position + 1]
+            if character == "}":
+                return position + 1
+            if character != ",":
+                raise self.error("Expected ',' or '}'", position, path)
+            position += 1
+
+    def parse_members(self, position, on_member, path=None):
+        """
+        Call on_member(key, value_position) for every member of a json object
+        :param on_member: Function returning the position after the member value
+        :return: Position after the object
+        """
+
+        members = self.iter_members(position, path)
+        try:
+            key, value_position = next(members)
+            while True:
+                key, value_position = members.send(on_member(key, value_position))
+        except StopIteration as stop:
+            return stop.value
+
+    def locate_member(self, position, member_key, path=None):
+        """
+        Find the value position of a member inside the json object at position. Only used to report errors
+        :return: Position of the member value or the object position if the member was not found
+        """
+
+        members = self.iter_members(position, path)
+        try:
+            key, value_position = next(members)
+            while key != member_key:
+                _, end = self.decode_value(value_position, path)
+                key, value_position = members.send(end)
+            return value_position
+        except StopIteration:
+            return position
+
+    def load(self):
+        """
+        Parse and validate the save file
+        :return: Data structure of the save file
+        """
+
+        data = {}
+        positions = {}  # Position of every root value, used to locate errors found after parsing
+
+        def on_root_member(key, position):
+            positions[key] = position
+            data[key], end = self.decode_value(position, key)
+
+            # Entries are validated right after their collection was decoded
+            if key == "accounts" and isinstance(data[key], dict):
+                for account_id, account_details in data[key].items():
+                    self.validate_account(account_id, account_details, positions)
+            elif key == "groups" and isinstance(data[key], dict):
+                for group_id, group_attributes in data[key].items():
+                    self.validate_group(group_id, group_attributes, positions)
+
+            return end
+
+        end = self.parse_members(0, on_root_member)
+        if self.skip_whitespace(end) != len(self.text):
+            raise self.error("Unexpected data after the save file content", self.skip_whitespace(end))
+
+        self.validate_root(data, positions)
+        return data
+
+    def entry_error(self, message, collection, entry_id, positions):
+        path = f'{collection}["{entry_id}"]'
+
+        # Without the file content (e.g. validating a single lazily loaded record) only the path is known
+        if self.text is None or collection not in positions:
+            return self.error(message, path=path)
+
+        return self.error(message, self.locate_member(positions[collection], entry_id, collection), path)
+
+    def validate_account(self, account_id, account_details, positions):
+        if not isinstance(account_details, dict):
+            raise self.entry_error("Account has to be an object", "accounts", account_id, positions)
+
+        for meta_detail in SaveFileLoader.account_meta_details:
+            if not isinstance(account_details.get(meta_detail), str):
+                raise self.entry_error(f"Meta detail \"{meta_detail}\" missing or not a string",
+                                       "accounts", account_id, positions)
+
+        if account_details["account_id"] != account_id:
+            raise self.entry_error(f"Account ID \"{account_details['account_id']}\" does not match its key",
+                                   "accounts", account_id, positions)
+
+    def validate_group(self, group_id, group_attributes, positions):
+        if not isinstance(group_attributes, dict) or not isinstance(group_attributes.get("name"), str):
+            raise self.entry_error("Group needs a name", "groups", group_id, positions)
+
+        # Optional. Groups of older save files have no collapsed state
+        if not isinstance(group_attributes.get("collapsed", False), bool):
+            raise self.entry_error("Collapsed state of group has to be true or false", "groups", group_id, positions)
+
+    def validate_root(self, data, positions):
+        # Check key integrity
+        for key, base_value in self.base_data.items():
+            if key not in data:
+                raise self.error(f"Base key \"{key}\" missing")
+            # Lazily loaded collections are mappings but no dicts
+            expected_type = Mapping if isinstance(base_value, dict) else type(base_value)
+            if not isinstance(data[key], expected_type):
+                raise self.error(f"Base key \"{key}\" has the wrong type", positions[key], key)
+
+        # Id counters have to be ahead of every existing id, otherwise new accounts and groups overwrite old ones
+        for counter, key in (("next_id", "accounts"), ("next_group_id", "groups")):
+            next_id = data["infos"].get(counter)
+            if not isinstance(next_id, int):
+                raise self.error(f"Id counter \"{counter}\" missing or not an integer", positions["infos"], "infos")
+
+            for existing_id in data[key].keys():
+                if existing_id.isdigit() and int(existing_id) >= next_id:
+                    raise self.entry_error(f"Id is not below the id counter \"{counter}\"={next_id}",
+                                           key, existing_id, positions)
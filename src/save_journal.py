@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import threading
+
+
+class SaveJournal:
+    """
+    Append-only log of changes made to the data structure since the last save file snapshot.
+    Every record is one json line describing a single "set" or "delete" of a value at a key path, e.g.
+    {"op": "set", "path": ["accounts", "4", "password"], "value": "new_password", "seq": 12}.
+    Records only contain absolute values, so replaying a record more than once always leads to the same result.
+    The sequence number "seq" increases with every record. A snapshot stores the sequence number of the last
+    record it contains, and replaying skips the records up to it.
+    """
+
+    rotated_suffix = ".old"
+    backup_suffix = ".journal"  # Appended to the path of a save file copy for the copy of its journal
+
+    def __init__(self, journal_path):
+        self.journal_path = journal_path
+        self.rotated_path = journal_path + SaveJournal.rotated_suffix
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def apply_record(data: dict, record: dict, ignore_missing: bool = False):
+        """
+        Apply a single journal record to a data structure
+        :param data: Root of the data structure
+        :param record: Journal record
+        :param ignore_missing: If True, a record whose parent does not exist (e.g. an update of an account deleted
+        later on) is skipped instead of raising KeyError
+        :return: True if the record was applied
+        """
+
+        container = data
+        for key in record["path"][:-1]:
+            if ignore_missing and key not in container:
+                return False
+            container = container[key]
+
+        if record["op"] == "set":
+            container[record["path"][-1]] = record["value"]
+        elif record["op"] == "delete":
+            container.pop(record["path"][-1], None)  # Already deleted values are fine when replaying twice
+        else:
+            raise ValueError(f"Unknown journal operation \"{record['op']}\"")
+
+        return True
+
+    def append(self, records: list):
+        """
+        Append records to the journal and make sure they reached the disk
+        :param records: List of journal records
+        :return: Number of bytes written
+        """
+
+        if not records:
+            return 0
+
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+
+        with self.lock:
+            with open(self.journal_path, 'a') as journal_file:
+                journal_file.write(lines)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+        return len(lines.encode())
+
+    def replay(self, data: dict, after_sequence: int = 0):
+        """
+        Apply all records of the journal (including a rotated journal left over from an interrupted compaction)
+        :param data: Root of the data structure the records are applied to
+        :param after_sequence: Sequence number of the last record the data already contains. Records up to it
+        are skipped
+        :return: Number of applied records and the highest sequence number in the journal
+        """
+
+        applied_records = 0
+        last_sequence = after_sequence
+
+        with self.lock:
+            for path in (self.rotated_path, self.journal_path):
+                if not os.path.exists(path):
+                    continue
+
+                with open(path) as journal_file:
+                    for line in journal_file:
+                        # A crash during an append can leave an incomplete last line. Everything before is valid
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            break
+
+                        # CASE: Already in the snapshot. Records of older journals have no sequence number
+                        sequence = record.get("seq")
+                        if sequence is not None:
+                            if sequence <= after_sequence:
+                                continue
+                            last_sequence = max(last_sequence, sequence)
+
+                        # Records are applied to a snapshot that may be newer than they are
+                        if SaveJournal.apply_record(data, record, ignore_missing=True):
+                            applied_records += 1
+
+        return applied_records, last_sequence
+
+    def size(self):
+        """
+        :return: Size of the journal in bytes
+        """
+
+        size = 0
+        for path in (self.rotated_path, self.journal_path):
+            if os.path.exists(path):
+                size += os.path.getsize(path)
+
+        return size
+
+    def rotate(self):
+        """
+        Move the current journal aside so that new records start a fresh journal.
+        The rotated journal is removed with discard_rotated once a snapshot containing its records has been written.
+        """
+
+        with self.lock:
+            if not os.path.exists(self.journal_path):
+                return
+
+            # CASE: A previous rotation was never discarded. Keep its records in front of the current ones
+            if os.path.exists(self.rotated_path):
+                with open(self.journal_path) as journal_file, open(self.rotated_path, 'a') as rotated_file:
+                    rotated_file.write(journal_file.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.rotated_path)
+
+    def discard_rotated(self):
+        """
+        Delete the rotated journal
+        """
+
+        with self.lock:
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+
+    def exists(self):
+        return os.path.exists(self.journal_path) or os.path.exists(self.rotated_path)
+
+    def archive(self, suffix: str):
+        """
+        Move all journal records aside instead of deleting them, e.g. when the save file they belong to is replaced
+        :param suffix: Appended to the names of the journal files
+        """
+
+        with self.lock:
+            for path in (self.rotated_path, self.journal_path):
+                if os.path.exists(path):
+                    os.replace(path, path + suffix)
+
+    def copy_to(self, target_path):
+        """
+        Copy the journal files next to a copy of the save file
+        :param target_path: Path of the copied journal. The rotated journal gets the usual suffix
+        """
+
+        with self.lock:
+            for path, target in ((self.rotated_path, target_path + SaveJournal.rotated_suffix),
+                                 (self.journal_path, target_path)):
+                if os.path.exists(path):
+                    shutil.copyfile(path, target)
+
+    def clear(self):
+        """
+        Delete all journal records
+        """
+
+        with self.lock:
+            for path in (self.rotated_path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
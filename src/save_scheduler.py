@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+
+
+class SaveScheduler:
+    """
+    Background writer thread that coalesces bursts of change notifications into a single write per interval.
+    The write itself is done by the given write function, which is always called from the writer thread.
+    """
+
+    latency_history_size = 100  # Number of write durations kept for latency reporting
+
+    def __init__(self, write_function, interval: float = 0.5):
+        """
+        :param write_function: Function without parameters that persists all pending changes
+        :param interval: Time in seconds changes are collected before they are written
+        """
+        self.write_function = write_function
+        self.interval = interval
+
+        self.condition = threading.Condition()
+        self.dirty = False
+        self.writing = False
+        self.flush_requested = False
+        self.closed = False
+
+        # Statistics
+        self.notifications_since_write = 0
+        self.write_durations = deque(maxlen=SaveScheduler.latency_history_size)
+
+        self.thread = threading.Thread(target=self.run, name="SaveScheduler", daemon=True)
+        self.thread.start()
+
+    def notify_dirty(self):
+        """
+        Signal that there are changes to write. Returns immediately
+        """
+
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Save scheduler is closed")
+
+            self.dirty = True
+            self.notifications_since_write += 1
+            self.condition.notify_all()
+
+    def flush(self, timeout: float = None):
+        """
+        Write pending changes now and wait until they are on disk
+        :param timeout: Maximum time in seconds to wait. None waits until done
+        :return: True if all changes were written in time
+        """
+
+        with self.condition:
+            if self.dirty:
+                self.flush_requested = True
+                self.condition.notify_all()
+
+            return self.condition.wait_for(lambda: not self.dirty and not self.writing, timeout=timeout)
+
+    def close(self, timeout: float = None):
+        """
+        Write pending changes and stop the writer thread
+        :param timeout: Maximum time in seconds to wait for the last write
+        """
+
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+        self.thread.join(timeout=timeout)
+
+    def get_latency_stats(self):
+        """
+        :return: Dictionary with number of writes, last, mean and max write duration in milliseconds
+        """
+
+        durations = list(self.write_durations)
+        if not durations:
+            return {"writes": 0, "last_ms": None, "mean_ms": None, "max_ms": None}
+
+        return {"writes": len(durations),
+                "last_ms": durations[-1] * 1000,
+                "mean_ms": sum(durations) / len(durations) * 1000,
+                "max_ms": max(durations) * 1000}
+
+    def run(self):
+        while True:
+            with self.condition:
+                # Sleep until there is something to write
+                self.condition.wait_for(lambda: self.dirty or self.closed)
+
+                if not self.dirty:
+                    return  # Closed and nothing left to write
+
+                # Collect further notifications for one interval unless a flush or shutdown is requested
+                self.condition.wait_for(lambda: self.flush_requested or self.closed, timeout=self.interval)
+
+                coalesced_notifications = self.notifications_since_write
+                self.dirty = False
+                self.flush_requested = False
+                self.notifications_since_write = 0
+                self.writing = True
+
+            start_time = time.perf_counter()
+            try:
+                self.write_function()
+            except Exception as e:
+                print(f"Background save failed. {e}")
+            finally:
+                duration = time.perf_counter() - start_time
+                with self.condition:
+                    self.write_durations.append(duration)
+                    self.writing = False
+                    self.condition.notify_all()
+
+            print(f"Background save done in {duration * 1000:.1f} ms "
+                  f"({coalesced_notifications} change{'s' if coalesced_notifications != 1 else ''} coalesced).")
@@ -0,0 +1,414 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict, OrderedDict
+from functools import lru_cache
+from itertools import islice
+
+try:
+    from re import _parser as regex_parser  # Python 3.11+
+except ImportError:
+    import sre_parse as regex_parser
+
+
+class SearchCancelled(Exception):
+    """
+    Raised by a search that was cancelled before it finished
+    """
+
+
+class SearchIndex:
+    """
+    Inverted index over the detail values of all accounts.
+    Every value is split into lower case trigrams (values shorter than three characters are kept whole) and words.
+    Substring queries intersect the trigram postings of the query, prefix queries look up the sorted words and
+    regex queries are prefiltered with the trigrams of the literal text the pattern requires. Candidates are
+    always verified against the original values, so results are exactly those of a full scan.
+    Recent results are cached. Queries narrowing down a cached query only check its result, and cached results
+    are updated for every changed account instead of being dropped.
+    """
+
+    gram_size = 3
+    value_separator = "\x00"  # Joins the values of an account for substring checks. Never part of a query
+    regex_characters = set("\\.^$*+?{}[]|()")
+    word_pattern = re.compile(r"\w+")
+    cancel_check_interval = 2048  # Number of candidates verified between two cancellation checks
+    query_cache_size = 64  # Number of query results kept
+
+    def __init__(self):
+        self.documents = {}  # Account id -> tuple of detail values as strings
+        self.joined_documents = {}  # Account id -> detail values joined by the value separator
+        self.grams = defaultdict(set)  # Trigram -> account ids
+        self.words = defaultdict(set)  # Lower case word -> account ids
+        self.sorted_words = None  # Sorted vocabulary for prefix queries. Rebuilt when words appear or disappear
+        self.query_cache = OrderedDict()  # Query key -> set of matching account ids. Least recently used first
+
+    """INDEXING"""
+
+    @staticmethod
+    def get_grams(value: str):
+        value = value.lower()
+        if len(value) < SearchIndex.gram_size:
+            return {value} if value else set()
+
+        return {value[i:i + SearchIndex.gram_size] for i in range(len(value) - SearchIndex.gram_size + 1)}
+
+    @staticmethod
+    def get_terms(document: tuple):
+        """
+        :return: Trigrams and words of all values of an account
+        """
+
+        grams, words = set(), set()
+        for value in document:
+            grams |= SearchIndex.get_grams(value)
+            words.update(SearchIndex.word_pattern.findall(value.lower()))
+
+        return grams, words
+
+    def add_postings(self, postings, terms, account_id):
+        for term in terms:
+            if postings is self.words and term not in postings:
+                self.sorted_words = None
+            postings[term].add(account_id)
+
+    def remove_postings(self, postings, terms, account_id):
+        for term in terms:
+            account_ids = postings[term]
+            account_ids.discard(account_id)
+
+            if not account_ids:
+                del postings[term]
+                if postings is self.words:
+                    self.sorted_words = None
+
+    def update(self, account_id: str, account_details: dict = None):
+        """
+        Add, update or remove an account. Only the postings of terms that changed are touched
+        :param account_id: Id of the account
+        :param account_details: Current details of the account. None removes the account
+        """
+
+        old_document = self.documents.pop(account_id, ())
+        new_document = () if account_details is None else tuple(str(value) for value in account_details.values())
+
+        self.joined_documents.pop(account_id, None)
+        if account_details is not None:
+            self.documents[account_id] = new_document
+            self.joined_documents[account_id] = SearchIndex.value_separator.join(new_document)
+
+        # CASE: Nothing searchable changed
+        if old_document == new_document:
+            return
+
+        old_grams, old_words = SearchIndex.get_terms(old_document)
+        new_grams, new_words = SearchIndex.get_terms(new_document)
+
+        self.remove_postings(self.grams, old_grams - new_grams, account_id)
+        self.remove_postings(self.words, old_words - new_words, account_id)
+        self.add_postings(self.grams, new_grams - old_grams, account_id)
+        self.add_postings(self.words, new_words - old_words, account_id)
+
+        # Only the changed account can enter or leave the cached results
+        for query_key, cached_result in self.query_cache.items():
+            if account_details is not None and any(self.filter_matches(query_key, [account_id])):
+                cached_result.add(account_id)
+            else:
+                cached_result.discard(account_id)
+
+    def rebuild(self, accounts, is_cancelled=None):
+        """
+        Replace the index content
+        :param accounts: Iterable of account id and account details
+        :param is_cancelled: Function returning True if the index is not needed anymore. Raises SearchCancelled then
+        """
+
+        self.__init__()
+        for account_number, (account_id, account_details) in enumerate(accounts):
+            if is_cancelled is not None and account_number % SearchIndex.cancel_check_interval == 0 and is_cancelled():
+                raise SearchCancelled()
+
+            document = tuple(str(value) for value in account_details.values())
+            self.documents[account_id] = document
+            self.joined_documents[account_id] = SearchIndex.value_separator.join(document)
+
+            # Nothing to diff against. Postings are filled directly
+            grams, words = SearchIndex.get_terms(document)
+            for gram in grams:
+                self.grams[gram].add(account_id)
+            for word in words:
+                self.words[word].add(account_id)
+
+    """QUERIES"""
+
+    def search(self, query: str, is_cancelled=None):
+        """
+        Find accounts with at least one detail value matching the query. Queries containing regex characters are
+        regular expressions, all others are case sensitive substrings. Invalid expressions are searched as text
+        :param is_cancelled: Function returning True if the search is not needed anymore. Raises SearchCancelled then
+        :return: Set of account ids
+        """
+
+        return self.cached_search(SearchIndex.get_query_key(query), is_cancelled)
+
+    def search_prefix(self, prefix: str, is_cancelled=None):
+        """
+        :return: Set of ids of accounts with a word starting with the prefix (case insensitive)
+        """
+
+        return self.cached_search(("prefix", prefix.lower()), is_cancelled)
+
+    @staticmethod
+    def scan(accounts, query: str, prefix: bool = False, is_cancelled=None):
+        """
+        Search accounts one by one without building an index. Finds the same accounts as search and search_prefix,
+        and is cheaper for a single query
+        :param accounts: Iterable of account id and account details
+        :param prefix: If True, find accounts with a word starting with the query (case insensitive)
+        :param is_cancelled: Function returning True if the search is not needed anymore. Raises SearchCancelled then
+        :return: Set of account ids
+        """
+
+        query_key = ("prefix", query.lower()) if prefix else SearchIndex.get_query_key(query)
+
+        # Only the documents of one chunk are kept at a time
+        chunk_index = SearchIndex()
+        result = set()
+        for chunk in SearchIndex.iter_chunks(accounts, is_cancelled):
+            chunk_index.documents = {account_id: tuple(str(value) for value in account_details.values())
+                                     for account_id, account_details in chunk}
+            chunk_index.joined_documents = {account_id: SearchIndex.value_separator.join(document)
+                                            for account_id, document in chunk_index.documents.items()}
+            result.update(chunk_index.filter_matches(query_key, chunk_index.documents))
+
+        return result
+
+    @staticmethod
+    def get_query_key(query: str):
+        """
+        :return: Normalized query as tuple of search mode ("text", "regex" or "prefix") and query
+        """
+
+        if not SearchIndex.regex_characters.intersection(query):
+            return "text", query
+
+        try:
+            SearchIndex.compile_pattern(query)
+        except re.error:
+            return "text", query
+
+        return "regex", query
+
+    def cached_search(self, query_key, is_cancelled=None):
+        """
+        Answer a query from the cache, or evaluate it and cache the result. A query that narrows down a cached one
+        (e.g. "goog" after "goo") only checks the accounts of the cached result
+        """
+
+        # CASE: Known query. Mark as recently used
+        if query_key in self.query_cache:
+            self.query_cache.move_to_end(query_key)
+            return set(self.query_cache[query_key])
+
+        candidates = self.get_cached_candidates(query_key)
+
+        # CASE: Prefix without cached result. The word postings are exact and need no checking
+        if candidates is None and query_key[0] == "prefix":
+            result = self.get_index_candidates(query_key)
+
+        else:
+            if candidates is None:
+                candidates = self.get_index_candidates(query_key)
+
+            result = set()
+            for chunk in SearchIndex.iter_chunks(candidates, is_cancelled):
+                result.update(self.filter_matches(query_key, chunk))
+
+        self.query_cache[query_key] = result
+        if len(self.query_cache) > SearchIndex.query_cache_size:
+            self.query_cache.popitem(last=False)
+
+        return set(result)
+
+    def get_cached_candidates(self, query_key):
+        """
+        :return: Smallest cached result of a query the given query narrows down, or None if there is none
+        """
+
+        mode, query = query_key
+        candidates = None
+
+        for (cached_mode, cached_query), cached_result in self.query_cache.items():
+            if cached_mode != mode:
+                continue
+
+            # Every account containing the text contains parts of it. Words starting with the prefix start with
+            # shorter prefixes. Regular expressions can not be compared
+            if (mode == "text" and cached_query in query) or (mode == "prefix" and query.startswith(cached_query)):
+                if candidates is None or len(cached_result) < len(candidates):
+                    candidates = cached_result
+
+        return candidates
+
+    def get_index_candidates(self, query_key):
+        """
+        :return: Ids of all accounts that may match the query according to the postings
+        """
+
+        mode, query = query_key
+
+        if mode == "prefix":
+            if self.sorted_words is None:
+                self.sorted_words = sorted(self.words)
+
+            candidates = set()
+            for position in range(bisect_left(self.sorted_words, query), len(self.sorted_words)):
+                word = self.sorted_words[position]
+                if not word.startswith(query):
+                    break
+                candidates |= self.words[word]
+
+            return candidates
+
+        if mode == "regex":
+            required_literals = SearchIndex.get_required_literals(SearchIndex.compile_pattern(query))
+
+            # CASE: Nothing to prefilter with. Every account has to be checked
+            if not required_literals:
+                return self.documents.keys()
+
+            grams = set()
+            for literal in required_literals:
+                grams |= SearchIndex.get_grams(literal)
+            return self.intersect_grams(grams)
+
+        lower_text = query.lower()
+
+        # CASE: Empty text matches every account
+        if not lower_text:
+            return self.documents.keys()
+
+        # CASE: Text is shorter than a trigram. Collect postings of all terms containing it
+        if len(lower_text) < SearchIndex.gram_size:
+            candidates = set()
+            postings_size = 0
+            for gram, account_ids in self.grams.items():
+                if lower_text in gram:
+                    candidates |= account_ids
+                    postings_size += len(account_ids)
+
+                    # Common characters are in most accounts. Checking every account is cheaper than the union
+                    if postings_size > len(self.documents):
+                        return self.documents.keys()
+
+            return candidates
+
+        return self.intersect_grams(SearchIndex.get_grams(lower_text))
+
+    def filter_matches(self, query_key, account_ids):
+        """
+        :return: Generator of the account ids that match the query
+        """
+
+        mode, query = query_key
+
+        if mode == "prefix":
+            return (account_id for account_id in account_ids
+                    if any(word.startswith(query)
+                           for word in SearchIndex.word_pattern.findall(self.joined_documents[account_id].lower())))
+
+        if mode == "regex":
+            pattern = SearchIndex.compile_pattern(query)
+            return (account_id for account_id in account_ids
+                    if any(pattern.search(value) for value in self.documents[account_id]))
+
+        # CASE: The separator is part of the text. Values have to be checked one by one
+        if SearchIndex.value_separator in query:
+            return (account_id for account_id in account_ids
+                    if any(query in value for value in self.documents[account_id]))
+
+        # One containment check per account instead of one per value
+        return (account_id for account_id in account_ids if query in self.joined_documents[account_id])
+
+    @staticmethod
+    def iter_chunks(candidates, is_cancelled=None):
+        """
+        Split candidates into chunks and check for cancellation before every chunk
+        """
+
+        candidates = iter(candidates)
+        while True:
+            chunk = list(islice(candidates, SearchIndex.cancel_check_interval))
+            if not chunk:
+                return
+
+            if is_cancelled is not None and is_cancelled():
+                raise SearchCancelled()
+
+            yield chunk
+
+    def intersect_grams(self, grams):
+        """
+        :return: Set of ids of accounts containing all trigrams
+        """
+
+        postings = []
+        for gram in grams:
+            # CASE: A trigram no account contains
+            if gram not in self.grams:
+                return set()
+            postings.append(self.grams[gram])
+
+        # Start with the rarest trigram to keep intermediate results small
+        postings.sort(key=len)
+        result = set(postings[0])
+        for account_ids in postings[1:]:
+            result &= account_ids
+            if not result:
+                break
+
+        return result
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def compile_pattern(query: str):
+        return re.compile(query)
+
+    @staticmethod
+    def get_required_literals(pattern: re.Pattern):
+        """
+        Collect runs of literal characters every match of the pattern has to contain. Only the top level sequence
+        and plain groups are inspected, anything else ends a run
+        :return: List of literal strings at least a trigram long
+        """
+
+        # Case folding of re differs from str.lower for some characters (e.g. "ſ" matches "s")
+        if pattern.flags & re.IGNORECASE:
+            return []
+
+        try:
+            parsed = regex_parser.parse(pattern.pattern, pattern.flags)
+        except Exception:
+            return []
+
+        literals = []
+        run = []
+
+        def end_run():
+            if len(run) >= SearchIndex.gram_size:
+                literals.append("".join(run))
+            run.clear()
+
+        def walk(items):
+            for op, argument in items:
+                if op == regex_parser.LITERAL:
+                    run.append(chr(argument))
+                elif op == regex_parser.SUBPATTERN and not argument[1] & re.IGNORECASE:
+                    walk(argument[-1])
+                elif op == regex_parser.AT:  # Anchors match no characters
+                    continue
+                else:
+                    end_run()
+
+        walk(parsed)
+        end_run()
+        return literals
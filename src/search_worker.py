@@ -0,0 +1,133 @@
+import threading
+import time
+from search_index import SearchCancelled
+
+
+class SearchWorker:
+    """
+    Background thread running searches for a text input. Queries are debounced, so a burst of keystrokes only
+    starts one search for the final text. A search still running for an outdated query is cancelled, and results
+    of outdated queries are never delivered.
+    """
+
+    def __init__(self, search_function, result_callback, delay: float = 0.15, dispatch=None):
+        """
+        :param search_function: Function called with the query and a function returning True once the search is
+        outdated. Should raise SearchCancelled when it notices that. Always called from the worker thread
+        :param result_callback: Function called with the query and its result
+        :param delay: Time in seconds without a new query before a search starts
+        :param dispatch: Function that runs a function on the thread owning the result callback (e.g. the Tk loop).
+        If None, the result callback is called from the worker thread
+        """
+        self.search_function = search_function
+        self.result_callback = result_callback
+        self.delay = delay
+        self.dispatch = dispatch
+
+        self.condition = threading.Condition()
+        self.pending_query = None
+        self.generation = 0  # Incremented with every query. Searches of older generations are outdated
+        self.last_submit_time = 0
+        self.closed = False
+
+        # Statistics
+        self.cancelled_searches = 0
+        self.last_duration = None
+
+        self.thread = threading.Thread(target=self.run, name="SearchWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, query: str):
+        """
+        Search for a query once no newer query arrives within the delay. Returns immediately
+        """
+
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Search worker is closed")
+
+            self.pending_query = query
+            self.generation += 1
+            self.last_submit_time = time.monotonic()
+            self.condition.notify_all()
+
+    def cancel(self):
+        """
+        Drop the pending query and outdate the running search, e.g. when the search text was cleared
+        """
+
+        with self.condition:
+            self.pending_query = None
+            self.generation += 1
+            self.condition.notify_all()
+
+    def is_outdated(self, generation):
+        return self.closed or generation != self.generation
+
+    def close(self, timeout: float = None):
+        """
+        Stop the worker thread. Results not delivered yet are dropped
+        :param timeout: Maximum time in seconds to wait for the running search to stop
+        """
+
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+        self.thread.join(timeout=timeout)
+
+    def run(self):
+        while True:
+            with self.condition:
+                # Sleep until there is something to search
+                self.condition.wait_for(lambda: self.pending_query is not None or self.closed)
+                if self.closed:
+                    return
+
+                # Debounce. Every new query restarts the delay
+                while self.pending_query is not None and not self.closed:
+                    remaining_delay = self.last_submit_time + self.delay - time.monotonic()
+                    if remaining_delay <= 0:
+                        break
+                    self.condition.wait(timeout=remaining_delay)
+
+                # CASE: Closed or cancelled while waiting
+                if self.closed or self.pending_query is None:
+                    continue
+
+                query, generation = self.pending_query, self.generation
+                self.pending_query = None
+
+            start_time = time.perf_counter()
+            try:
+                result = self.search_function(query, lambda: self.is_outdated(generation))
+            except SearchCancelled:
+                self.cancelled_searches += 1
+                continue
+            except Exception as e:
+                print(f"Search for \"{query}\" failed. {e}")
+                continue
+            self.last_duration = time.perf_counter() - start_time
+
+            self.deliver(query, result, generation)
+
+    def deliver(self, query, result, generation):
+        def call_result_callback():
+            # A newer query may have arrived while the result was on its way
+            if not self.is_outdated(generation):
+                self.result_callback(query, result)
+
+        # CASE: Outdated before dispatching
+        if self.is_outdated(generation):
+            self.cancelled_searches += 1
+            return
+
+        if self.dispatch is None:
+            call_result_callback()
+            return
+
+        try:
+            self.dispatch(call_result_callback)
+        except RuntimeError as e:
+            # The receiving loop is gone (e.g. window closed during the search)
+            print(f"Could not deliver search result. {e}")
@@ -0,0 +1,309 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from itertools import groupby
+from typing import Union
+from store import Store
+
+
+class SqliteStore(Store):
+    """
+    Keeps accounts, details, groups and settings in indexed SQLite tables. Only the requested rows are loaded,
+    every account change is a single-row statement. Detail values are stored json encoded to keep their type.
+    """
+
+    file_name = "data.sqlite"
+    backup_extension = ".sqlite"
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS infos (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS groups (group_id TEXT PRIMARY KEY, attributes TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS accounts (account_id TEXT PRIMARY KEY, group_id TEXT, account_name TEXT);
+        CREATE INDEX IF NOT EXISTS accounts_group_id ON accounts (group_id);
+        CREATE TABLE IF NOT EXISTS details (
+            account_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (account_id, name)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS details_position ON details (account_id, position);
+    """
+
+    tables = ("settings", "infos", "groups", "accounts", "details")
+
+    # Details that are mirrored into the accounts table for indexed lookups
+    indexed_details = ("group_id", "account_name")
+
+    def __init__(self, save_file_location):
+        super().__init__(save_file_location)
+        self.connection = None
+        self.settings = None  # Settings are small and read often, so they are cached
+
+        # The connection is shared between threads (e.g. the vault daemon), statements are serialized by this lock
+        self.lock = threading.RLock()
+        self.transaction_depth = 0
+
+    def connect(self):
+        """
+        Open the database connection if it is not open yet
+        """
+
+        if self.connection is None:
+            # Autocommit mode. Transactions are started explicitly in transaction()
+            self.connection = sqlite3.connect(self.file_path, isolation_level=None, check_same_thread=False)
+
+        return self.connection
+
+    """SAVE FILE"""
+
+    def validate(self, base_data: dict):
+        # sqlite3 would silently create a missing database
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"No such file: '{self.file_path}'")
+
+        with self.lock:
+            connection = self.connect()
+
+            existing_tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table in SqliteStore.tables:
+                if table not in existing_tables:
+                    raise ValueError(f"File corrupted! Table \"{table}\" missing")
+
+            existing_infos = {row[0] for row in connection.execute("SELECT key FROM infos")}
+            for key in base_data["infos"].keys():
+                if key not in existing_infos:
+                    raise ValueError(f"File corrupted! Info \"{key}\" missing")
+
+    def create(self, base_data: dict):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+            for path in (self.file_path, self.file_path + "-journal"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            self.connect().executescript(SqliteStore.schema)
+            self.import_data(base_data)
+            self.save()
+
+    def read(self, base_data: dict):
+        # Validation only looks at the schema and the infos table, so it is cheap enough to run on every read
+        self.validate(base_data)
+
+        with self.lock:
+            self.settings = None
+            self.get_settings()
+
+        return 0
+
+    def save(self):
+        with self.lock:
+            # Changes made with save_to_file=False are still in an open transaction
+            if self.connection is not None and self.connection.in_transaction and self.transaction_depth == 0:
+                with self.instrumentation.measure("commit"):
+                    self.connection.execute("COMMIT")
+
+    def backup(self, backup_file_path):
+        with self.lock:
+            # CASE: Nothing loaded (e.g. the save file failed validation). Keep the file as it is
+            if self.connection is None:
+                shutil.copyfile(self.file_path, backup_file_path)
+                return
+
+            backup_connection = sqlite3.connect(backup_file_path)
+            try:
+                self.connection.backup(backup_connection)
+            finally:
+                backup_connection.close()
+
+    def flush(self):
+        self.save()
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.save()
+                self.connection.close()
+                self.connection = None
+
+    @contextmanager
+    def transaction(self, save_to_file: bool = True):
+        """
+        Group changes into a transaction using SQLite savepoints. If an exception is raised inside the
+        transaction, the database is rolled back to the state before it started. Only the outermost transaction
+        commits. With save_to_file=False the database transaction stays open until the next save.
+        :param save_to_file: Specify if changes are committed when the transaction finishes
+        """
+
+        with self.lock:
+            connection = self.connect()
+            is_outermost = self.transaction_depth == 0
+
+            if not connection.in_transaction:
+                connection.execute("BEGIN")
+
+            savepoint = f"transaction_{self.transaction_depth}"
+            connection.execute(f"SAVEPOINT {savepoint}")
+            self.transaction_depth += 1
+
+            try:
+                yield self
+
+            except BaseException:
+                connection.execute(f"ROLLBACK TO {savepoint}")
+                connection.execute(f"RELEASE {savepoint}")
+                raise
+
+            else:
+                connection.execute(f"RELEASE {savepoint}")
+                if is_outermost and save_to_file:
+                    with self.instrumentation.measure("commit"):
+                        connection.execute("COMMIT")
+
+            finally:
+                self.transaction_depth -= 1
+
+    """IMPORT/EXPORT"""
+
+    def export_data(self):
+        with self.lock:
+            connection = self.connect()
+            return {
+                "settings": {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM settings ORDER BY rowid")},
+                "infos": {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM infos ORDER BY rowid")},
+                "accounts": dict(self.iter_accounts()),
+                "groups": self.get_groups(),
+            }
+
+    def import_data(self, data: dict):
+        with self.transaction(save_to_file=False):
+            for table in SqliteStore.tables:
+                self.connection.execute(f"DELETE FROM {table}")
+
+            self.connection.executemany("INSERT INTO settings (key, value) VALUES (?, ?)",
+                                        ((key, json.dumps(value)) for key, value in data["settings"].items()))
+            self.connection.executemany("INSERT INTO infos (key, value) VALUES (?, ?)",
+                                        ((key, json.dumps(value)) for key, value in data["infos"].items()))
+            self.connection.executemany("INSERT INTO groups (group_id, attributes) VALUES (?, ?)",
+                                        ((group_id, json.dumps(attributes)) for group_id, attributes in data["groups"].items()))
+
+            for account_id, account_details in data["accounts"].items():
+                self.insert_account(account_id, account_details)
+
+            self.settings = None
+
+    """ACCESS"""
+
+    def get_settings(self):
+        if self.settings is None:
+            with self.lock:
+                self.settings = {key: json.loads(value) for key, value in
+                                 self.connect().execute("SELECT key, value FROM settings ORDER BY rowid")}
+
+        return self.settings
+
+    def get_info(self, key):
+        with self.lock:
+            row = self.connect().execute("SELECT value FROM infos WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            raise KeyError(key)
+
+        return json.loads(row[0])
+
+    def set_info(self, key, value):
+        with self.lock:
+            self.connect().execute("INSERT INTO infos (key, value) VALUES (?, ?) "
+                                   "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+
+    def get_groups(self):
+        with self.lock:
+            return {group_id: json.loads(attributes) for group_id, attributes in
+                    self.connect().execute("SELECT group_id, attributes FROM groups ORDER BY rowid")}
+
+    def set_group(self, group_id: str, attributes: dict):
+        with self.lock:
+            self.connect().execute("INSERT INTO groups (group_id, attributes) VALUES (?, ?) "
+                                   "ON CONFLICT (group_id) DO UPDATE SET attributes = excluded.attributes",
+                                   (str(group_id), json.dumps(attributes)))
+
+    def count_accounts(self):
+        with self.lock:
+            return self.connect().execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+
+    def get_account(self, account_id: str):
+        with self.lock:
+            rows = self.connect().execute("SELECT name, value FROM details WHERE account_id = ? ORDER BY position",
+                                          (str(account_id),)).fetchall()
+
+        if not rows:
+            raise KeyError(str(account_id))
+
+        return {name: json.loads(value) for name, value in rows}
+
+    def iter_accounts(self, group_id: Union[None, str] = None):
+        query = "SELECT d.account_id, d.name, d.value FROM accounts a JOIN details d ON d.account_id = a.account_id"
+        parameters = ()
+        if group_id is not None:
+            query += " WHERE a.group_id = ?"
+            parameters = (str(group_id),)
+        query += " ORDER BY a.rowid, d.position"
+
+        with self.lock:
+            rows = self.connect().execute(query, parameters).fetchall()
+
+        for account_id, detail_rows in groupby(rows, key=lambda row: row[0]):
+            yield account_id, {name: json.loads(value) for _, name, value in detail_rows}
+
+    def insert_account(self, account_id: str, account_details: dict):
+        account_id = str(account_id)
+
+        with self.lock:
+            connection = self.connect()
+            connection.execute("INSERT INTO accounts (account_id, group_id, account_name) VALUES (?, ?, ?)",
+                               (account_id, account_details.get("group_id"), account_details.get("account_name")))
+            connection.executemany("INSERT INTO details (account_id, name, position, value) VALUES (?, ?, ?, ?)",
+                                   ((account_id, name, position, json.dumps(value))
+                                    for position, (name, value) in enumerate(account_details.items())))
+
+    def update_account(self, account_id: str, updated_parameters: dict):
+        account_id = str(account_id)
+
+        with self.lock:
+            connection = self.connect()
+
+            if connection.execute("SELECT 1 FROM accounts WHERE account_id = ?", (account_id,)).fetchone() is None:
+                raise KeyError(account_id)
+
+            for key, value in updated_parameters.items():
+                # CASE: Delete detail
+                if value is None:
+                    if connection.execute("DELETE FROM details WHERE account_id = ? AND name = ?",
+                                          (account_id, key)).rowcount == 0:
+                        raise KeyError(key)
+
+                # CASE: Update existing detail, otherwise append a new one
+                elif connection.execute("UPDATE details SET value = ? WHERE account_id = ? AND name = ?",
+                                        (json.dumps(value), account_id, key)).rowcount == 0:
+                    connection.execute("INSERT INTO details (account_id, name, position, value) VALUES "
+                                       "(?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM details WHERE account_id = ?), ?)",
+                                       (account_id, key, account_id, json.dumps(value)))
+
+                if key in SqliteStore.indexed_details:
+                    connection.execute(f"UPDATE accounts SET {key} = ? WHERE account_id = ?", (value, account_id))
+
+    def delete_account(self, account_id: str):
+        account_id = str(account_id)
+
+        with self.lock:
+            connection = self.connect()
+            if connection.execute("DELETE FROM accounts WHERE account_id = ?", (account_id,)).rowcount == 0:
+                raise KeyError(account_id)
+            connection.execute("DELETE FROM details WHERE account_id = ?", (account_id,))
@@ -0,0 +1,54 @@
+import json
+import time
+from file_utils import write_file_atomic
+
+
+class StartupProfiler:
+    """
+    Measures the phases of the application start. Every mark ends the current phase and starts the next one
+    """
+
+    def __init__(self, start_time: float = None):
+        """
+        :param start_time: time.perf_counter() value the first phase started at. Defaults to now
+        """
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.last_mark_time = self.start_time
+        self.phases = []  # Tuples of phase name and duration in seconds
+
+    def mark(self, phase_name: str):
+        """
+        End the current phase
+        :param phase_name: Name of the phase that just ended
+        """
+
+        now = time.perf_counter()
+        self.phases.append((phase_name, now - self.last_mark_time))
+        self.last_mark_time = now
+
+    def get_total_duration(self):
+        return self.last_mark_time - self.start_time
+
+    def get_phase_durations(self):
+        """
+        :return: Dictionary of phase name and duration in milliseconds
+        """
+
+        return {phase_name: duration * 1000 for phase_name, duration in self.phases}
+
+    def report(self, output_path=None):
+        """
+        Print the duration of every phase and their share of the total
+        :param output_path: If set, the durations are also written to this json file
+        """
+
+        if output_path is not None:
+            write_file_atomic(output_path, json.dumps({"phases_ms": self.get_phase_durations(),
+                                                       "total_ms": self.get_total_duration() * 1000}, indent=4))
+
+        total_duration = self.get_total_duration()
+
+        print("Startup profile:")
+        for phase_name, duration in self.phases:
+            print(f"  {phase_name:<20} {duration * 1000:>9.1f} ms {duration / max(total_duration, 1e-9) * 100:>6.1f} %")
+        print(f"  {'total':<20} {total_duration * 1000:>9.1f} ms")
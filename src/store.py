@@ -0,0 +1,145 @@
+import os
+from typing import Union
+from instrumentation import Instrumentation
+
+
+class Store:
+    """
+    Interface of the storage backends used by the DataHandler.
+    Data is laid out like the json save file: settings, infos, accounts and groups. Account and group ids are strings.
+    Changes should be made inside a transaction, which saves them when it finishes.
+    """
+
+    file_name = None
+    backup_extension = None
+
+    def __init__(self, save_file_location):
+        self.save_file_location = save_file_location
+        self.file_path = os.path.join(save_file_location, self.file_name)
+
+        # Receives timed events of writes. Replaced by the instrumentation of the DataHandler
+        self.instrumentation = Instrumentation()
+
+    """SAVE FILE"""
+
+    def validate(self, base_data: dict):
+        """
+        Check the save file. Raises an exception describing the problem if the save file can not be used
+        :param base_data: Base data structure the save file has to follow
+        """
+        raise NotImplementedError
+
+    def create(self, base_data: dict):
+        """
+        Replace the save file with a new one
+        :param base_data: Initial data structure
+        """
+        raise NotImplementedError
+
+    def read(self, base_data: dict):
+        """
+        Load the save file. The save file is validated while loading, an exception is raised if it is corrupted
+        :param base_data: Base data structure the save file has to follow
+        :return: Number of journal records replayed while loading
+        """
+        raise NotImplementedError
+
+    def save(self):
+        """
+        Write all changes to the save file
+        """
+        raise NotImplementedError
+
+    def backup(self, backup_file_path):
+        """
+        Write a copy of the current state to the given path
+        :param backup_file_path: Path of the backup file
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Make sure all changes are written to disk before returning
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Write pending changes and release all resources
+        """
+        raise NotImplementedError
+
+    def transaction(self, save_to_file: bool = True):
+        """
+        Context manager grouping changes. All changes are reverted if an exception is raised inside.
+        Transactions can be nested. Only the outermost transaction saves to file
+        :param save_to_file: Specify if changes are saved to file when the transaction finishes
+        """
+        raise NotImplementedError
+
+    """IMPORT/EXPORT"""
+
+    def export_data(self):
+        """
+        :return: Complete data structure in the json save file layout
+        """
+        raise NotImplementedError
+
+    def import_data(self, data: dict):
+        """
+        Replace all stored data
+        :param data: Data structure in the json save file layout
+        """
+        raise NotImplementedError
+
+    """ACCESS"""
+
+    def get_settings(self):
+        raise NotImplementedError
+
+    def get_info(self, key):
+        raise NotImplementedError
+
+    def set_info(self, key, value):
+        raise NotImplementedError
+
+    def get_groups(self):
+        """
+        :return: Dictionary of group id and group attributes
+        """
+        raise NotImplementedError
+
+    def set_group(self, group_id: str, attributes: dict):
+        raise NotImplementedError
+
+    def count_accounts(self):
+        raise NotImplementedError
+
+    def get_account(self, account_id: str):
+        """
+        :return: Details of the account. Raises KeyError if the account does not exist
+        """
+        raise NotImplementedError
+
+    def iter_accounts(self, group_id: Union[None, str] = None):
+        """
+        :param group_id: If set, only accounts of this group are returned
+        :return: Iterator of account id and account details in insertion order
+        """
+        raise NotImplementedError
+
+    def insert_account(self, account_id: str, account_details: dict):
+        raise NotImplementedError
+
+    def update_account(self, account_id: str, updated_parameters: dict):
+        """
+        :param updated_parameters: Details to update. Keys with None as value get deleted.
+        Raises KeyError if the account or a detail to delete does not exist
+        """
+        raise NotImplementedError
+
+    def delete_account(self, account_id: str):
+        """
+        Raises KeyError if the account does not exist
+        """
+        raise NotImplementedError
@@ -9,41 +9,68 @@ class ToolTip(object):
 
     def __init__(self, widget):
         self.widget = widget
-        self.tipwindow = None
-        self.id = None
-        self.x = self.y = 0
+        self.tipwindow = None  # Shared window of the top level window while this tooltip is shown
+        self.text = ""
 
     def showtip(self, text):
         "Display text in tooltip window"
-        self.text = text
-        if self.tipwindow or not self.text:
+        if self.tipwindow or not text:
             return
         x, y, cx, cy = self.widget.bbox("insert")
         x = x + self.widget.winfo_rootx() + 20
         y = y + cy + self.widget.winfo_rooty() + 20
-        self.tipwindow = tw = Toplevel(self.widget)
-        tw.wm_overrideredirect(1)
+        self.show_at(text, x, y)
+
+    def show_at(self, text, x, y):
+        "Display text in tooltip window at a screen position"
+        self.text = text
+        if self.tipwindow or not self.text:
+            return
+        self.tipwindow = tw = self.get_shared_window()
+        tw.owner = self
+        tw.label.configure(text=self.text)
         tw.wm_geometry("+%d+%d" % (x, y))
-        label = Label(tw, text=self.text, justify=LEFT,
-                      background="#ffffe0", relief=SOLID, borderwidth=1,
-                      font=("tahoma", "8", "normal"))
-        label.pack(ipadx=1)
+        tw.deiconify()
 
     def hidetip(self):
         tw = self.tipwindow
         self.tipwindow = None
-        if tw:
-            tw.destroy()
+        # Another tooltip may have taken over the window in the meantime
+        if tw and tw.owner is self and tw.winfo_exists():
+            tw.owner = None
+            tw.withdraw()
+
+    def get_shared_window(self):
+        """
+        One tooltip window per top level window. It is hidden instead of destroyed, so hovering creates no windows
+        """
+
+        toplevel = self.widget.winfo_toplevel()
+        tw = getattr(toplevel, "tool_tip_window", None)
+        if tw is None or not tw.winfo_exists():
+            tw = toplevel.tool_tip_window = Toplevel(toplevel)
+            tw.withdraw()
+            tw.wm_overrideredirect(1)
+            tw.owner = None
+            tw.label = Label(tw, justify=LEFT,
+                             background="#ffffe0", relief=SOLID, borderwidth=1,
+                             font=("tahoma", "8", "normal"))
+            tw.label.pack(ipadx=1)
+
+        return tw
 
 
 def create_tool_tip(widget, text):
     tool_tip = ToolTip(widget)
+    tool_tip.text = text  # Can be changed later on, e.g. when the widget gets reused
 
     def enter(event):
-        tool_tip.showtip(text)
+        tool_tip.showtip(tool_tip.text)
 
     def leave(event):
         tool_tip.hidetip()
 
     widget.bind('<Enter>', enter)
     widget.bind('<Leave>', leave)
+
+    return tool_tip
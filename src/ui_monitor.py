@@ -0,0 +1,321 @@
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+import tkinter as tk
+import traceback
+from instrumentation import Histogram, Instrumentation
+
+
+class UiMonitor:
+    """
+    Debug monitor of the Tk event loop. It has three parts:
+    - A heartbeat scheduled with after() measures how late the loop runs it (loop lag).
+    - Every Python callback Tk calls (bindings, commands, after callbacks, variable traces) is timed by name.
+    - The number of widgets is counted in every report.
+    - Timer callbacks (after()) are counted, and the timers still pending are listed in every report. An idle
+      window should have neither, as every timer wakes up the process.
+
+    A watchdog thread captures the Python stack of the main thread while a callback runs longer than the slow
+    callback threshold. The stack is reported once the callback finished.
+
+    Callbacks are timed by replacing Misc._register of tkinter, and timers are recognized by the wrapper after()
+    creates. Both are internals of tkinter, so install() checks them first and disables the monitor with a
+    warning if they do not look as expected.
+
+    Usage: monitor.install() before the widgets are created, monitor.start(root) once the root window exists
+    """
+
+    heartbeat_interval = 50  # Milliseconds
+    stall_threshold = 0.1  # Seconds of loop lag reported as stall
+    slow_callback_threshold = 0.1  # Seconds
+    report_interval = 5000  # Milliseconds between summaries
+    top_callback_count = 5  # Callbacks listed in a summary
+
+    def __init__(self, instrumentation: Instrumentation = None, show_overlay: bool = False):
+        """
+        :param instrumentation: Receives "ui_stall" and "ui_slow_callback" events. None keeps them private
+        :param show_overlay: Show the latest summary in a label in the corner of the root window
+        """
+        self.instrumentation = Instrumentation() if instrumentation is None else instrumentation
+        self.show_overlay = show_overlay
+
+        self.root = None
+        self.overlay_label = None
+        self.original_register = None
+        self.running = False
+        self.disabled = False  # Set if tkinter does not have the expected internals
+
+        """STATISTICS"""
+
+        self.loop_lag = Histogram()  # Since the start
+        self.interval_loop_lag = Histogram()  # Since the last report
+        self.callback_durations = {}  # Callback name -> Histogram
+        self.widget_count = 0
+        self.interval_timer_wakeups = 0  # after() callbacks run since the last report
+        self.pending_timer_count = 0
+        self.heartbeat_call = None
+        self.report_call = None
+
+        """WATCHDOG"""
+
+        self.main_thread_id = threading.get_ident()
+        self.active_callbacks = []  # [name, start time, captured stack] of the callbacks running, innermost last
+        self.callback_lock = threading.Lock()
+        self.watchdog_thread = None
+
+        self.next_heartbeat_time = None
+
+    """SETUP"""
+
+    @staticmethod
+    def check_tkinter():
+        """
+        :return: Description of the first tkinter internal the monitor can not use, or None if all are as expected
+        """
+
+        register = getattr(tk.Misc, "_register", None)
+        if register is None:
+            return "tkinter.Misc._register does not exist"
+
+        try:
+            parameters = list(inspect.signature(register).parameters)
+        except (TypeError, ValueError):
+            parameters = None
+        if parameters != ["self", "func", "subst", "needcleanup"]:
+            return f"tkinter.Misc._register has the unexpected parameters {parameters}"
+
+        # after() registers a wrapper function named callit that calls func
+        after_code = getattr(tk.Misc.after, "__code__", None)
+        if after_code is None or not any(inspect.iscode(constant) and constant.co_name == "callit" and
+                                         "func" in constant.co_freevars for constant in after_code.co_consts):
+            return "tkinter.Misc.after has no callit wrapper"
+
+        return None
+
+    def install(self):
+        """
+        Time every callback registered with Tk from now on. Disables the monitor if tkinter does not support it
+        """
+
+        if self.original_register is not None or self.disabled:
+            return
+
+        problem = UiMonitor.check_tkinter()
+        if problem is not None:
+            print(f"UI monitor disabled. {problem}")
+            self.disabled = True
+            return
+
+        monitor = self
+        original_register = self.original_register = tk.Misc._register
+
+        def register(widget, func, subst=None, needcleanup=1):
+            return original_register(widget, monitor.wrap_callback(func), subst, needcleanup)
+
+        tk.Misc._register = register
+
+    def uninstall(self):
+        if self.original_register is not None:
+            tk.Misc._register = self.original_register
+            self.original_register = None
+
+    def start(self, root: tk.Tk):
+        """
+        Start the heartbeat, the watchdog and the periodic reports
+        :param root: Root window
+        """
+
+        if self.disabled:
+            return
+
+        self.root = root
+        self.running = True
+        self.main_thread_id = threading.get_ident()
+
+        if self.show_overlay:
+            self.overlay_label = tk.Label(root, text="", font=("Courier", 8), bg="black", fg="white", justify="left")
+            self.overlay_label.place(relx=1, rely=1, anchor="se")
+
+        self.next_heartbeat_time = time.perf_counter() + UiMonitor.heartbeat_interval / 1000
+        self.heartbeat_call = self.root.after(UiMonitor.heartbeat_interval, self.on_heartbeat)
+        self.report_call = self.root.after(UiMonitor.report_interval, self.on_report)
+
+        self.watchdog_thread = threading.Thread(target=self.run_watchdog, name="UiWatchdog", daemon=True)
+        self.watchdog_thread.start()
+
+    def stop(self):
+        self.running = False
+        self.uninstall()
+
+    """CALLBACKS"""
+
+    @staticmethod
+    def get_callback_target(func):
+        """
+        :return: Function given to after() if func is its internal wrapper, otherwise func
+        """
+
+        code = getattr(func, "__code__", None)
+        if code is not None and code.co_name == "callit" and "func" in code.co_freevars:
+            return func.__closure__[code.co_freevars.index("func")].cell_contents
+
+        return func
+
+    @staticmethod
+    def get_callback_name(func):
+        """
+        :return: Qualified name of the callback. Lambdas also get their file and line
+        """
+
+        function = getattr(func, "__func__", func)
+        name = getattr(function, "__qualname__", None) or type(func).__name__
+
+        code = getattr(function, "__code__", None)
+        if code is not None and "<lambda>" in name:
+            name += f" ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+        return name
+
+    def wrap_callback(self, func):
+        target = UiMonitor.get_callback_target(func)
+
+        # The monitor does not measure itself
+        if getattr(target, "__self__", None) is self:
+            return func
+
+        name = UiMonitor.get_callback_name(target)
+        is_timer = target is not func
+        monitor = self
+
+        # The name of the function is used for the name of the Tcl command
+        @functools.wraps(func)
+        def timed_callback(*args):
+            if not monitor.running:
+                return func(*args)
+
+            if is_timer:
+                monitor.interval_timer_wakeups += 1
+
+            active_callback = [name, time.perf_counter(), None]
+            with monitor.callback_lock:
+                monitor.active_callbacks.append(active_callback)
+
+            try:
+                return func(*args)
+            finally:
+                duration = time.perf_counter() - active_callback[1]
+                with monitor.callback_lock:
+                    monitor.active_callbacks.remove(active_callback)
+
+                monitor.record_callback(name, duration, active_callback[2])
+
+        return timed_callback
+
+    def record_callback(self, name, duration, stack):
+        """
+        :param stack: Stack captured by the watchdog while the callback ran, or None
+        """
+
+        if name not in self.callback_durations:
+            self.callback_durations[name] = Histogram()
+        self.callback_durations[name].record(duration)
+
+        if duration >= UiMonitor.slow_callback_threshold:
+            print(f"Slow UI callback {name} took {duration * 1000:.1f} ms"
+                  f"{'. Stack while it ran:' if stack else '.'}")
+            if stack:
+                print("".join(stack), end="")
+
+            self.instrumentation.emit("ui_slow_callback", duration, callback=name, stack=stack)
+
+    """WATCHDOG"""
+
+    def run_watchdog(self):
+        while self.running:
+            time.sleep(UiMonitor.slow_callback_threshold / 4)
+
+            with self.callback_lock:
+                if not self.active_callbacks:
+                    continue
+                active_callback = self.active_callbacks[-1]
+
+            # Captured once per callback, as soon as it is slow
+            if active_callback[2] is None and time.perf_counter() - active_callback[1] >= UiMonitor.slow_callback_threshold:
+                frame = sys._current_frames().get(self.main_thread_id)
+                if frame is not None:
+                    active_callback[2] = traceback.format_stack(frame)
+
+    """HEARTBEAT"""
+
+    def on_heartbeat(self):
+        if not self.running:
+            return
+
+        now = time.perf_counter()
+        lag = max(now - self.next_heartbeat_time, 0)
+        self.loop_lag.record(lag)
+        self.interval_loop_lag.record(lag)
+
+        if lag >= UiMonitor.stall_threshold:
+            print(f"UI loop stalled for {lag * 1000:.1f} ms")
+            self.instrumentation.emit("ui_stall", lag)
+
+        self.next_heartbeat_time = now + UiMonitor.heartbeat_interval / 1000
+        self.heartbeat_call = self.root.after(UiMonitor.heartbeat_interval, self.on_heartbeat)
+
+    """REPORTS"""
+
+    @staticmethod
+    def count_widgets(widget):
+        return 1 + sum(UiMonitor.count_widgets(child) for child in widget.winfo_children())
+
+    def get_pending_timers(self):
+        """
+        :return: Ids of all after() timers and idle callbacks waiting to run
+        """
+
+        return set(self.root.tk.splitlist(self.root.tk.call("after", "info")))
+
+    def get_callback_stats(self):
+        """
+        :return: Dictionary of callback name and summary of its durations (see Histogram.get_summary), the
+        callbacks with the most total time first
+        """
+
+        callback_durations = sorted(self.callback_durations.items(), key=lambda item: item[1].total, reverse=True)
+        return {name: histogram.get_summary() for name, histogram in callback_durations}
+
+    def get_summary(self):
+        """
+        :return: One line summary of loop lag, widget count and the callbacks with the most total time
+        """
+
+        lag = self.interval_loop_lag.get_summary()
+        lag_text = f"lag p50 {lag['p50_ms']:.1f} ms, p95 {lag['p95_ms']:.1f} ms, max {lag['max_ms']:.1f} ms" \
+            if lag["count"] else "no heartbeat"
+
+        top_callbacks = list(self.get_callback_stats().items())[:UiMonitor.top_callback_count]
+        callbacks_text = ", ".join(f"{name} {stats['count']}x p95 {stats['p95_ms']:.1f} ms" for name, stats in top_callbacks)
+
+        return f"UI: {lag_text} | {self.widget_count} widgets | {self.interval_timer_wakeups} timer wakeups, " \
+               f"{self.pending_timer_count} timers pending | {callbacks_text or 'no callbacks'}"
+
+    def on_report(self):
+        if not self.running:
+            return
+
+        self.widget_count = UiMonitor.count_widgets(self.root)
+        self.pending_timer_count = len(self.get_pending_timers() - {self.heartbeat_call})
+        summary = self.get_summary()
+        print(summary)
+
+        if self.overlay_label is not None:
+            self.overlay_label.configure(text=summary.replace(" | ", "\n"))
+            self.overlay_label.lift()
+
+        self.interval_loop_lag = Histogram()
+        self.interval_timer_wakeups = 0
+        self.report_call = self.root.after(UiMonitor.report_interval, self.on_report)
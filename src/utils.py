@@ -1,27 +1,28 @@
-from PIL import Image
 import tkinter as tk
 
 
-def change_icon_color(img_obj, target_color, tk_controller):
+def change_icon_color(img_obj, target_color, tk_controller=None):
+    """
+    Fill an icon with a single color and keep its transparency
+    :param img_obj: PIL image of the icon
+    :param target_color: Tk color name or hex string, or rgb tuple. Color names need the tk controller
+    :param tk_controller: Any Tk widget, used to convert color names to rgb
+    :return: New RGBA image
+    """
+
+    from PIL import Image  # Not needed for color conversion. Imported here to keep importing this module cheap
 
     # Convert color to rgb
-    target_color = convert_tk_col_to_rgb(target_color, tk_controller)
+    if isinstance(target_color, str):
+        target_color = convert_tk_col_to_rgb(target_color, tk_controller)
 
     img_obj = img_obj.convert('RGBA')  # Open the source image and convert it to RGBA mode
-    data = img_obj.getdata()  # Load the image data into a list
-
-    # Create a new data list
-    new_data = []
-
-    # Replace black color with the desired target color
-    for item in data:
-        # Change all black (also shades of blacks) pixels to the target color
-        new_data.append((target_color[0], target_color[1], target_color[2], item[3]))
 
-    # Update image data
-    img_obj.putdata(new_data)
+    # Every pixel gets the target color with its original alpha value. Done on whole channels instead of per pixel
+    colored_img = Image.new('RGBA', img_obj.size, tuple(target_color[:3]) + (255,))
+    colored_img.putalpha(img_obj.getchannel('A'))
 
-    return img_obj
+    return colored_img
 
 
 def convert_tk_col_to_rgb(tk_color, tk_controller):
@@ -0,0 +1,424 @@
+"""
+Resident process owning a single DataHandler. The save file is read and the search index is built once, and
+clients (GUI, command line tool) get and change accounts over a Unix domain socket next to the save file.
+
+    python -m src.vault_daemon [--data <folder>]
+
+The protocol is JSON-RPC 2.0 with one json object per line. Requests of all clients are executed one at a
+time, so every client sees the changes of the others in the order they were made.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from datetime import datetime
+from typing import Union
+
+# The modules import each other by name, so the src folder has to be on the path (e.g. for python -m src.vault_daemon)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data_handler import DataHandler  # noqa: E402
+from instrumentation import Instrumentation, JsonLinesSink  # noqa: E402
+
+socket_file_name = "vault.sock"
+default_save_file_location = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+NOT_FOUND = -32001  # KeyError of the data handler, e.g. unknown account id
+
+
+def is_supported():
+    # Windows builds of Python have no Unix domain sockets
+    return hasattr(socket, "AF_UNIX")
+
+
+def get_socket_path(save_file_location):
+    return os.path.join(save_file_location, socket_file_name)
+
+
+class VaultError(Exception):
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class VaultServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves the methods of a DataHandler to clients connected to a Unix domain socket. Every client connection
+    gets its own thread, while the data handler is only used by one request at a time.
+    """
+
+    daemon_threads = True
+
+    # Data handler methods clients may call. Results are converted to json by convert_result
+    exposed_methods = (
+        "get_settings", "get_detail_attributes", "get_groups", "get_account_details", "get_accounts",
+        "get_account_count", "search",
+        "add_account", "delete_account", "update_account", "add_group", "set_group_collapsed", "flush",
+        "create_backup", "list_backups", "restore_backup", "prune_backups",
+    )
+    mutating_methods = ("add_account", "delete_account", "update_account", "add_group", "set_group_collapsed",
+                        "restore_backup")
+
+    def __init__(self, data_handler: DataHandler, socket_path):
+        """
+        :param data_handler: Data handler owning the save file. Only used through the server afterwards
+        :param socket_path: Path of the socket file. A stale file of a daemon that is not running is replaced
+        """
+        self.data_handler = data_handler
+        self.socket_path = socket_path
+
+        self.request_lock = threading.Lock()
+        self.version = 0  # Incremented with every successful change, so clients can tell their view is outdated
+
+        if os.path.exists(socket_path):
+            if VaultClient.is_running(socket_path):
+                raise RuntimeError(f"A vault daemon is already listening on {socket_path}")
+            os.unlink(socket_path)
+
+        super().__init__(socket_path, VaultRequestHandler)
+
+        # The socket gives access to all accounts. Only the owner may connect
+        os.chmod(socket_path, 0o600)
+
+    def call(self, method, params):
+        """
+        Execute a request
+        :param method: Name of the method
+        :param params: List of positional or dictionary of keyword parameters
+        :return: Result converted to json compatible types
+        """
+
+        if method == "ping":
+            return {"pid": os.getpid(), "version": self.version}
+
+        # Duration summaries of the save file operations since the start
+        if method == "get_stats":
+            return self.data_handler.instrumentation.get_summaries()
+
+        if method not in VaultServer.exposed_methods:
+            raise VaultError(METHOD_NOT_FOUND, f"Method \"{method}\" not found")
+
+        args, kwargs = (params, {}) if isinstance(params, list) else ([], params)
+        with self.request_lock:
+            try:
+                result = getattr(self.data_handler, method)(*args, **kwargs)
+            except TypeError as e:
+                raise VaultError(INVALID_PARAMS, str(e))
+            except KeyError as e:
+                raise VaultError(NOT_FOUND, f"Not found: {e}")
+
+            # The data handler reports failed changes with False
+            if method in VaultServer.mutating_methods and result:
+                self.version += 1
+
+            return self.convert_result(method, result)
+
+    @staticmethod
+    def convert_result(method, result):
+        if method == "get_accounts":
+            return [[account_id, account_details] for account_id, account_details in result]
+
+        # Sorted by id, so the same state always gives the same response
+        if method == "search":
+            return sorted(result, key=lambda account_id: (len(account_id), account_id))
+
+        return result
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class VaultRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one client connection. Each line is a request, answered with one line
+    """
+
+    def setup(self):
+        super().setup()
+        self.shutdown_requested = False
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            response = self.handle_request(line)
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+
+            if self.shutdown_requested:
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+    def handle_request(self, line):
+        """
+        :return: Response object or None for notifications (requests without id)
+        """
+
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": f"Parse error. {e}"}}
+
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str) or \
+                not isinstance(request.get("params", []), (list, dict)):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "Invalid request"}}
+
+        request_id = request.get("id")
+        try:
+            # CASE: Shutdown. Answered before the server stops
+            if request["method"] == "shutdown":
+                self.shutdown_requested = True
+                result = None
+            else:
+                result = self.server.call(request["method"], request.get("params", []))
+
+        except VaultError as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": str(e)}}
+
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": SERVER_ERROR, "message": str(e)}}
+
+        if "id" not in request:
+            return None
+
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+class VaultClient:
+    """
+    Connection to a vault daemon with the access methods of a DataHandler, so it can be used in its place.
+    Thread safe, requests of several threads are sent one after the other.
+    """
+
+    def __init__(self, socket_path, timeout: float = 10):
+        """
+        :param socket_path: Path of the socket file of the daemon
+        :param timeout: Time in seconds to wait for a response
+        """
+        self.socket_path = socket_path
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(socket_path)
+        self.stream = self.socket.makefile("rwb")
+
+        self.lock = threading.Lock()
+        self.next_request_id = 0
+
+    @staticmethod
+    def is_running(socket_path):
+        """
+        :return: True if a daemon answers on the socket
+        """
+
+        try:
+            client = VaultClient(socket_path, timeout=1)
+        except OSError:
+            return False
+
+        try:
+            client.call("ping")
+            return True
+        except (OSError, VaultError):
+            return False
+        finally:
+            client.close()
+
+    def call(self, method, *args, **kwargs):
+        """
+        Execute a method of the data handler in the daemon
+        :return: Result of the method
+        """
+
+        if args and kwargs:
+            raise ValueError("Use either positional or keyword parameters")
+
+        with self.lock:
+            self.next_request_id += 1
+            request = {"jsonrpc": "2.0", "id": self.next_request_id, "method": method, "params": kwargs or list(args)}
+
+            self.stream.write(json.dumps(request).encode() + b"\n")
+            self.stream.flush()
+
+            line = self.stream.readline()
+            if not line:
+                raise ConnectionError("Vault daemon closed the connection")
+
+        response = json.loads(line)
+        if "error" in response:
+            # CASE: Unknown account or group. Raised like the data handler does
+            if response["error"]["code"] == NOT_FOUND:
+                raise KeyError(response["error"]["message"])
+            raise VaultError(response["error"]["code"], response["error"]["message"])
+
+        return response["result"]
+
+    def close(self):
+        """
+        Close the connection. The daemon keeps running
+        """
+
+        try:
+            self.stream.close()
+        finally:
+            self.socket.close()
+
+    def shutdown_daemon(self):
+        self.call("shutdown")
+
+    """DATA HANDLER METHODS"""
+
+    def flush(self):
+        self.call("flush")
+
+    def add_account(self, account_details: dict, account_name: str, group_id: Union[None, int, str] = None, save_to_file=True):
+        return self.call("add_account", account_details=account_details, account_name=account_name, group_id=group_id,
+                         save_to_file=save_to_file)
+
+    def delete_account(self, account_id, save_to_file=True):
+        return self.call("delete_account", account_id=account_id, save_to_file=save_to_file)
+
+    def update_account(self, account_id: Union[int, str], updated_parameters: dict, save_to_file: bool = True):
+        return self.call("update_account", account_id=account_id, updated_parameters=updated_parameters,
+                         save_to_file=save_to_file)
+
+    def add_group(self, name, save_to_file: bool = True):
+        return self.call("add_group", name=name, save_to_file=save_to_file)
+
+    def set_group_collapsed(self, group_id: Union[int, str], collapsed: bool, save_to_file: bool = True):
+        return self.call("set_group_collapsed", group_id=group_id, collapsed=collapsed, save_to_file=save_to_file)
+
+    def create_backup(self, label: str = "", apply_retention: bool = True):
+        return self.call("create_backup", label=label, apply_retention=apply_retention)
+
+    def list_backups(self):
+        return self.call("list_backups")
+
+    def restore_backup(self, backup_name: str = None, point_in_time: Union[None, str, datetime] = None):
+        if isinstance(point_in_time, datetime):
+            point_in_time = point_in_time.isoformat()
+        return self.call("restore_backup", backup_name=backup_name, point_in_time=point_in_time)
+
+    def prune_backups(self):
+        return self.call("prune_backups")
+
+    def search(self, query: str, prefix: bool = False, is_cancelled=None):
+        # A search in the daemon can not be cancelled. Outdated results are dropped by the caller as usual
+        return set(self.call("search", query=query, prefix=prefix))
+
+    def get_settings(self):
+        return self.call("get_settings")
+
+    def get_detail_attributes(self):
+        return self.call("get_detail_attributes")
+
+    def get_groups(self):
+        return self.call("get_groups")
+
+    def get_account_details(self, account_id):
+        return self.call("get_account_details", account_id=account_id)
+
+    def get_accounts(self, group_id: Union[None, int, str] = None):
+        return iter([(account_id, account_details) for account_id, account_details in self.call("get_accounts", group_id=group_id)])
+
+    def get_account_count(self):
+        return self.call("get_account_count")
+
+    def get_version(self):
+        """
+        :return: Number of changes made through the daemon since it started
+        """
+
+        return self.call("ping")["version"]
+
+    def get_stats(self):
+        """
+        :return: Dictionary of operation name and summary of its durations in the daemon (see Histogram.get_summary)
+        """
+
+        return self.call("get_stats")
+
+
+def connect_or_open(save_file_location, **data_handler_options):
+    """
+    Connect to the daemon of the save file if one is running, otherwise open the save file directly
+    :param save_file_location: Folder of the save file
+    :param data_handler_options: Parameters of the DataHandler, used if no daemon is running
+    :return: VaultClient or DataHandler
+    """
+
+    socket_path = get_socket_path(save_file_location)
+    if is_supported() and os.path.exists(socket_path):
+        try:
+            client = VaultClient(socket_path)
+            client.call("ping")
+            print(f"Connected to vault daemon at {socket_path}.")
+            return client
+        except (OSError, VaultError):
+            pass
+
+    return DataHandler(save_file_location=save_file_location, **data_handler_options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.vault_daemon", description="Keep the save file open for clients")
+    parser.add_argument("--data", default=default_save_file_location, help="Folder of the save file")
+    parser.add_argument("--backend", default="json", choices=sorted(DataHandler.storage_backends),
+                        help="Storage backend of the save file")
+    parser.add_argument("--event-log", help="Append timed events of save file operations to this json lines file")
+    args = parser.parse_args(argv)
+
+    if not is_supported():
+        print("Vault daemon not available. Unix domain sockets are not supported on this platform.")
+        return 2
+
+    instrumentation = Instrumentation(sinks=[JsonLinesSink(args.event_log)] if args.event_log is not None else [])
+    data_handler = DataHandler(save_file_location=args.data, storage_backend=args.backend, instrumentation=instrumentation,
+                               **({"use_journal": True, "write_behind_interval": 0.5} if args.backend == "json" else {}))
+
+    # Built now, so the first search of a client is as fast as the following ones
+    data_handler.build_search_index()
+
+    try:
+        server = VaultServer(data_handler, get_socket_path(args.data))
+    except Exception as e:
+        print(f"Failed to start vault daemon. {e}")
+        data_handler.close()
+        instrumentation.close()
+        return 2
+
+    # Stop cleanly on kill as well
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+
+    print(f"Vault daemon listening on {server.socket_path}.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Stopping vault daemon...", end="")
+        server.server_close()
+        data_handler.close()
+        instrumentation.close()
+        print("done.")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
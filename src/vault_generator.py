@@ -0,0 +1,193 @@
+"""
+Generates save files with realistic accounts for tests and benchmarks. The same seed and size always give the
+same file. Accounts are streamed to disk, so vaults of a million accounts need little memory.
+
+    python vault_generator.py <folder> --accounts 100000 [--seed 0] [--groups 500]
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+from file_utils import open_file_atomic
+
+
+class VaultGenerator:
+    """
+    Seeded source of groups and accounts in the save file layout. Accounts have a varying number of details,
+    including multi line addresses and notes and detail names without display settings (unknown details)
+    """
+
+    words = ["cat", "secret", "football", "mystery", "travel", "coding", "adventure", "music", "art", "science",
+             "river", "orange", "window", "falcon", "copper", "garden", "winter", "rocket", "pixel", "harbor"]
+    first_names = ["Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Hannah", "Jonas", "Lena", "Lukas",
+                   "Marie", "Noah", "Sophie", "Tim", "Zoë", "Jürgen", "Renée", "Søren", "Łukasz"]
+    last_names = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Hoffmann",
+                  "Smith", "Johnson", "Brown", "García", "Rossi", "Dubois", "Nowak", "Andersson", "O'Brien"]
+    providers = ["google", "amazon", "twitter", "aws", "reddit", "ikea", "microsoft", "apple", "netflix", "spotify",
+                 "github", "gitlab", "paypal", "ebay", "steam", "dropbox", "slack", "zoom", "adobe", "booking"]
+    domains = ["com", "de", "net", "org", "io", "co.uk"]
+    cities = [("10115", "Berlin", "Germany"), ("80331", "München", "Germany"), ("20095", "Hamburg", "Germany"),
+              ("1010", "Wien", "Austria"), ("8001", "Zürich", "Switzerland"), ("75001", "Paris", "France"),
+              ("SW1A 1AA", "London", "United Kingdom"), ("10001", "New York", "USA")]
+    streets = ["Hauptstraße", "Bahnhofstraße", "Gartenweg", "Main Street", "Rue de Rivoli", "Park Lane"]
+    group_names = ["Emails", "Services", "Shopping", "Banking", "Work", "Gaming", "Social", "Travel", "Streaming",
+                   "Development", "Family", "Utilities", "Health", "Education", "Archive"]
+
+    # Details without display settings in the base data structure. Shown as unknown details
+    unknown_details = ["username", "pin", "security_question", "recovery_codes", "notes", "url", "customer_number"]
+
+    def __init__(self, seed: int = 0, group_count: int = 15):
+        """
+        :param seed: Seed of the random generator
+        :param group_count: Number of groups the accounts are spread over
+        """
+        self.seed = seed
+        self.group_count = group_count
+
+    def iter_groups(self):
+        """
+        :return: Iterator of group id and group attributes
+        """
+
+        for group_index in range(self.group_count):
+            name = VaultGenerator.group_names[group_index % len(VaultGenerator.group_names)]
+            if group_index >= len(VaultGenerator.group_names):
+                name += f" {group_index // len(VaultGenerator.group_names) + 1}"
+
+            yield str(group_index), {"name": name, "collapsed": False}
+
+    def iter_accounts(self, account_count: int):
+        """
+        :param account_count: Number of accounts
+        :return: Iterator of account id and account details
+        """
+
+        # Separate generator, so every call yields the same accounts
+        rng = random.Random(self.seed)
+
+        for account_index in range(account_count):
+            account_details = {"primary_email": self.random_mail(rng), "password": self.random_password(rng)}
+
+            if rng.random() < 0.3:
+                account_details["address"] = self.random_address(rng)
+            if rng.random() < 0.2:
+                account_details["phone"] = rng.randint(100000000, 999999999)
+
+            # A few accounts have many details
+            for detail in rng.sample(VaultGenerator.unknown_details, k=min(int(rng.expovariate(1.5)),
+                                                                               len(VaultGenerator.unknown_details))):
+                account_details[detail] = self.random_unknown_detail(rng, detail)
+
+            # Meta details
+            account_details["group_id"] = str(self.pick_group(rng))
+            account_details["account_name"] = rng.choice(VaultGenerator.providers).capitalize()
+            account_details["account_id"] = str(account_index)
+
+            yield str(account_index), account_details
+
+    def pick_group(self, rng: random.Random):
+        # Some groups are much larger than others
+        return min(int(rng.paretovariate(1.2)) - 1, self.group_count - 1)
+
+    @staticmethod
+    def random_mail(rng: random.Random):
+        name = rng.choice(".-_").join(rng.choice(VaultGenerator.words) for _ in range(rng.randint(1, 3)))
+        return f"{name}{rng.randint(0, 999) if rng.random() < 0.5 else ''}@{rng.choice(VaultGenerator.providers)}" \
+               f".{rng.choice(VaultGenerator.domains)}"
+
+    @staticmethod
+    def random_password(rng: random.Random):
+        # CASE: Generated by a password manager
+        if rng.random() < 0.5:
+            return "".join(rng.choice(string.ascii_letters + string.digits + "!$%&*#+-_") for _ in range(rng.randint(12, 32)))
+
+        return str(rng.randint(0, 99)).join(rng.choice(VaultGenerator.words) for _ in range(rng.randint(2, 4)))
+
+    @staticmethod
+    def random_address(rng: random.Random):
+        postal_code, city, country = rng.choice(VaultGenerator.cities)
+        return f"{rng.choice(VaultGenerator.first_names)} {rng.choice(VaultGenerator.last_names)}\n" \
+               f"{rng.choice(VaultGenerator.streets)} {rng.randint(1, 200)}\n{postal_code} {city}\n{country}"
+
+    @staticmethod
+    def random_unknown_detail(rng: random.Random, detail):
+        if detail == "pin":
+            return str(rng.randint(0, 9999)).zfill(4)
+        if detail == "recovery_codes":
+            return "\n".join(f"{rng.randint(0, 99999):05d}-{rng.randint(0, 99999):05d}" for _ in range(8))
+        if detail == "notes":
+            return "\n".join(" ".join(rng.choice(VaultGenerator.words) for _ in range(rng.randint(3, 12)))
+                             for _ in range(rng.randint(1, 4)))
+        if detail == "url":
+            return f"https://www.{rng.choice(VaultGenerator.providers)}.{rng.choice(VaultGenerator.domains)}/login"
+        if detail == "customer_number":
+            return rng.randint(10 ** 5, 10 ** 10)
+
+        return rng.choice(VaultGenerator.words) + str(rng.randint(0, 9999))
+
+    def write_save_file(self, file_path, account_count: int, base_data: dict):
+        """
+        Write a json save file laid out like the save files of the JsonStore (indented by 4)
+        :param file_path: Path of the save file
+        :param account_count: Number of accounts
+        :param base_data: Base data structure, its settings are used
+        """
+
+        def indent(json_text, level):
+            # Line breaks in strings are escaped, so every line break is part of the layout
+            return json_text.replace("\n", "\n" + "    " * level)
+
+        root_values = {
+            "settings": base_data["settings"],
+            "infos": {"next_id": account_count, "next_group_id": self.group_count},
+            "accounts": None,  # Streamed
+            "groups": dict(self.iter_groups()),
+        }
+
+        with open_file_atomic(file_path) as save_file:
+            save_file.write("{")
+            for root_index, (key, value) in enumerate(root_values.items()):
+                save_file.write(("," if root_index else "") + f"\n    {json.dumps(key)}: ")
+
+                if key != "accounts":
+                    save_file.write(indent(json.dumps(value, indent=4), 1))
+                    continue
+
+                if not account_count:
+                    save_file.write("{}")
+                    continue
+
+                save_file.write("{")
+                for account_index, (account_id, account_details) in enumerate(self.iter_accounts(account_count)):
+                    save_file.write(("," if account_index else "") +
+                                    f"\n        {json.dumps(account_id)}: {indent(json.dumps(account_details, indent=4), 2)}")
+                save_file.write("\n    }")
+
+            save_file.write("\n}")
+
+
+def main(argv=None):
+    # Imported here, so the generator itself does not depend on the data handler
+    from data_handler import DataHandler
+
+    parser = argparse.ArgumentParser(description="Generate a save file with random accounts")
+    parser.add_argument("folder", help="Folder of the save file")
+    parser.add_argument("--accounts", type=int, default=1000, help="Number of accounts")
+    parser.add_argument("--groups", type=int, default=15, help="Number of groups")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.folder, exist_ok=True)
+    file_path = os.path.join(args.folder, "data.json")
+
+    print(f"Generating {args.accounts} accounts in {file_path}...", end="")
+    VaultGenerator(seed=args.seed, group_count=args.groups).write_save_file(file_path, args.accounts,
+                                                                             DataHandler.base_data_structure)
+    print(f"done -> {os.path.getsize(file_path) / 1e6:.1f} MB written.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import os
+from backup_repository import BackupRepository
+
+
+def test_chunk_deleted_by_other_repository_is_written_again(tmp_path):
+    repository = BackupRepository(str(tmp_path))
+    other_repository = BackupRepository(str(tmp_path))  # E.g. the repository of another process
+
+    name, _, _ = repository.create_backup({"settings": {}}, [("0", {"password": "old"})])
+    other_repository.apply_retention(keep_last=0)
+    other_repository.collect_garbage()
+
+    # The chunks are still listed by the first repository, but have to be written again
+    name, record_count, written_bytes = repository.create_backup({"settings": {}}, [("0", {"password": "old"})])
+    assert written_bytes > 0
+    assert repository.restore(name)["accounts"] == {"0": {"password": "old"}}
+
+
+def test_collect_garbage_sees_chunks_of_other_repository(tmp_path):
+    repository = BackupRepository(str(tmp_path))
+    repository.create_backup({"settings": {}}, [])
+    repository.apply_retention(keep_last=0)
+
+    other_repository = BackupRepository(str(tmp_path))
+    other_repository.create_backup({"settings": {"changed": True}}, [])
+    other_repository.apply_retention(keep_last=0)
+
+    deleted_chunks, _ = repository.collect_garbage()
+    assert deleted_chunks > 0
+    assert not any(files for _, _, files in os.walk(repository.chunk_folder))
@@ -0,0 +1,60 @@
+import threading
+from clipboard import ClipboardService
+
+
+class FakeClipboardBackend:
+
+    def __init__(self):
+        self.text = None
+        self.cleared = threading.Event()
+
+    def set_text(self, text: str):
+        self.text = text
+
+    def get_text(self):
+        return self.text
+
+    def clear(self):
+        self.text = ""
+        self.cleared.set()
+
+
+def test_cleared_after_timeout():
+    backend = FakeClipboardBackend()
+    service = ClipboardService(backend, clear_after=0.05)
+
+    service.copy("secret")
+    assert backend.text == "secret"
+
+    assert backend.cleared.wait(timeout=5)
+    assert backend.text == ""
+
+
+def test_kept_if_clipboard_changed():
+    backend = FakeClipboardBackend()
+    service = ClipboardService(backend, clear_after=0.05)
+
+    service.copy("secret")
+    clear_timer = service.clear_timer
+    backend.text = "copied by another program"
+
+    clear_timer.join(timeout=5)
+    assert not backend.cleared.is_set()
+    assert backend.text == "copied by another program"
+
+
+def test_newer_copy_not_cleared_by_older_timer():
+    backend = FakeClipboardBackend()
+    service = ClipboardService(backend, clear_after=0.05)
+    dispatched = []
+    service.dispatch = dispatched.append
+
+    service.copy("first")
+    first_generation = service.copy_generation
+    service.copy("second", clear_after=0)
+
+    # The clear of the first copy arrives after the second copy
+    service.on_clear_timer(first_generation)
+    dispatched.pop()()
+
+    assert backend.text == "second"
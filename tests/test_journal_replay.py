@@ -0,0 +1,91 @@
+"""
+Journals left behind by a crash, i.e. without close() compacting them into the save file
+"""
+
+import json
+import os
+import pytest
+import json_store
+from data_handler import DataHandler
+
+
+def open_data_handler(save_file_location):
+    return DataHandler(str(save_file_location), use_journal=True)
+
+
+def write_journal(save_file_location, records, tail=""):
+    with open(os.path.join(save_file_location, "data.journal"), "a") as journal_file:
+        journal_file.write("".join(json.dumps(record) + "\n" for record in records) + tail)
+
+
+def test_replay_after_crash(tmp_path):
+    dh = open_data_handler(tmp_path)
+    account_id = dh.add_account({"password": "first"}, account_name="Account")
+    dh.update_account(account_id, {"password": "second"})
+    # No close(). The changes are only in the journal
+
+    dh = open_data_handler(tmp_path)
+    assert dh.get_account_details(account_id)["password"] == "second"
+    dh.close()
+
+
+def test_torn_last_line(tmp_path):
+    dh = open_data_handler(tmp_path)
+    account_id = dh.add_account({"password": "first"}, account_name="Account")
+
+    # Crash in the middle of the next append
+    with open(os.path.join(tmp_path, "data.journal"), "a") as journal_file:
+        journal_file.write('{"op": "set", "path": ["accounts", "' + account_id + '", "password"], "val')
+
+    dh = open_data_handler(tmp_path)
+    assert dh.get_account_details(account_id)["password"] == "first"
+    dh.close()
+
+
+def test_records_in_snapshot_are_skipped(tmp_path):
+    dh = open_data_handler(tmp_path)
+    account_id = dh.add_account({"password": "first"}, account_name="Account")
+    dh.store.write_snapshot()
+    dh.close()
+
+    with open(os.path.join(tmp_path, "data.json")) as save_file:
+        journal_sequence = json.load(save_file)["infos"]["journal_sequence"]
+    assert journal_sequence > 0
+
+    # Left over from an interrupted compaction: records the snapshot contains, followed by newer ones
+    account_path = ["accounts", account_id]
+    write_journal(tmp_path, [
+        {"op": "set", "path": account_path + ["password"], "value": "old", "seq": journal_sequence - 1},
+        {"op": "delete", "path": account_path, "seq": journal_sequence},
+        {"op": "set", "path": account_path + ["password"], "value": "new", "seq": journal_sequence + 1},
+        {"op": "set", "path": ["accounts", "missing", "password"], "value": "x", "seq": journal_sequence + 2},
+    ])
+
+    dh = open_data_handler(tmp_path)
+    assert dh.get_account_count() == 1
+    assert dh.get_account_details(account_id)["password"] == "new"
+
+    # Later records continue after the replayed ones
+    assert dh.store.journal_sequence == journal_sequence + 2
+    dh.close()
+
+
+def test_failed_snapshot_keeps_pending_records(tmp_path, monkeypatch):
+    dh = open_data_handler(tmp_path)
+    account_id = dh.add_account({"password": "first"}, account_name="Account", save_to_file=False)
+
+    def fail(file_path, content):
+        raise OSError("Disk full")
+
+    monkeypatch.setattr(json_store, "write_file_atomic", fail)
+    with pytest.raises(OSError):
+        dh.store.write_snapshot()
+    monkeypatch.undo()
+
+    # The records were neither in the journal nor in the save file yet
+    assert dh.store.pending_records
+    dh.store.flush()
+
+    dh = open_data_handler(tmp_path)
+    assert dh.get_account_details(account_id)["password"] == "first"
+    dh.close()
@@ -0,0 +1,111 @@
+import copy
+import json
+import os
+import pytest
+from data_handler import DataHandler
+from save_file_loader import SaveFileLoader, SaveFileError
+
+
+def create_valid_data():
+    data = copy.deepcopy(DataHandler.base_data_structure)
+    data["infos"].update(next_id=2, next_group_id=1)
+    data["groups"]["0"] = {"name": "Group", "collapsed": False}
+    for account_id in ("0", "1"):
+        data["accounts"][account_id] = {"password": "secret", "group_id": "0", "account_name": f"Account {account_id}",
+                                        "account_id": account_id}
+    return data
+
+
+def remove_account_id(data):
+    del data["accounts"]["1"]["account_id"]
+
+
+def mismatch_account_id(data):
+    data["accounts"]["1"]["account_id"] = "0"
+
+
+def remove_group_id(data):
+    del data["accounts"]["1"]["group_id"]
+
+
+def number_group_id(data):
+    data["accounts"]["1"]["group_id"] = 0
+
+
+def text_collapsed(data):
+    data["groups"]["0"]["collapsed"] = "yes"
+
+
+def number_collapsed(data):
+    data["groups"]["0"]["collapsed"] = 1
+
+
+def lower_next_id(data):
+    data["infos"]["next_id"] = 1
+
+
+def lower_next_group_id(data):
+    data["infos"]["next_group_id"] = 0
+
+
+# Name of the broken input and function breaking valid data
+invalid_data = {function.__name__: function for function in (
+    remove_account_id, mismatch_account_id, remove_group_id, number_group_id, text_collapsed, number_collapsed,
+    lower_next_id, lower_next_group_id)}
+
+
+def create_invalid_texts():
+    texts = {}
+    for name, break_data in invalid_data.items():
+        data = create_valid_data()
+        break_data(data)
+        texts[name] = json.dumps(data, indent=4)
+
+    # Valid content followed by more data, e.g. two save files written into one
+    texts["trailing_data"] = json.dumps(create_valid_data(), indent=4) + "\n{}"
+    return texts
+
+
+invalid_texts = create_invalid_texts()
+
+
+def test_valid_data_is_accepted():
+    SaveFileLoader(json.dumps(create_valid_data(), indent=4), DataHandler.base_data_structure).load()
+
+
+@pytest.mark.parametrize("name", sorted(invalid_texts))
+def test_loader_rejects(name):
+    with pytest.raises(SaveFileError):
+        SaveFileLoader(invalid_texts[name], DataHandler.base_data_structure).load()
+
+
+@pytest.mark.parametrize("name", sorted(invalid_texts))
+def test_invalid_save_file_is_backed_up(tmp_path, name):
+    save_file_path = os.path.join(tmp_path, "data.json")
+    with open(save_file_path, "w") as save_file:
+        save_file.write(invalid_texts[name])
+
+    dh = DataHandler(str(tmp_path))
+    dh.close()
+
+    # The broken file is kept unchanged in the backup folder before a new save file replaces it
+    backup_folder = os.path.join(tmp_path, DataHandler.backup_folder_name)
+    backups = [file_name for file_name in os.listdir(backup_folder) if file_name.endswith(".json")]
+    assert len(backups) == 1 and backups[0].startswith("BACKUP_FAILED_VALIDATION_")
+    with open(os.path.join(backup_folder, backups[0])) as backup_file:
+        assert backup_file.read() == invalid_texts[name]
+
+
+def test_invalid_save_file_is_not_overwritten_without_backup(tmp_path):
+    save_file_path = os.path.join(tmp_path, "data.json")
+    with open(save_file_path, "w") as save_file:
+        save_file.write(invalid_texts["mismatch_account_id"])
+
+    # A file where the backup folder belongs makes the backup fail
+    open(os.path.join(tmp_path, DataHandler.backup_folder_name), "w").close()
+
+    with pytest.raises(RuntimeError):
+        DataHandler(str(tmp_path))
+
+    with open(save_file_path) as save_file:
+        assert save_file.read() == invalid_texts["mismatch_account_id"]
@@ -0,0 +1,41 @@
+import pytest
+from data_handler import DataHandler
+from search_index import SearchCancelled
+
+
+@pytest.fixture
+def data_handler(tmp_path):
+    dh = DataHandler(str(tmp_path))
+    for i in range(5):
+        dh.add_account({"password": f"password_{i}"}, account_name=f"Account {i}", save_to_file=False)
+
+    yield dh
+    dh.close()
+
+
+def test_changes_while_building_are_applied(data_handler):
+    iter_accounts = data_handler.store.iter_accounts
+
+    # Changes an account after the build read it
+    def iter_accounts_and_change(group_id=None):
+        for account_number, account in enumerate(iter_accounts(group_id)):
+            yield account
+            if account_number == 1:
+                data_handler.update_account("0", {"password": "changed_while_building"})
+                data_handler.delete_account("1")
+
+    data_handler.store.iter_accounts = iter_accounts_and_change
+    data_handler.build_search_index()
+    data_handler.store.iter_accounts = iter_accounts
+
+    assert data_handler.search("changed_while_building") == {"0"}
+    assert data_handler.search("password_") == {"2", "3", "4"}
+
+
+def test_cancelled_build(data_handler):
+    with pytest.raises(SearchCancelled):
+        data_handler.search("password", is_cancelled=lambda: True)
+
+    # Nothing half built is kept
+    assert data_handler.search_index is None
+    assert data_handler.search("password_3") == {"3"}
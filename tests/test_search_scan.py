@@ -0,0 +1,20 @@
+import random
+import pytest
+from search_index import SearchIndex
+
+
+@pytest.fixture(scope="module")
+def accounts():
+    generator = random.Random(1)
+    return [(str(account_id), {"name": "".join(generator.choice("abcXY z.") for _ in range(12)), "number": account_id})
+            for account_id in range(3000)]
+
+
+@pytest.mark.parametrize("query", ["ab", "XY", "a.c", "^ab", "z", "", "b c", "7", "x\x00"])
+@pytest.mark.parametrize("prefix", [False, True])
+def test_scan_finds_the_same_accounts_as_the_index(accounts, query, prefix):
+    search_index = SearchIndex()
+    search_index.rebuild(accounts)
+    expected = search_index.search_prefix(query) if prefix else search_index.search(query)
+
+    assert SearchIndex.scan(accounts, query, prefix) == expected
@@ -0,0 +1,143 @@
+"""
+Runs the same operations against every storage backend and compares the results
+"""
+
+import pytest
+from data_handler import DataHandler
+
+# Backend name and store options. The json backend is run in every mode that changes how it writes
+store_configurations = {
+    "json": ("json", {}),
+    "json_journal": ("json", {"use_journal": True}),
+    "json_lazy": ("json", {"lazy_load": True}),
+    "sqlite": ("sqlite", {}),
+}
+
+
+def open_data_handler(save_file_location, configuration):
+    storage_backend, store_options = store_configurations[configuration]
+    return DataHandler(str(save_file_location), storage_backend=storage_backend, **store_options)
+
+
+def add_debug_accounts(dh, count=3):
+    return [dh.add_account({"primary_email": f"debug_email_{i}",
+                            "password": f"debug_password_{i}",
+                            "address": "street 0\nplz city\ncountry",
+                            "phone": 100000000 + i},
+                           account_name=f"Debug {i}", save_to_file=False) for i in range(count)]
+
+
+def run_operations(dh):
+    """
+    Create, change, delete and roll back accounts like the GUI does
+    """
+
+    account_ids = add_debug_accounts(dh)
+    dh.update_save_file()
+    dh.delete_account(account_ids[0])
+
+    dh.update_account(account_ids[1], {"password": "new_password", "new_parameter": "new_value", "phone": None})
+    dh.update_account(account_ids[2], {"unknown_parameter": None})  # Fails and gets rolled back
+
+    return account_ids
+
+
+@pytest.fixture(params=list(store_configurations))
+def configuration(request):
+    return request.param
+
+
+def test_create(tmp_path, configuration):
+    dh = open_data_handler(tmp_path, configuration)
+
+    assert dh.get_account_count() == 0
+    assert dh.get_settings() == DataHandler.base_data_structure["settings"]
+    assert dh.get_groups() == DataHandler.base_data_structure["groups"]
+    dh.close()
+
+
+def test_read(tmp_path, configuration):
+    dh = open_data_handler(tmp_path, configuration)
+    account_ids = add_debug_accounts(dh)
+    dh.update_save_file()
+    dh.close()
+
+    dh = open_data_handler(tmp_path, configuration)
+    assert [account_id for account_id, _ in dh.get_accounts()] == account_ids
+    assert dh.get_account_details(account_ids[1])["password"] == "debug_password_1"
+    assert list(dh.get_account_details(account_ids[1])) == ["primary_email", "password", "address", "phone",
+                                                            "group_id", "account_name", "account_id"]
+    dh.close()
+
+
+def test_transaction(tmp_path, configuration):
+    dh = open_data_handler(tmp_path, configuration)
+    account_ids = add_debug_accounts(dh)
+
+    with dh.transaction():
+        dh.update_account(account_ids[0], {"password": "changed"})
+        dh.delete_account(account_ids[1])
+    dh.close()
+
+    dh = open_data_handler(tmp_path, configuration)
+    assert dh.get_account_details(account_ids[0])["password"] == "changed"
+    assert [account_id for account_id, _ in dh.get_accounts()] == [account_ids[0], account_ids[2]]
+    dh.close()
+
+
+def test_rollback(tmp_path, configuration):
+    dh = open_data_handler(tmp_path, configuration)
+    account_ids = add_debug_accounts(dh)
+    dh.update_save_file()
+
+    with pytest.raises(RuntimeError):
+        with dh.transaction():
+            dh.update_account(account_ids[0], {"password": "changed", "phone": None})
+            dh.delete_account(account_ids[1])
+            dh.add_account({"password": "added"}, account_name="Added")
+            raise RuntimeError("Abort")
+
+    def check(dh):
+        assert dh.get_account_count() == 3
+        assert dh.get_account_details(account_ids[0])["password"] == "debug_password_0"
+        assert dh.get_account_details(account_ids[0])["phone"] == 100000000
+        assert dh.get_account_details(account_ids[1])["password"] == "debug_password_1"
+
+    check(dh)
+    dh.close()
+
+    dh = open_data_handler(tmp_path, configuration)
+    check(dh)
+    dh.close()
+
+
+def test_delete(tmp_path, configuration):
+    dh = open_data_handler(tmp_path, configuration)
+    account_ids = add_debug_accounts(dh)
+
+    assert dh.delete_account(account_ids[1])
+    assert not dh.delete_account(account_ids[1])  # Already deleted
+    dh.close()
+
+    dh = open_data_handler(tmp_path, configuration)
+    assert [account_id for account_id, _ in dh.get_accounts()] == [account_ids[0], account_ids[2]]
+    with pytest.raises(KeyError):
+        dh.get_account_details(account_ids[1])
+    dh.close()
+
+
+def test_backends_consistent(tmp_path):
+    exported_data = {}
+    for configuration in store_configurations:
+        (tmp_path / configuration).mkdir()
+        dh = open_data_handler(tmp_path / configuration, configuration)
+        run_operations(dh)
+        dh.close()
+
+        # Compared after reopening, so the saved state is compared
+        dh = open_data_handler(tmp_path / configuration, configuration)
+        exported_data[configuration] = dh.store.export_data()
+        dh.close()
+
+    for configuration, data in exported_data.items():
+        assert data == exported_data["json"], configuration
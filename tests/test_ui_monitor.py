@@ -0,0 +1,60 @@
+import os
+import time
+import tkinter as tk
+import pytest
+from ui_monitor import UiMonitor
+
+
+def test_tkinter_internals_supported():
+    assert UiMonitor.check_tkinter() is None
+
+
+def test_disabled_on_unexpected_internals(monkeypatch):
+    monkeypatch.setattr(tk.Misc, "_register", lambda self, func: None)
+    register = tk.Misc._register
+
+    monitor = UiMonitor()
+    monitor.install()
+
+    assert monitor.disabled
+    assert tk.Misc._register is register
+
+
+def run_idle(root, seconds):
+    """
+    Process events for a while without scheduling anything, as an after() to stop would be a timer itself
+    """
+
+    end_time = time.perf_counter() + seconds
+    while time.perf_counter() < end_time:
+        root.update()
+        time.sleep(0.01)
+
+
+def test_idle_window_has_no_timers(tmp_path, monkeypatch):
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        pytest.skip("No display")
+
+    # Icons are loaded relative to the src folder
+    monkeypatch.chdir(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+    from gui import AccountManager
+
+    monitor = UiMonitor()
+    account_manager = None
+    try:
+        account_manager = AccountManager(save_file_location=str(tmp_path), ui_monitor=monitor)
+
+        # Startup work (first render, icon cache) is done in the first idle cycles
+        run_idle(account_manager, 1)
+        monitor.interval_timer_wakeups = 0
+
+        run_idle(account_manager, 1)
+
+        assert monitor.interval_timer_wakeups == 0
+        assert monitor.get_pending_timers() - {monitor.heartbeat_call, monitor.report_call} == set()
+    finally:
+        if account_manager is not None:
+            account_manager.on_close()
+        monitor.uninstall()
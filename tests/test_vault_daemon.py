@@ -0,0 +1,58 @@
+import os
+import stat
+import threading
+import pytest
+import vault_daemon
+from data_handler import DataHandler
+from vault_daemon import VaultClient, VaultServer, connect_or_open, get_socket_path
+
+pytestmark = pytest.mark.skipif(not vault_daemon.is_supported(), reason="No Unix domain sockets")
+
+
+@pytest.fixture
+def server(tmp_path):
+    data_handler = DataHandler(str(tmp_path), use_journal=True)
+    server = VaultServer(data_handler, get_socket_path(str(tmp_path)))
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    server_thread.join()
+    data_handler.close()
+
+
+def test_connect_or_open_falls_back_to_data_handler(tmp_path):
+    # Socket file of a daemon that is not running anymore
+    open(get_socket_path(str(tmp_path)), "w").close()
+
+    data_handler = connect_or_open(str(tmp_path))
+    assert isinstance(data_handler, DataHandler)
+    data_handler.close()
+
+
+def test_connect_or_open_connects_to_daemon(tmp_path, server):
+    client = connect_or_open(str(tmp_path))
+    assert isinstance(client, VaultClient)
+    client.close()
+
+
+def test_socket_only_accessible_by_owner(server):
+    assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+
+
+def test_changes_visible_to_other_clients(server):
+    first_client = VaultClient(server.socket_path)
+    second_client = VaultClient(server.socket_path)
+
+    account_id = first_client.add_account({"password": "secret"}, account_name="Shared")
+    first_client.update_account(account_id, {"password": "changed"})
+
+    assert second_client.get_account_details(account_id)["password"] == "changed"
+    assert second_client.search("changed") == {account_id}
+    assert second_client.call("ping")["version"] == 2
+
+    first_client.close()
+    second_client.close()